@@ -0,0 +1,28 @@
+"""location history keyset index
+
+Revision ID: 0e5833c161d1
+Revises: 3a19a2d4f627
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0e5833c161d1'
+down_revision = '3a19a2d4f627'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # History pages seek on (timestamp, id) within one tourist; the old
+    # (tourist_id, timestamp) index is a prefix of this one
+    op.create_index('ix_locations_tourist_id_timestamp_id', 'locations', ['tourist_id', 'timestamp', 'id'])
+    op.drop_index('ix_locations_tourist_id_timestamp', table_name='locations')
+
+
+def downgrade() -> None:
+    op.create_index('ix_locations_tourist_id_timestamp', 'locations', ['tourist_id', 'timestamp'])
+    op.drop_index('ix_locations_tourist_id_timestamp_id', table_name='locations')
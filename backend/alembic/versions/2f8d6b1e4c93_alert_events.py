@@ -0,0 +1,65 @@
+"""alert events
+
+Revision ID: 2f8d6b1e4c93
+Revises: 7c4e1f9a2b58
+Create Date: 2026-10-18 21:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8d6b1e4c93'
+down_revision = '7c4e1f9a2b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'alert_events',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('alert_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('priority', sa.String(), nullable=True),
+        sa.Column('officer_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['alert_id'], ['alerts.id'], ),
+        sa.ForeignKeyConstraint(['officer_id'], ['police.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alert_events_alert_id_id', 'alert_events', ['alert_id', 'id'])
+
+    # Seed the log from the existing rows so replaying it reproduces them; the
+    # assignment time is not stored, so it is taken as the acknowledgement's
+    op.execute("""
+        INSERT INTO alert_events (alert_id, event_type, status, priority, officer_id, created_at)
+        SELECT alert_id, event_type, status, priority, officer_id, created_at
+        FROM (
+            SELECT id AS alert_id, 'created' AS event_type, 'active' AS status, priority,
+                   NULL::integer AS officer_id, created_at, 0 AS step
+            FROM alerts
+            UNION ALL
+            SELECT id, 'assigned', 'active', NULL, assigned_officer_id,
+                   coalesce(acknowledged_at, resolved_at, created_at), 1
+            FROM alerts WHERE assigned_officer_id IS NOT NULL
+            UNION ALL
+            SELECT id, 'acknowledged', 'acknowledged', NULL, NULL, acknowledged_at, 2
+            FROM alerts WHERE acknowledged_at IS NOT NULL
+            UNION ALL
+            SELECT id, 'resolved', 'resolved', NULL, NULL, resolved_at, 3
+            FROM alerts WHERE resolved_at IS NOT NULL
+            UNION ALL
+            SELECT id, 'reopened', 'active', NULL, NULL,
+                   greatest(acknowledged_at, resolved_at), 4
+            FROM alerts WHERE status = 'active' AND (acknowledged_at IS NOT NULL OR resolved_at IS NOT NULL)
+        ) AS seed
+        ORDER BY alert_id, step
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_events_alert_id_id', table_name='alert_events')
+    op.drop_table('alert_events')
@@ -0,0 +1,116 @@
+"""partition locations by day
+
+Revision ID: 3a19a2d4f627
+Revises: c6f339210bcc
+Create Date: 2026-10-18 12:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+
+# revision identifiers, used by Alembic.
+revision = '3a19a2d4f627'
+down_revision = 'c6f339210bcc'
+branch_labels = None
+depends_on = None
+
+# Daily partitions created up front; the maintenance job keeps this window rolling
+PREMAKE_DAYS = 7
+
+
+def upgrade() -> None:
+    # Keep the existing heap and attach it as the first partition, so no rows are copied
+    op.execute("ALTER TABLE locations RENAME TO locations_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_locations_id RENAME TO ix_locations_legacy_id")
+    op.execute("ALTER INDEX IF EXISTS idx_locations_location RENAME TO idx_locations_legacy_location")
+    op.execute("UPDATE locations_legacy SET \"timestamp\" = now() WHERE \"timestamp\" IS NULL")
+    op.execute("ALTER TABLE locations_legacy ALTER COLUMN \"timestamp\" SET NOT NULL")
+    # A partition's primary key must match the parent's (id, "timestamp"); ATTACH
+    # PARTITION adopts this one instead of failing on a second primary key
+    op.execute("ALTER TABLE locations_legacy DROP CONSTRAINT locations_pkey")
+    op.execute("ALTER TABLE locations_legacy ADD CONSTRAINT locations_legacy_pkey PRIMARY KEY (id, \"timestamp\")")
+
+    op.execute("""
+        CREATE TABLE locations (
+            id integer NOT NULL DEFAULT nextval('locations_id_seq'),
+            tourist_id integer REFERENCES tourists (id),
+            latitude double precision NOT NULL,
+            longitude double precision NOT NULL,
+            location geometry(POINT),
+            address varchar,
+            accuracy double precision,
+            "timestamp" timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute("ALTER SEQUENCE locations_id_seq OWNED BY locations.id")
+    op.execute("CREATE INDEX ix_locations_tourist_id_timestamp ON locations (tourist_id, \"timestamp\")")
+
+    # Legacy rows keep everything up to the end of their newest day; daily partitions
+    # follow, and a default partition catches fixes outside the premade window
+    op.execute(f"""
+        DO $$
+        DECLARE
+            first_day date := (now() AT TIME ZONE 'UTC')::date;
+            legacy_end date;
+            day date;
+        BEGIN
+            SELECT greatest(first_day + 1, (max("timestamp") AT TIME ZONE 'UTC')::date + 1)
+              INTO legacy_end
+              FROM locations_legacy;
+            EXECUTE format(
+                'ALTER TABLE locations ATTACH PARTITION locations_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+                legacy_end::timestamp AT TIME ZONE 'UTC'
+            );
+            CREATE TABLE locations_default PARTITION OF locations DEFAULT;
+            day := legacy_end;
+            WHILE day <= first_day + {PREMAKE_DAYS} LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF locations FOR VALUES FROM (%L) TO (%L)',
+                    'locations_p' || to_char(day, 'YYYYMMDD'),
+                    day::timestamp AT TIME ZONE 'UTC',
+                    (day + 1)::timestamp AT TIME ZONE 'UTC'
+                );
+                day := day + 1;
+            END LOOP;
+        END $$
+    """)
+
+    op.create_table('location_trajectories',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('tourist_id', sa.Integer(), sa.ForeignKey('tourists.id'), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('bucket_seconds', sa.Integer(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=False),
+        sa.Column('longitude', sa.Float(), nullable=False),
+        sa.Column('location', geoalchemy2.types.Geometry(geometry_type='POINT', from_text='ST_GeomFromEWKT', name='geometry', spatial_index=False)),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('first_timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint('tourist_id', 'bucket_start', name='uq_location_trajectories_tourist_bucket'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('location_trajectories')
+
+    op.execute("""
+        CREATE TABLE locations_unpartitioned (
+            id integer PRIMARY KEY DEFAULT nextval('locations_id_seq'),
+            tourist_id integer REFERENCES tourists (id),
+            latitude double precision NOT NULL,
+            longitude double precision NOT NULL,
+            location geometry(POINT),
+            address varchar,
+            accuracy double precision,
+            "timestamp" timestamptz DEFAULT now()
+        )
+    """)
+    op.execute("INSERT INTO locations_unpartitioned SELECT * FROM locations")
+    op.execute("ALTER SEQUENCE locations_id_seq OWNED BY locations_unpartitioned.id")
+    op.execute("DROP TABLE locations CASCADE")
+    op.execute("ALTER TABLE locations_unpartitioned RENAME TO locations")
+    op.execute("ALTER TABLE locations RENAME CONSTRAINT locations_unpartitioned_pkey TO locations_pkey")
+    op.execute("CREATE INDEX ix_locations_id ON locations (id)")
@@ -0,0 +1,26 @@
+"""trip destination coordinates
+
+Revision ID: 5d2f8a6c3b17
+Revises: 9b4e2c7d1a05
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8a6c3b17'
+down_revision = '9b4e2c7d1a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('trips', sa.Column('destination_latitude', sa.Float(), nullable=True))
+    op.add_column('trips', sa.Column('destination_longitude', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('trips', 'destination_longitude')
+    op.drop_column('trips', 'destination_latitude')
@@ -0,0 +1,34 @@
+"""alert feed indexes
+
+Revision ID: 7c4e1f9a2b58
+Revises: 5d2f8a6c3b17
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1f9a2b58'
+down_revision = '5d2f8a6c3b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The feed pages newest first on (created_at, id); each index serves the
+    # backward scan for its filter without a sort
+    op.create_index('ix_alerts_created_at_id', 'alerts', ['created_at', 'id'])
+    op.create_index('ix_alerts_status_created_at_id', 'alerts', ['status', 'created_at', 'id'])
+    # Dashboards mostly watch active alerts of a given priority
+    op.create_index(
+        'ix_alerts_active_priority_created_at_id', 'alerts', ['priority', 'created_at', 'id'],
+        postgresql_where=sa.text("status = 'active'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alerts_active_priority_created_at_id', table_name='alerts')
+    op.drop_index('ix_alerts_status_created_at_id', table_name='alerts')
+    op.drop_index('ix_alerts_created_at_id', table_name='alerts')
@@ -0,0 +1,45 @@
+"""spatial indexes
+
+Revision ID: 9b4e2c7d1a05
+Revises: 0e5833c161d1
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2c7d1a05'
+down_revision = '0e5833c161d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Planar GiST indexes, named like the ones GeoAlchemy2 creates through
+    # create_all, so databases bootstrapped that way are left untouched
+    op.execute("CREATE INDEX IF NOT EXISTS idx_alerts_location ON alerts USING gist (location)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_tourists_current_location ON tourists USING gist (current_location)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_safety_zones_geometry ON safety_zones USING gist (geometry)")
+    # Cascades to every partition; the legacy partition's index is attached as is
+    op.execute("CREATE INDEX IF NOT EXISTS idx_locations_location ON locations USING gist (location)")
+
+    # Meter-based ST_DWithin and KNN `<->` run on geography expressions
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tourists_current_location_geog "
+        "ON tourists USING gist (geography(current_location))"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_alerts_active_location_geog "
+        "ON alerts USING gist (geography(location)) WHERE status = 'active'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_alerts_active_location_geog")
+    op.execute("DROP INDEX IF EXISTS idx_tourists_current_location_geog")
+    op.execute("DROP INDEX IF EXISTS idx_locations_location")
+    op.execute("DROP INDEX IF EXISTS idx_safety_zones_geometry")
+    op.execute("DROP INDEX IF EXISTS idx_tourists_current_location")
+    op.execute("DROP INDEX IF EXISTS idx_alerts_location")
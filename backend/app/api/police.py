@@ -1,25 +1,241 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..core.database import get_db
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import numpy as np
+from ..core.config import settings
+from ..core.database import get_db, SessionLocal
+from ..core.live_positions import live_positions
+from ..core.timestamps import as_utc
 from ..api.deps import get_current_active_user, require_role
 from ..models.user import User
-from ..schemas.alert import Alert, AlertUpdate
+from ..schemas.alert import Alert, AlertEvent, AlertUpdate
+from ..services.alert_events import alert_event_log
 from ..services.alert_service import AlertService
-from ..services.tourist_service import TouristService
+from ..services.dashboard_counters import dashboard_counters
+from ..services.geofence_service import geofence_engine
+from ..services.map_clusters import MAX_ZOOM, map_cluster_service
+from ..services.proximity_service import ProximityService
+from ..services.tourist_service import (
+    TouristService, BoundingBox, encode_history_cursor, decode_history_cursor
+)
 
 router = APIRouter(prefix="/police", tags=["police"])
 
+def _bounding_box(
+    min_latitude: Optional[float],
+    min_longitude: Optional[float],
+    max_latitude: Optional[float],
+    max_longitude: Optional[float]
+) -> Optional[BoundingBox]:
+    bounds = (min_latitude, min_longitude, max_latitude, max_longitude)
+    if all(bound is None for bound in bounds):
+        return None
+    if any(bound is None for bound in bounds):
+        raise HTTPException(status_code=400, detail="Bounding box needs all four bounds")
+    if min_latitude > max_latitude or min_longitude > max_longitude:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return bounds
+
+def _history_window(start: Optional[datetime], end: Optional[datetime]):
+    # Query strings without an offset are read as UTC
+    end = as_utc(end) if end else datetime.now(timezone.utc)
+    start = as_utc(start) if start else end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+def _location_row(row) -> dict:
+    return {
+        "id": row.id,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "accuracy": row.accuracy,
+        "address": row.address,
+        "timestamp": row.timestamp.isoformat()
+    }
+
+def _alert_row(row) -> dict:
+    location = None
+    if row.latitude is not None:
+        location = {"latitude": row.latitude, "longitude": row.longitude, "address": row.address}
+    return {
+        "id": row.id,
+        "tourist_id": row.tourist_id,
+        "type": row.type,
+        "priority": row.priority,
+        "status": row.status,
+        "message": row.message,
+        "location": location,
+        "metadata": row.alert_metadata,
+        "assigned_officer_id": row.assigned_officer_id,
+        "created_at": row.created_at,
+        "acknowledged_at": row.acknowledged_at,
+        "resolved_at": row.resolved_at
+    }
+
 @router.get("/alerts", response_model=List[Alert])
 def get_alerts(
+    response: Response,
     status: Optional[str] = None,
-    limit: int = 50,
+    priority: Optional[str] = None,
+    alert_type: Optional[str] = Query(None, alias="type"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_latitude: Optional[float] = None,
+    min_longitude: Optional[float] = None,
+    max_latitude: Optional[float] = None,
+    max_longitude: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, gt=0, le=500),
     current_user: User = Depends(require_role("police")),
     db: Session = Depends(get_db)
 ):
-    """Get alerts for police dashboard"""
+    """Get one page of alerts for police dashboard, newest first.
+    
+    When more alerts may follow, the cursor for the next page is returned
+    in the `X-Next-Cursor` header.
+    """
+    bbox = _bounding_box(min_latitude, min_longitude, max_latitude, max_longitude)
+    try:
+        after = decode_history_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     alert_service = AlertService(db)
-    return alert_service.get_alerts(status=status, limit=limit)
+    rows = alert_service.get_alerts(
+        status=status, limit=limit, priority=priority, alert_type=alert_type,
+        start=as_utc(start) if start else None, end=as_utc(end) if end else None,
+        bbox=bbox, after=after
+    )
+    
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_history_cursor(rows[-1].created_at, rows[-1].id)
+    return [_alert_row(row) for row in rows]
+
+@router.get("/alerts/box")
+def get_alerts_in_box(
+    min_latitude: float,
+    min_longitude: float,
+    max_latitude: float,
+    max_longitude: float,
+    status: Optional[str] = None,
+    limit: int = Query(500, gt=0, le=5000),
+    current_user: User = Depends(require_role("police")),
+    db: Session = Depends(get_db)
+):
+    """Get alerts inside a map viewport"""
+    _bounding_box(min_latitude, min_longitude, max_latitude, max_longitude)
+    proximity_service = ProximityService(db)
+    return proximity_service.get_alerts_in_box(
+        min_latitude, min_longitude, max_latitude, max_longitude, status=status, limit=limit
+    )
+
+@router.get("/alerts/nearest")
+def get_nearest_alerts(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, gt=0, le=100),
+    current_user: User = Depends(require_role("police")),
+    db: Session = Depends(get_db)
+):
+    """Get the nearest active alerts to a point"""
+    proximity_service = ProximityService(db)
+    return proximity_service.get_nearest_active_alerts(latitude, longitude, k=k)
+
+@router.get("/alerts/{alert_id}/nearby-tourists")
+async def get_tourists_near_alert(
+    alert_id: int,
+    radius_m: float = Query(1000, gt=0, le=50000),
+    limit: int = Query(100, gt=0, le=1000),
+    current_user: User = Depends(require_role("police")),
+    db: Session = Depends(get_db)
+):
+    """Get tourists within a radius of an alert, nearest first.
+    
+    With live positions enabled, `current_location` only catches up on the
+    periodic sync, so the search runs on the live position store instead.
+    """
+    proximity_service = ProximityService(db)
+    if not settings.LIVE_POSITIONS_ENABLED:
+        tourists = await asyncio.to_thread(
+            proximity_service.get_tourists_near_alert, alert_id, radius_m, limit=limit
+        )
+        if tourists is None:
+            raise HTTPException(status_code=404, detail="Alert not found or has no location")
+        return tourists
+    
+    point = await asyncio.to_thread(proximity_service.get_alert_point, alert_id)
+    if point is None:
+        raise HTTPException(status_code=404, detail="Alert not found or has no location")
+    positions = await live_positions.within_radius(*point, radius_m, limit=limit)
+    identities = await asyncio.to_thread(
+        proximity_service.get_tourist_identities, [p["tourist_id"] for p in positions]
+    )
+    return [
+        {
+            "tourist_id": position["tourist_id"],
+            "digital_id": identities[position["tourist_id"]][0],
+            "name": identities[position["tourist_id"]][1],
+            "latitude": position["latitude"],
+            "longitude": position["longitude"],
+            "distance_m": position["distance_m"]
+        }
+        for position in positions
+        if position["tourist_id"] in identities
+    ]
+
+@router.get("/alerts/events")
+async def get_alert_events(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, gt=0, le=1000),
+    wait_ms: int = Query(0, ge=0, le=30000),
+    current_user: User = Depends(require_role("police"))
+):
+    """Get alert events after a cursor, for updating dashboards incrementally.
+    
+    Without a cursor the latest events are returned. Pass the returned
+    cursor on the next call; `wait_ms` long-polls until events arrive.
+    """
+    try:
+        events, next_cursor = await alert_event_log.feed(cursor, limit, wait_ms)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"events": events, "cursor": next_cursor}
+
+@router.get("/alerts/response-times")
+def get_alert_response_times(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(require_role("police")),
+    db: Session = Depends(get_db)
+):
+    """Get acknowledgement and resolution time percentiles for alerts created in a window, replayed from their events"""
+    start, end = _history_window(start, end)
+    projections = alert_event_log.replay(db, start=start, end=end)
+    
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "alerts": len(projections),
+        **alert_event_log.response_times(projections.values())
+    }
+
+@router.get("/alerts/{alert_id}/timeline", response_model=List[AlertEvent])
+def get_alert_timeline(
+    alert_id: int,
+    current_user: User = Depends(require_role("police")),
+    db: Session = Depends(get_db)
+):
+    """Get every state change of an alert, oldest first"""
+    alert_service = AlertService(db)
+    events = alert_service.get_alert_timeline(alert_id)
+    if not events:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return events
 
 @router.get("/alerts/{alert_id}", response_model=Alert)
 def get_alert_details(
@@ -41,9 +257,12 @@ def update_alert(
     current_user: User = Depends(require_role("police")),
     db: Session = Depends(get_db)
 ):
-    """Update alert status"""
+    """Update alert status, assignment or priority"""
     alert_service = AlertService(db)
-    alert = alert_service.update_alert(alert_id, alert_update)
+    try:
+        alert = alert_service.update_alert(alert_id, alert_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
@@ -57,23 +276,160 @@ def get_tourists(
     tourist_service = TouristService(db)
     return tourist_service.get_all_tourists()
 
-@router.get("/dashboard/stats")
-def get_police_dashboard_stats(
+@router.get("/tourists/live/nearby")
+async def get_live_tourists_nearby(
+    latitude: float,
+    longitude: float,
+    radius_m: float = Query(1000, gt=0, le=50000),
+    limit: Optional[int] = Query(None, gt=0, le=5000),
+    current_user: User = Depends(require_role("police"))
+):
+    """Get tourists currently within a radius of a point, nearest first"""
+    return await live_positions.within_radius(latitude, longitude, radius_m, limit=limit)
+
+@router.get("/tourists/live/box")
+async def get_live_tourists_in_box(
+    min_latitude: float,
+    min_longitude: float,
+    max_latitude: float,
+    max_longitude: float,
+    limit: Optional[int] = Query(None, gt=0, le=5000),
+    current_user: User = Depends(require_role("police"))
+):
+    """Get tourists currently inside a map viewport"""
+    if min_latitude > max_latitude or min_longitude > max_longitude:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return await live_positions.within_box(
+        min_latitude, min_longitude, max_latitude, max_longitude, limit=limit
+    )
+
+@router.get("/tourists/{tourist_id}/locations")
+def get_tourist_location_history(
+    tourist_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_latitude: Optional[float] = None,
+    min_longitude: Optional[float] = None,
+    max_latitude: Optional[float] = None,
+    max_longitude: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, gt=0, le=5000),
     current_user: User = Depends(require_role("police")),
     db: Session = Depends(get_db)
 ):
-    """Get police dashboard statistics"""
-    alert_service = AlertService(db)
+    """Get one page of a tourist's location history, oldest first"""
+    start, end = _history_window(start, end)
+    bbox = _bounding_box(min_latitude, min_longitude, max_latitude, max_longitude)
+    try:
+        after = decode_history_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     tourist_service = TouristService(db)
+    rows = tourist_service.get_location_history(tourist_id, start, end, bbox=bbox, after=after, limit=limit)
+    
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_history_cursor(rows[-1].timestamp, rows[-1].id)
     
-    alert_stats = alert_service.get_alert_statistics()
-    tourist_stats = tourist_service.get_tourist_statistics()
+    return {
+        "items": [_location_row(row) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+@router.get("/tourists/{tourist_id}/locations/stream")
+def stream_tourist_location_history(
+    tourist_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_latitude: Optional[float] = None,
+    min_longitude: Optional[float] = None,
+    max_latitude: Optional[float] = None,
+    max_longitude: Optional[float] = None,
+    current_user: User = Depends(require_role("police"))
+):
+    """Stream a tourist's location history as NDJSON"""
+    start, end = _history_window(start, end)
+    bbox = _bounding_box(min_latitude, min_longitude, max_latitude, max_longitude)
+    
+    def generate():
+        # The stream outlives the request-scoped session, so it owns one
+        db = SessionLocal()
+        try:
+            rows = TouristService(db).iter_location_history(tourist_id, start, end, bbox=bbox)
+            for row in rows:
+                yield json.dumps(_location_row(row)) + "\n"
+        finally:
+            db.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/zones/occupancy")
+async def get_zone_occupancy(
+    zone_type: Optional[str] = None,
+    current_user: User = Depends(require_role("police"))
+):
+    """Get the live tourists inside each active safety zone"""
+    positions = await live_positions.snapshot()
+    tourist_ids = np.fromiter((p["tourist_id"] for p in positions), dtype=np.int64, count=len(positions))
+    latitudes = np.fromiter((p["latitude"] for p in positions), dtype=np.float64, count=len(positions))
+    longitudes = np.fromiter((p["longitude"] for p in positions), dtype=np.float64, count=len(positions))
+    
+    membership = await asyncio.to_thread(geofence_engine.zones_for_points, latitudes, longitudes)
+    
+    occupancy = {}
+    for zone_id, tourist_id in zip(membership.zone_id.tolist(), tourist_ids[membership.point_index].tolist()):
+        occupancy.setdefault(zone_id, []).append(tourist_id)
+    
+    zones = []
+    for zone in geofence_engine.zones:
+        if zone_type and zone.zone_type != zone_type:
+            continue
+        inside = occupancy.get(zone.id, [])
+        zones.append({
+            "zone_id": zone.id,
+            "zone_name": zone.name,
+            "zone_type": zone.zone_type,
+            "tourist_count": len(inside),
+            "tourist_ids": sorted(inside)
+        })
+    
+    return {"live_tourists": len(positions), "zones": zones}
+
+@router.get("/map/clusters")
+async def get_map_clusters(
+    min_latitude: float = Query(..., ge=-90, le=90),
+    min_longitude: float = Query(..., ge=-180, le=180),
+    max_latitude: float = Query(..., ge=-90, le=90),
+    max_longitude: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+    current_user: User = Depends(require_role("police"))
+):
+    """Get clusters of live tourists and active alerts for a map viewport"""
+    _bounding_box(min_latitude, min_longitude, max_latitude, max_longitude)
+    try:
+        clusters = await map_cluster_service.clusters(
+            min_latitude, min_longitude, max_latitude, max_longitude, zoom
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"zoom": zoom, "clusters": clusters}
+
+@router.get("/dashboard/stats")
+async def get_police_dashboard_stats(
+    current_user: User = Depends(require_role("police"))
+):
+    """Get police dashboard statistics"""
+    # Served from Redis counters, see `DashboardCounters`
+    counters = await dashboard_counters.read()
     
     return {
-        "active_alerts": alert_stats["active_alerts"],
-        "active_tourists": tourist_stats["active_tourists"],
-        "resolved_today": alert_stats["resolved_today"],
-        "total_incidents": alert_stats["total_alerts"]
+        "active_alerts": counters.get("active_alerts", 0),
+        "active_tourists": counters.get("active_tourists", 0),
+        "resolved_today": counters.get("resolved_today", 0),
+        "total_incidents": counters.get("total_alerts", 0),
+        "median_response_time_s": counters.get("response_time_s")
     }
 
 @router.post("/alerts/{alert_id}/call")
@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
+from geoalchemy2.shape import to_shape
+from typing import Collection, List, Sequence, Set
+from datetime import datetime, timezone
+import asyncio
+import json
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.live_positions import live_positions
+from ..core import location_codec
 from ..api.deps import get_current_active_user, require_role
 from ..models.user import User, Tourist
 from ..schemas.user import TouristUpdate
 from ..schemas.trip import TripCreate, Trip
-from ..schemas.location import LocationCreate, Location
+from ..schemas.location import LocationCreate, LocationBatchCreate, Location
 from ..schemas.alert import AlertCreate, Alert
 from ..services.tourist_service import TouristService
-from ..services.alert_service import AlertService
+from ..services.location_buffer import location_buffer, LocationBufferFull
+from ..services.trajectory_compressor import trajectory_compressor
+from ..services.geofence_service import geofence_engine
+from ..services.geofence_tracker import geofence_tracker, send_geofence_events
+from ..services.anomaly_detector import anomaly_detector
+from ..services.anomaly_alerts import send_anomaly_alerts, trip_destination
+from ..services.alert_service import panic_alert_data
+from ..services.alert_dispatcher import alert_dispatcher
 from ..services.notification_service import notification_service
 from ..services.ai_service import ai_service
+from ..services.safety_score_scheduler import crossed_threshold, safety_score_scheduler
+from ..services.chatbot import chatbot_pipeline
+from ..services.knowledge_base import knowledge_base
 
 router = APIRouter(prefix="/tourist", tags=["tourist"])
 
@@ -62,7 +82,9 @@ def create_trip(
     if not tourist:
         raise HTTPException(status_code=404, detail="Tourist profile not found")
     
-    return tourist_service.create_trip(tourist.id, trip_data)
+    trip = tourist_service.create_trip(tourist.id, trip_data)
+    anomaly_detector.set_destination(tourist.id, trip_destination(trip))
+    return trip
 
 @router.get("/trip/active", response_model=Trip)
 def get_active_trip(
@@ -81,32 +103,161 @@ def get_active_trip(
     
     return trip
 
+async def _store_fixes(
+    tourist_service: TouristService, tourist_id: int, fixes: Sequence[LocationCreate], alert_times: Collection[float] = ()
+) -> int:
+    """Queue fixes on the write-behind buffer, or write them inline when it is disabled.
+    
+    Fixes at `alert_times` raised an alert and survive compression.
+    """
+    kept = fixes
+    if settings.TRAJECTORY_COMPRESSION_ENABLED:
+        kept = trajectory_compressor.compress(tourist_id, fixes, alert_times)
+    
+    stored = 0
+    if kept and not settings.LOCATION_BUFFER_ENABLED:
+        stored = await asyncio.to_thread(
+            tourist_service.update_locations_batch,
+            tourist_id, kept, move_current_location=not settings.LIVE_POSITIONS_ENABLED
+        )
+    elif kept:
+        try:
+            stored = await location_buffer.submit(tourist_id, kept)
+        except LocationBufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Location ingest is busy, retry shortly",
+                headers={"Retry-After": "1"}
+            )
+    
+    # Only after the fixes are accepted, so a rejected upload does not move the tourist
+    if settings.LIVE_POSITIONS_ENABLED:
+        newest = fixes[-1]
+        await live_positions.update(
+            tourist_id, newest.latitude, newest.longitude,
+            newest.timestamp or datetime.now(timezone.utc), newest.accuracy
+        )
+    return stored
+
+async def _check_geofences(tourist_id: int, tourist_name: str, fixes: Sequence[LocationCreate]) -> Set[float]:
+    """Run every fix through the geofence tracker and publish zone transitions; returns the alerting fix times"""
+    events = []
+    for fix in fixes:
+        timestamp = (fix.timestamp or datetime.now(timezone.utc)).timestamp()
+        events.extend(geofence_tracker.update(tourist_id, fix.latitude, fix.longitude, timestamp))
+    # The stored track is kept through `_store_fixes` instead of `mark_alert`
+    await send_geofence_events({"id": tourist_id, "name": tourist_name}, events, mark_track=False)
+    return {event.timestamp for event in events if event.zone.zone_type == "risk"}
+
+async def _safety_score(tourist_service: TouristService, tourist: Tourist, tourist_name: str, fix: LocationCreate) -> float:
+    """Cached score from the recompute scheduler; scored here only when nothing is cached"""
+    cached = await safety_score_scheduler.cached_score(tourist.id)
+    if cached is not None:
+        return cached
+    
+    ai_score = await ai_service.predict_safety_score(
+        {"id": tourist.id, "name": tourist_name},
+        {"latitude": fix.latitude, "longitude": fix.longitude, "timestamp": fix.timestamp}
+    )
+    await safety_score_scheduler.cache_scores({tourist.id: ai_score})
+    
+    # Update safety score if significantly different
+    if abs(tourist.safety_score - ai_score) > 1.0:
+        previous = tourist.safety_score
+        await asyncio.to_thread(tourist_service.update_safety_score, tourist.id, ai_score)
+        if crossed_threshold(previous, ai_score):
+            await notification_service.send_safety_score_alert(
+                {"id": tourist.id, "name": tourist_name}, ai_score
+            )
+    return ai_score
+
+async def _check_anomalies(db: Session, tourist: Tourist, tourist_name: str, fixes: Sequence[LocationCreate]) -> Set[float]:
+    """Feed fixes to the streaming anomaly detector and raise alerts for what it finds; returns the alerting fix times"""
+    if not settings.ANOMALY_DETECTION_ENABLED:
+        return set()
+    
+    if anomaly_detector.needs_destination(tourist.id):
+        trip = await asyncio.to_thread(TouristService(db).get_active_trip, tourist.id)
+        anomaly_detector.set_destination(tourist.id, trip_destination(trip))
+    
+    now = datetime.now(timezone.utc)
+    anomalies = anomaly_detector.update_many(
+        tourist.id,
+        [fix.latitude for fix in fixes],
+        [fix.longitude for fix in fixes],
+        [(fix.timestamp or now).timestamp() for fix in fixes]
+    )
+    if anomalies:
+        await send_anomaly_alerts(
+            {"id": tourist.id, "name": tourist_name, "digital_id": tourist.digital_id}, anomalies
+        )
+    return {anomaly.timestamp for anomaly in anomalies}
+
 @router.post("/location")
-def update_location(
+async def update_location(
     location_data: LocationCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update tourist location"""
     tourist_service = TouristService(db)
-    tourist = tourist_service.get_tourist_by_user_id(current_user.id)
+    tourist = await asyncio.to_thread(tourist_service.get_tourist_by_user_id, current_user.id)
     if not tourist:
         raise HTTPException(status_code=404, detail="Tourist profile not found")
     
-    location = tourist_service.update_location(tourist.id, location_data)
+    if location_data.timestamp is None:
+        location_data.timestamp = datetime.now(timezone.utc)
+    # Detection runs first so the fixes that raise alerts are kept by compression
+    alert_times = await _check_geofences(tourist.id, current_user.name, [location_data])
+    alert_times |= await _check_anomalies(db, tourist, current_user.name, [location_data])
+    await _store_fixes(tourist_service, tourist.id, [location_data], alert_times)
     
-    # Calculate AI safety score
-    ai_score = ai_service.calculate_ai_safety_score(
-        {"id": tourist.id, "name": current_user.name},
-        {"latitude": location_data.latitude, "longitude": location_data.longitude}
-    )
-    
-    # Update safety score if significantly different
-    if abs(tourist.safety_score - ai_score) > 1.0:
-        tourist_service.update_safety_score(tourist.id, ai_score)
+    ai_score = await _safety_score(tourist_service, tourist, current_user.name, location_data)
     
     return {"message": "Location updated successfully", "ai_safety_score": ai_score}
 
+@router.post("/location/batch")
+async def update_location_batch(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Store a batch of buffered location fixes.
+    
+    Accepts a JSON `LocationBatchCreate` body, or the compact binary format
+    from `core.location_codec` with Content-Type `application/x-location-batch`.
+    """
+    tourist_service = TouristService(db)
+    tourist = await asyncio.to_thread(tourist_service.get_tourist_by_user_id, current_user.id)
+    if not tourist:
+        raise HTTPException(status_code=404, detail="Tourist profile not found")
+    
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(location_codec.CONTENT_TYPE):
+        try:
+            fixes = location_codec.decode_location_batch(body).fixes()
+        except location_codec.LocationCodecError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        try:
+            fixes = LocationBatchCreate.model_validate_json(body).locations
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+    
+    alert_times = await _check_geofences(tourist.id, current_user.name, fixes)
+    alert_times |= await _check_anomalies(db, tourist, current_user.name, fixes)
+    stored = await _store_fixes(tourist_service, tourist.id, fixes, alert_times)
+    
+    # Score once per batch, from the newest fix
+    ai_score = await _safety_score(tourist_service, tourist, current_user.name, fixes[-1])
+    
+    return {
+        "message": "Locations updated successfully",
+        "accepted": len(fixes),
+        "stored": stored,
+        "ai_safety_score": ai_score
+    }
+
 @router.post("/panic")
 async def trigger_panic_button(
     current_user: User = Depends(get_current_active_user),
@@ -114,47 +265,97 @@ async def trigger_panic_button(
 ):
     """Trigger panic button alert"""
     tourist_service = TouristService(db)
-    alert_service = AlertService(db)
     
-    tourist = tourist_service.get_tourist_by_user_id(current_user.id)
+    tourist = await asyncio.to_thread(tourist_service.get_tourist_by_user_id, current_user.id)
     if not tourist:
         raise HTTPException(status_code=404, detail="Tourist profile not found")
     
-    # Create panic alert
-    alert = alert_service.create_panic_alert(
-        tourist.id,
-        {"latitude": 28.6139, "longitude": 77.209, "address": "India Gate, New Delhi"}  # Mock location
-    )
+    # Make sure the track around the alert survives compression
+    trajectory_compressor.mark_alert(tourist.id)
     
-    # Send notifications
-    await notification_service.send_panic_alert(
-        {"id": tourist.id, "name": current_user.name, "digital_id": tourist.digital_id},
-        {"id": alert.id, "created_at": alert.created_at.isoformat(), "address": "India Gate, New Delhi"}
+    async def notify(alert):
+        await notification_service.send_panic_alert(
+            {"id": tourist.id, "name": current_user.name, "digital_id": tourist.digital_id},
+            {"id": alert.id, "created_at": alert.created_at.isoformat(), "address": "India Gate, New Delhi"}
+        )
+    
+    # Critical alerts jump the dispatch queue; wait for the stored alert, not the notifications
+    alert = await alert_dispatcher.submit(
+        tourist.id,
+        panic_alert_data({"latitude": 28.6139, "longitude": 77.209, "address": "India Gate, New Delhi"}),  # Mock location
+        notify
     )
     
     return {"message": "Panic alert sent successfully", "alert_id": alert.id}
 
+def _load_chat_tourist(db: Session, user_id: int):
+    """(tourist id, stored (lat, lon) or None, active trip destination), or None without a profile"""
+    tourist_service = TouristService(db)
+    tourist = tourist_service.get_tourist_by_user_id(user_id)
+    if not tourist:
+        return None
+    
+    stored = None
+    if tourist.current_location is not None:
+        point = to_shape(tourist.current_location)
+        stored = (point.y, point.x)
+    trip = tourist_service.get_active_trip(tourist.id)
+    return tourist.id, stored, trip.destination if trip else None
+
+async def _chat_context(db: Session, user_id: int) -> dict:
+    """Zones the tourist is in and their trip destination, for grounding chatbot replies"""
+    if knowledge_base.needs_reload():
+        await asyncio.to_thread(knowledge_base.reload_file)
+    loaded = await asyncio.to_thread(_load_chat_tourist, db, user_id)
+    if loaded is None:
+        return {}
+    tourist_id, position, destination = loaded
+    
+    if settings.LIVE_POSITIONS_ENABLED:
+        live = await live_positions.get(tourist_id)
+        if live:
+            position = (live["latitude"], live["longitude"])
+    
+    return {
+        "zone_ids": [zone.id for zone in geofence_engine.zones_at(*position)] if position else [],
+        "destination": destination
+    }
+
 @router.post("/chatbot")
-def chatbot_query(
+async def chatbot_query(
     message: dict,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Handle chatbot queries"""
-    user_message = message.get("message", "")
+    context = await _chat_context(db, current_user.id)
+    response = await chatbot_pipeline.respond(message.get("message", ""), **context)
     
-    # Get tourist context
-    tourist_service = TouristService(db)
-    tourist = tourist_service.get_tourist_by_user_id(current_user.id)
-    
-    context = {
-        "tourist_id": tourist.id if tourist else None,
-        "safety_score": tourist.safety_score if tourist else None
+    return {
+        "response": response,
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
+
+@router.post("/chatbot/stream")
+async def chatbot_stream(
+    message: dict,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a chatbot reply as server-sent events.
     
-    response = ai_service.get_chatbot_response(user_message, context)
+    Each `message` event carries `{"token": ...}`; a final `done` event
+    closes the stream.
+    """
+    context = await _chat_context(db, current_user.id)
     
-    return {
-        "response": response,
-        "timestamp": "2024-01-16T10:30:00Z"
-    }
\ No newline at end of file
+    async def events():
+        async for token in chatbot_pipeline.stream(message.get("message", ""), **context):
+            yield f"event: message\ndata: {json.dumps({'token': token})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
@@ -1,9 +1,21 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence, Tuple
 import json
 import asyncio
+import struct
+import time
+from datetime import datetime
+from ..core.config import settings
+from ..core.database import SessionLocal
 from ..core.redis import get_redis
+from ..core import location_codec
+from ..core.timestamps import as_utc
+from ..models.user import Tourist, User
 from ..services.notification_service import notification_service
+from ..services.geofence_tracker import geofence_tracker, send_geofence_events
+from ..services.anomaly_detector import anomaly_detector
+from ..services.anomaly_alerts import send_anomaly_alerts, trip_destination
+from ..services.tourist_service import TouristService
 
 router = APIRouter()
 
@@ -69,8 +81,17 @@ async def websocket_endpoint(websocket: WebSocket, client_type: str):
         
         async def handle_websocket_messages():
             while True:
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
+                data = await websocket.receive()
+                if data["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(data.get("code", 1000))
+                
+                # Binary frames carry location batches in the compact uplink format
+                if data.get("bytes") is not None:
+                    if client_type == "tourist":
+                        await handle_binary_location_update(data["bytes"])
+                    continue
+                
+                message_data = json.loads(data["text"])
                 
                 # Handle different message types
                 if message_data.get("type") == "ping":
@@ -90,6 +111,33 @@ async def websocket_endpoint(websocket: WebSocket, client_type: str):
         await pubsub.unsubscribe(*channels)
         await pubsub.close()
 
+_TOURIST_ID = struct.Struct("<I")
+
+def _epoch(timestamp) -> float:
+    """Client timestamps arrive as ISO strings (UTC when naive) or epoch seconds; fall back to now"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return as_utc(datetime.fromisoformat(timestamp)).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+async def handle_binary_location_update(frame: bytes):
+    """Handle a binary location frame: a little-endian u32 tourist id followed by a location batch"""
+    if len(frame) <= _TOURIST_ID.size:
+        return
+    (tourist_id,) = _TOURIST_ID.unpack_from(frame)
+    try:
+        batch = location_codec.decode_location_batch(frame[_TOURIST_ID.size:])
+    except location_codec.LocationCodecError:
+        return
+    
+    # Geofences only need the newest point; the anomaly detector sees the whole track
+    latitude, longitude = batch.latitudes[-1], batch.longitudes[-1]
+    events = geofence_tracker.update(tourist_id, latitude, longitude, float(batch.timestamps[-1]))
+    await send_geofence_events({"id": tourist_id, "name": "Tourist"}, events, mark_track=False)
+    await check_anomalies(tourist_id, batch.latitudes, batch.longitudes, batch.timestamps)
+
 async def handle_location_update(message_data: dict, client_type: str):
     """Handle real-time location updates"""
     if client_type == "tourist":
@@ -98,9 +146,54 @@ async def handle_location_update(message_data: dict, client_type: str):
         tourist_id = message_data.get("tourist_id")
         
         # Check for geofence violations
-        # Mock geofence check
-        if location.get("latitude", 0) < 28.5:  # Mock unsafe zone
-            await notification_service.send_geofence_alert(
-                {"id": tourist_id, "name": "Tourist"},
-                {"zone_type": "risk", "timestamp": message_data.get("timestamp")}
-            )
\ No newline at end of file
+        latitude = location.get("latitude")
+        longitude = location.get("longitude")
+        if tourist_id is None or latitude is None or longitude is None:
+            return
+        
+        timestamp = _epoch(message_data.get("timestamp"))
+        events = geofence_tracker.update(tourist_id, latitude, longitude, timestamp)
+        await send_geofence_events({"id": tourist_id, "name": "Tourist"}, events, mark_track=False)
+        await check_anomalies(tourist_id, [latitude], [longitude], [timestamp])
+
+def _load_tourist(tourist_id: int) -> Optional[Tuple[dict, Optional[Tuple[float, float]]]]:
+    """Alert data and trip destination of a tourist, or None if there is no such tourist"""
+    db = SessionLocal()
+    try:
+        row = db.query(Tourist.digital_id, User.name).join(
+            User, Tourist.user_id == User.id
+        ).filter(Tourist.id == tourist_id).first()
+        if row is None:
+            return None
+        trip = TouristService(db).get_active_trip(tourist_id)
+        return {"id": tourist_id, "name": row.name, "digital_id": row.digital_id}, trip_destination(trip)
+    finally:
+        db.close()
+
+async def check_anomalies(
+    tourist_id: int, latitudes: Sequence[float], longitudes: Sequence[float], timestamps: Sequence[float]
+):
+    """Feed streamed fixes to the anomaly detector and notify the police of anomalies.
+    
+    The socket does not authenticate the tourist id it is sent, so unlike the
+    HTTP location endpoints nothing is stored: no alerts and no track.
+    """
+    if not settings.ANOMALY_DETECTION_ENABLED:
+        return
+    
+    tourist = None
+    if anomaly_detector.needs_destination(tourist_id):
+        tourist = await asyncio.to_thread(_load_tourist, tourist_id)
+        if tourist is None:
+            return
+        anomaly_detector.set_destination(tourist_id, tourist[1])
+    
+    anomalies = anomaly_detector.update_many(tourist_id, latitudes, longitudes, timestamps)
+    if not anomalies:
+        return
+    
+    if tourist is None:
+        tourist = await asyncio.to_thread(_load_tourist, tourist_id)
+        if tourist is None:
+            return
+    await send_anomaly_alerts(tourist[0], anomalies, store=False)
\ No newline at end of file
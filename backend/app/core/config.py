@@ -32,6 +32,95 @@ class Settings(BaseSettings):
     MQTT_BROKER_HOST: str = "localhost"
     MQTT_BROKER_PORT: int = 1883
     
+    # Location ingest
+    LOCATION_BUFFER_ENABLED: bool = True
+    LOCATION_BUFFER_MAX_SIZE: int = 50000
+    LOCATION_BUFFER_BATCH_SIZE: int = 1000
+    LOCATION_BUFFER_FLUSH_INTERVAL: float = 1.0  # seconds
+    LOCATION_BUFFER_PUT_TIMEOUT: float = 2.0  # seconds to wait for space before rejecting
+    LOCATION_BUFFER_MAX_ATTEMPTS: int = 5  # failed flushes before a batch is dropped
+    
+    # Live positions (Redis GEO)
+    LIVE_POSITIONS_ENABLED: bool = True
+    LIVE_POSITION_TTL: int = 900  # seconds without a fix before a tourist drops off the live map
+    LIVE_POSITION_SYNC_INTERVAL: float = 60.0  # seconds between current_location syncs
+    LIVE_POSITION_SYNC_BATCH_SIZE: int = 1000
+    
+    # Trajectory compression on ingest
+    TRAJECTORY_COMPRESSION_ENABLED: bool = False
+    TRAJECTORY_DISTANCE_TOLERANCE_M: float = 25.0
+    TRAJECTORY_TIME_TOLERANCE_S: float = 300.0
+    TRAJECTORY_MAX_TRACKS: int = 100000
+    
+    # Geofencing
+    GEOFENCE_RELOAD_INTERVAL: float = 30.0  # seconds between zone change checks
+    GEOFENCE_EXIT_BUFFER_M: float = 30.0  # distance outside a zone before an exit counts
+    GEOFENCE_MIN_DWELL_S: float = 20.0  # seconds a transition must hold before it fires
+    GEOFENCE_GRID_PRECISION: int = 7  # geohash precision of the lookup table, 0 disables it
+    GEOFENCE_GRID_MAX_CELLS_PER_ZONE: int = 250000  # larger zones are always tested exactly
+    
+    # Safety scoring
+    SAFETY_SCORE_TIMEZONE: str = "Asia/Kolkata"  # local time for the time-of-day factor
+    SAFETY_SCORE_ALERT_THRESHOLD: float = 5.0  # alert when a score drops below this
+    SAFETY_SCORE_RECOMPUTE_INTERVAL: float = 60.0  # seconds
+    SAFETY_SCORE_BATCH_SIZE: int = 5000
+    SAFETY_SCORE_CACHE_TTL: int = 180  # seconds a computed score serves location updates
+    SAFETY_SCORE_LOCK_TTL: float = 300.0  # seconds the recompute lock survives a stalled batch
+    
+    # Incident heatmap
+    INCIDENT_HEATMAP_CELL_M: float = 250.0
+    INCIDENT_HEATMAP_BANDWIDTH_M: float = 500.0  # Gaussian kernel sigma
+    INCIDENT_HEATMAP_HALF_LIFE_DAYS: float = 30.0  # an alert's weight halves every this many days
+    INCIDENT_HEATMAP_LOOKBACK_DAYS: int = 365
+    INCIDENT_HEATMAP_REFRESH_INTERVAL: float = 60.0  # seconds between syncs with Redis
+    INCIDENT_HEATMAP_REBUILD_INTERVAL: float = 3600.0  # seconds between full rebuilds
+    
+    # Anomaly detection
+    ANOMALY_DETECTION_ENABLED: bool = True
+    ANOMALY_WINDOW: int = 16  # fixes of rolling state kept per tourist
+    ANOMALY_MAX_TRACKED: int = 100000
+    ANOMALY_MAX_SPEED_MPS: float = 70.0
+    ANOMALY_SPEED_ZSCORE: float = 4.0
+    ANOMALY_RISK_DWELL_S: float = 1800.0  # stationary this long inside a risk zone
+    ANOMALY_MAX_DWELL_S: float = 21600.0  # stationary this long away from the destination
+    ANOMALY_MAX_DESTINATION_DISTANCE_M: float = 100000.0
+    ANOMALY_ALERT_COOLDOWN_S: float = 1800.0  # per tourist and anomaly type
+    
+    # Model serving
+    MODEL_WARMUP_ENABLED: bool = True  # load registered models at startup instead of on first use
+    SAFETY_MODEL_PATH: Optional[str] = None  # uncompressed joblib regressor over the safety factors
+    MODEL_BATCH_MAX_SIZE: int = 64
+    MODEL_BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Chatbot
+    CHATBOT_MODEL: str = "gpt-3.5-turbo"
+    CHATBOT_MAX_CONCURRENCY: int = 8  # model calls in flight per worker
+    CHATBOT_QUEUE_TIMEOUT_S: float = 10.0  # wait for a slot before answering with the fallback
+    CHATBOT_CACHE_TTL_S: float = 3600.0
+    CHATBOT_CACHE_MAX_ENTRIES: int = 10000
+    KNOWLEDGE_BASE_PATH: Optional[str] = None  # defaults to app/data/safety_knowledge.json
+    KNOWLEDGE_BASE_RELOAD_INTERVAL: float = 30.0  # seconds between checks of the documents file
+    KNOWLEDGE_BASE_MIN_SCORE: float = 1.0  # BM25 score below which a document is not used
+    
+    # Alert dispatch
+    ALERT_DISPATCH_WORKERS: int = 4
+    ALERT_DISPATCH_QUEUE_SIZE: int = 10000  # non-critical alerts beyond this are rejected
+    ALERT_DEDUPE_WINDOW_S: float = 300.0  # repeats of an alert type per tourist are merged within this
+    DASHBOARD_COUNTERS_RECONCILE_INTERVAL: float = 300.0  # seconds between recounts from the database
+    DASHBOARD_RESPONSE_SAMPLES: int = 1000  # latest acknowledgements behind the dashboard response time
+    ALERT_EVENT_STREAM_MAXLEN: int = 100000  # events kept in the Redis feed; the table keeps all
+    
+    # Map clustering
+    MAP_CLUSTER_SNAPSHOT_TTL: float = 5.0  # seconds a point index serves tile misses before it is rebuilt
+    MAP_CLUSTER_TILE_TTL: int = 10  # seconds a clustered tile is shared from Redis
+    MAP_CLUSTER_MAX_TILES: int = 64  # per viewport request
+    
+    # Location retention
+    LOCATION_RETENTION_DAYS: int = 30
+    LOCATION_PARTITION_PREMAKE_DAYS: int = 7
+    LOCATION_TRAJECTORY_BUCKET_SECONDS: int = 300
+    LOCATION_MAINTENANCE_INTERVAL: float = 3600.0  # seconds
+    
     # Environment
     ENVIRONMENT: str = "development"
     
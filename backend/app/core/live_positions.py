@@ -0,0 +1,198 @@
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime, timezone
+import math
+import time
+from .config import settings
+from .geo import METERS_PER_DEGREE
+from .redis import get_redis
+
+GEO_KEY = "live_positions:geo"
+SEEN_KEY = "live_positions:seen"
+DIRTY_KEY = "live_positions:dirty"
+POSITION_KEY = "live_positions:{}"
+
+# Out-of-order fixes must never move a tourist backwards in time
+_UPDATE_SCRIPT = """
+local seen = redis.call('ZSCORE', KEYS[2], ARGV[1])
+if seen and tonumber(seen) > tonumber(ARGV[4]) then
+    return 0
+end
+-- GEOADD rejects latitudes outside Web Mercator; the hash keeps the real one
+local latitude = math.max(-85.05112878, math.min(85.05112878, tonumber(ARGV[3])))
+redis.call('GEOADD', KEYS[1], ARGV[2], latitude, ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+redis.call('HSET', KEYS[3], 'latitude', ARGV[3], 'longitude', ARGV[2], 'timestamp', ARGV[4], 'accuracy', ARGV[5])
+redis.call('EXPIRE', KEYS[3], ARGV[6])
+redis.call('SADD', KEYS[4], ARGV[1])
+return 1
+"""
+
+_PRUNE_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #stale > 0 then
+    redis.call('ZREM', KEYS[1], unpack(stale))
+    redis.call('ZREM', KEYS[2], unpack(stale))
+end
+return #stale
+"""
+
+class LivePositionStore:
+    """Latest position per tourist in a Redis GEO set.
+
+    Each position also lives in a hash with a TTL, so stale tourists disappear
+    from query results right away; `prune` then drops them from the GEO set.
+    """
+
+    def __init__(self, ttl: int = settings.LIVE_POSITION_TTL):
+        self.ttl = ttl
+        self._redis = None
+        self._update = None
+        self._prune = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis()
+            self._update = self._redis.register_script(_UPDATE_SCRIPT)
+            self._prune = self._redis.register_script(_PRUNE_SCRIPT)
+        return self._redis
+
+    async def update(
+        self,
+        tourist_id: int,
+        latitude: float,
+        longitude: float,
+        timestamp: datetime,
+        accuracy: Optional[float] = None
+    ) -> bool:
+        """Record a fix; returns False when it is stale or a newer fix is already stored"""
+        await self._client()
+        fix_time = timestamp.timestamp()
+        expires_in = math.ceil(self.ttl - (time.time() - fix_time))
+        if expires_in <= 0:
+            return False
+
+        updated = await self._update(
+            keys=[GEO_KEY, SEEN_KEY, POSITION_KEY.format(tourist_id), DIRTY_KEY],
+            args=[tourist_id, longitude, latitude, fix_time,
+                  "" if accuracy is None else accuracy, expires_in]
+        )
+        return bool(updated)
+
+    async def get(self, tourist_id: int) -> Optional[Dict]:
+        positions = await self.get_many([tourist_id])
+        return positions.get(tourist_id)
+
+    async def get_many(self, tourist_ids: Iterable[int]) -> Dict[int, Dict]:
+        client = await self._client()
+        tourist_ids = list(tourist_ids)
+        pipe = client.pipeline(transaction=False)
+        for tourist_id in tourist_ids:
+            pipe.hgetall(POSITION_KEY.format(tourist_id))
+        results = await pipe.execute()
+
+        return {
+            int(tourist_id): self._decode(tourist_id, data)
+            for tourist_id, data in zip(tourist_ids, results)
+            if data
+        }
+
+    async def within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Live tourists within `radius_m` of a point, nearest first"""
+        client = await self._client()
+        matches = await client.geosearch(
+            GEO_KEY, longitude=longitude, latitude=latitude,
+            radius=radius_m, unit="m", withdist=True, sort="ASC", count=limit
+        )
+        positions = await self.get_many(int(member) for member, _ in matches)
+
+        results = []
+        for member, distance in matches:
+            position = positions.get(int(member))
+            if position:
+                results.append({**position, "distance_m": round(distance, 1)})
+        return results
+
+    async def within_box(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Live tourists inside a map viewport"""
+        client = await self._client()
+        center_latitude = (min_latitude + max_latitude) / 2
+        center_longitude = (min_longitude + max_longitude) / 2
+
+        # Redis boxes are measured at the center latitude, so size ours by the
+        # edge closest to the equator and trim to the exact bounds afterwards
+        widest_latitude = 0.0 if min_latitude <= 0 <= max_latitude else min(abs(min_latitude), abs(max_latitude))
+        width_m = (max_longitude - min_longitude) * METERS_PER_DEGREE * math.cos(math.radians(widest_latitude))
+        height_m = (max_latitude - min_latitude) * METERS_PER_DEGREE
+
+        matches = await client.geosearch(
+            GEO_KEY, longitude=center_longitude, latitude=center_latitude,
+            width=max(width_m, 1.0) * 1.01, height=max(height_m, 1.0) * 1.01,
+            unit="m", count=limit
+        )
+        positions = await self.get_many(int(member) for member in matches)
+
+        return [
+            position for position in positions.values()
+            if min_latitude <= position["latitude"] <= max_latitude
+            and min_longitude <= position["longitude"] <= max_longitude
+        ]
+
+    async def snapshot(self, chunk_size: int = 1000) -> List[Dict]:
+        """Every live position, for rebuilding in-memory state after a restart"""
+        client = await self._client()
+        tourist_ids = await client.zrangebyscore(SEEN_KEY, time.time() - self.ttl, "+inf")
+
+        positions = []
+        for start in range(0, len(tourist_ids), chunk_size):
+            chunk = await self.get_many(int(member) for member in tourist_ids[start:start + chunk_size])
+            positions.extend(chunk.values())
+        return positions
+
+    async def prune(self, batch: int = 1000) -> int:
+        """Drop tourists whose last fix is older than the TTL from the GEO set"""
+        await self._client()
+        cutoff = time.time() - self.ttl
+        removed = 0
+        while True:
+            count = await self._prune(keys=[GEO_KEY, SEEN_KEY], args=[cutoff, batch])
+            removed += count
+            if count < batch:
+                return removed
+
+    async def pop_dirty(self, count: int) -> List[int]:
+        """Tourists whose position changed since the last database sync"""
+        client = await self._client()
+        members = await client.spop(DIRTY_KEY, count)
+        return [int(member) for member in members or []]
+
+    async def mark_dirty(self, tourist_ids: Iterable[int]):
+        client = await self._client()
+        tourist_ids = list(tourist_ids)
+        if tourist_ids:
+            await client.sadd(DIRTY_KEY, *tourist_ids)
+
+    @staticmethod
+    def _decode(tourist_id, data: Dict) -> Dict:
+        return {
+            "tourist_id": int(tourist_id),
+            "latitude": float(data["latitude"]),
+            "longitude": float(data["longitude"]),
+            "timestamp": datetime.fromtimestamp(float(data["timestamp"]), tz=timezone.utc).isoformat(),
+            "accuracy": float(data["accuracy"]) if data.get("accuracy") else None
+        }
+
+# Global live position store instance
+live_positions = LivePositionStore()
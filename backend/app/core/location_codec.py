@@ -0,0 +1,165 @@
+"""Compact binary encoding for location batches.
+
+Layout (little-endian):
+
+    header  magic "TL" | version u8 | flags u8 | count u16
+            | base_time_ms i64 | base_lat_e7 i32 | base_lon_e7 i32
+    body    count x i32 time deltas (ms)
+            count x i32 latitude deltas (1e-7 degrees)
+            count x i32 longitude deltas (1e-7 degrees)
+            count x u16 accuracy (decimeters, 0xFFFF unknown)  if flags & 1
+
+Each delta is relative to the previous point (the first to the header base),
+so a point costs 12-14 bytes instead of ~100 bytes of JSON. Longitude deltas
+take the short way round, wrapped into [-180, 180) degrees, so a track
+crossing the antimeridian still fits in i32; decoded longitudes are wrapped
+the same way. Columns are
+decoded straight into arrays without per-point validation objects.
+"""
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import accumulate
+import struct
+import sys
+
+CONTENT_TYPE = "application/x-location-batch"
+MAGIC = b"TL"
+VERSION = 1
+FLAG_ACCURACY = 0x01
+MAX_POINTS = 500
+
+COORD_SCALE = 10_000_000
+ACCURACY_SCALE = 10
+ACCURACY_UNKNOWN = 0xFFFF
+
+_HEADER = struct.Struct("<2sBBHqii")
+_FULL_TURN_E7 = 360 * COORD_SCALE
+_HALF_TURN_E7 = 180 * COORD_SCALE
+
+class LocationCodecError(ValueError):
+    """Raised for payloads that are not valid location batches"""
+
+class DecodedFix(NamedTuple):
+    """Attribute-compatible stand-in for `LocationCreate` on the binary path"""
+    latitude: float
+    longitude: float
+    timestamp: datetime
+    accuracy: Optional[float] = None
+    address: Optional[str] = None
+
+@dataclass
+class LocationArrays:
+    timestamps: array  # epoch seconds
+    latitudes: array
+    longitudes: array
+    accuracies: Optional[array] = None  # meters, NaN when unknown
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def fixes(self) -> List[DecodedFix]:
+        accuracies = self.accuracies or [None] * len(self)
+        return [
+            DecodedFix(
+                latitude, longitude,
+                datetime.fromtimestamp(timestamp, tz=timezone.utc),
+                None if accuracy is None or accuracy != accuracy else accuracy
+            )
+            for timestamp, latitude, longitude, accuracy in zip(
+                self.timestamps, self.latitudes, self.longitudes, accuracies
+            )
+        ]
+
+def _wrap_e7(degrees_e7: int) -> int:
+    """Longitude or longitude difference in 1e-7 degrees, wrapped into [-180, 180)"""
+    return (degrees_e7 + _HALF_TURN_E7) % _FULL_TURN_E7 - _HALF_TURN_E7
+
+def _column(payload: memoryview, typecode: str, offset: int, count: int) -> array:
+    column = array(typecode)
+    column.frombytes(payload[offset:offset + count * column.itemsize])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+def decode_location_batch(payload: bytes, max_points: int = MAX_POINTS) -> LocationArrays:
+    payload = memoryview(payload)
+    if len(payload) < _HEADER.size:
+        raise LocationCodecError("Payload shorter than header")
+
+    magic, version, flags, count, base_ms, base_lat, base_lon = _HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise LocationCodecError("Unsupported location batch format")
+    if not 0 < count <= max_points:
+        raise LocationCodecError(f"Batch must hold 1 to {max_points} points")
+    if abs(base_lon) > _HALF_TURN_E7:
+        raise LocationCodecError("Coordinates out of range")
+
+    expected = _HEADER.size + count * 12 + (count * 2 if flags & FLAG_ACCURACY else 0)
+    if len(payload) != expected:
+        raise LocationCodecError("Payload length does not match point count")
+
+    offset = _HEADER.size
+    time_deltas = _column(payload, "i", offset, count)
+    lat_deltas = _column(payload, "i", offset + 4 * count, count)
+    lon_deltas = _column(payload, "i", offset + 8 * count, count)
+
+    if min(time_deltas[1:], default=0) < 0:
+        raise LocationCodecError("Points must be in time order")
+
+    timestamps = array("d", (ms / 1000 for ms in accumulate(time_deltas, initial=base_ms)))[1:]
+    latitudes = array("d", (e7 / COORD_SCALE for e7 in accumulate(lat_deltas, initial=base_lat)))[1:]
+    longitudes = array("d", (_wrap_e7(e7) / COORD_SCALE for e7 in accumulate(lon_deltas, initial=base_lon)))[1:]
+
+    if min(latitudes) < -90 or max(latitudes) > 90:
+        raise LocationCodecError("Coordinates out of range")
+
+    accuracies = None
+    if flags & FLAG_ACCURACY:
+        raw = _column(payload, "H", offset + 12 * count, count)
+        accuracies = array("d", (
+            float("nan") if value == ACCURACY_UNKNOWN else value / ACCURACY_SCALE for value in raw
+        ))
+
+    return LocationArrays(timestamps, latitudes, longitudes, accuracies)
+
+def encode_location_batch(
+    timestamps: Sequence[float],
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    accuracies: Optional[Sequence[Optional[float]]] = None
+) -> bytes:
+    """Encode time-ordered points (epoch seconds, degrees, meters)"""
+    count = len(timestamps)
+    times_ms = [round(t * 1000) for t in timestamps]
+    lats_e7 = [round(lat * COORD_SCALE) for lat in latitudes]
+    lons_e7 = [round(lon * COORD_SCALE) for lon in longitudes]
+
+    def deltas(values: List[int], wrap: bool = False) -> array:
+        steps = (b - a for a, b in zip([values[0]] + values[:-1], values))
+        try:
+            column = array("i", (_wrap_e7(step) for step in steps) if wrap else steps)
+        except OverflowError:
+            raise LocationCodecError("Gap between points too large to encode")
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column
+
+    flags = FLAG_ACCURACY if accuracies is not None else 0
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, flags, count, times_ms[0], lats_e7[0], lons_e7[0]),
+        deltas(times_ms).tobytes(),
+        deltas(lats_e7).tobytes(),
+        deltas(lons_e7, wrap=True).tobytes()
+    ]
+    if accuracies is not None:
+        column = array("H", (
+            ACCURACY_UNKNOWN if accuracy is None
+            else min(round(accuracy * ACCURACY_SCALE), ACCURACY_UNKNOWN - 1)
+            for accuracy in accuracies
+        ))
+        if sys.byteorder == "big":
+            column.byteswap()
+        parts.append(column.tobytes())
+    return b"".join(parts)
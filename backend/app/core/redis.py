@@ -1,7 +1,14 @@
+import redis as sync_redis
 import redis.asyncio as redis
 from .config import settings
 
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
+# For sync code paths such as services running in the threadpool
+sync_redis_client = sync_redis.from_url(settings.REDIS_URL, decode_responses=True)
+
 async def get_redis():
-    return redis_client
\ No newline at end of file
+    return redis_client
+
+def get_sync_redis():
+    return sync_redis_client
@@ -0,0 +1,7 @@
+from datetime import datetime, timezone
+
+def as_utc(timestamp: datetime) -> datetime:
+    """Timezone-aware UTC copy of a timestamp; naive values are taken to be UTC already"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
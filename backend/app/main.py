@@ -9,6 +9,21 @@ from .core.config import settings
 from .core.database import engine, Base
 from .api import auth, tourist, police, tourism, websocket
 from .services.notification_service import notification_service
+from .services.location_buffer import location_buffer
+from .services.location_maintenance import location_maintenance_job
+from .services.trajectory_compressor import trajectory_compressor
+from .services.live_position_sync import live_position_sync_job
+from .services.geofence_service import geofence_engine
+from .services.geofence_tracker import geofence_tracker
+from .services.incident_heatmap import incident_heatmap
+from .services.anomaly_detector import anomaly_detector
+from .services.model_registry import model_registry
+from .services.chatbot import chatbot_pipeline
+from .services.knowledge_base import knowledge_base
+from .services.safety_score_scheduler import safety_score_scheduler
+from .services.alert_dispatcher import alert_dispatcher
+from .services.dashboard_counters import dashboard_counters
+from .services.map_clusters import map_cluster_service
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -17,9 +32,33 @@ Base.metadata.create_all(bind=engine)
 async def lifespan(app: FastAPI):
     # Startup
     await notification_service.init_redis()
+    alert_dispatcher.start()
+    location_buffer.start()
+    location_maintenance_job.start()
+    if settings.LIVE_POSITIONS_ENABLED:
+        live_position_sync_job.start()
+    await geofence_engine.warm_up()
+    if settings.LIVE_POSITIONS_ENABLED:
+        await geofence_tracker.rebuild()
+    geofence_engine.start()
+    knowledge_base.warm_up()
+    await incident_heatmap.warm_up()
+    incident_heatmap.start()
+    await model_registry.warm_up()
+    safety_score_scheduler.start()
+    dashboard_counters.start()
     yield
     # Shutdown
-    pass
+    await dashboard_counters.stop()
+    await safety_score_scheduler.stop()
+    await model_registry.stop()
+    await incident_heatmap.stop()
+    await geofence_engine.stop()
+    await location_maintenance_job.stop()
+    await location_buffer.stop()
+    await alert_dispatcher.stop()
+    if settings.LIVE_POSITIONS_ENABLED:
+        await live_position_sync_job.stop()
 
 app = FastAPI(
     title="Smart Tourist Safety Monitoring System",
@@ -35,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Exception handler
@@ -56,7 +96,21 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": settings.ENVIRONMENT}
+    return {
+        "status": "healthy",
+        "environment": settings.ENVIRONMENT,
+        "location_buffer": location_buffer.stats(),
+        "trajectory_compression": trajectory_compressor.stats(),
+        "geofence_grid": geofence_engine.grid_stats(),
+        "incident_heatmap": incident_heatmap.stats(),
+        "anomaly_detection": anomaly_detector.stats(),
+        "models": model_registry.stats(),
+        "chatbot": chatbot_pipeline.stats(),
+        "knowledge_base": knowledge_base.stats(),
+        "safety_score_recompute": safety_score_scheduler.stats(),
+        "alert_dispatch": alert_dispatcher.stats(),
+        "map_clusters": map_cluster_service.stats()
+    }
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
@@ -1,13 +1,13 @@
 from .user import User, Tourist, Police, TourismDept
 from .trip import Trip, EmergencyContact
-from .alert import Alert
-from .location import Location, SafetyZone
+from .alert import Alert, AlertEvent
+from .location import Location, LocationTrajectory, SafetyZone
 from .evidence import Evidence
 
 __all__ = [
     "User", "Tourist", "Police", "TourismDept",
     "Trip", "EmergencyContact", 
-    "Alert", 
-    "Location", "SafetyZone",
+    "Alert", "AlertEvent",
+    "Location", "LocationTrajectory", "SafetyZone",
     "Evidence"
 ]
\ No newline at end of file
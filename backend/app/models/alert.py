@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Float, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
@@ -23,4 +23,36 @@ class Alert(Base):
     
     # Relationships
     tourist = relationship("Tourist", back_populates="alerts")
-    assigned_officer = relationship("Police")
\ No newline at end of file
+    assigned_officer = relationship("Police")
+    
+    # Geography index for meter-based KNN over active alerts, see migration 9b4e2c7d1a05;
+    # keyset indexes for the alert feed, see migration 7c4e1f9a2b58
+    __table_args__ = (
+        Index(
+            "idx_alerts_active_location_geog", func.geography(location),
+            postgresql_using="gist", postgresql_where=text("status = 'active'")
+        ),
+        Index("ix_alerts_created_at_id", created_at, id),
+        Index("ix_alerts_status_created_at_id", status, created_at, id),
+        Index(
+            "ix_alerts_active_priority_created_at_id", priority, created_at, id,
+            postgresql_where=text("status = 'active'")
+        ),
+    )
+
+class AlertEvent(Base):
+    """Append-only log of alert state changes; `alerts` holds its projection"""
+    __tablename__ = "alert_events"
+    
+    id = Column(BigInteger, primary_key=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=False)
+    event_type = Column(String, nullable=False)  # created, acknowledged, assigned, resolved, escalated, deescalated, reopened
+    status = Column(String, nullable=False)  # alert status after the event
+    priority = Column(String)  # new priority for created, escalated and deescalated
+    officer_id = Column(Integer, ForeignKey("police.id"))  # for assigned
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    # Timelines read one alert's events in order, see migration 2f8d6b1e4c93
+    __table_args__ = (
+        Index("ix_alert_events_alert_id_id", alert_id, id),
+    )
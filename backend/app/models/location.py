@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Boolean, Index, UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
@@ -7,17 +7,51 @@ from ..core.database import Base
 class Location(Base):
     __tablename__ = "locations"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     tourist_id = Column(Integer, ForeignKey("tourists.id"))
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     location = Column(Geometry('POINT'))
     address = Column(String)
     accuracy = Column(Float)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the key because the partition key must be
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
     
     # Relationships
     tourist = relationship("Tourist", back_populates="locations")
+    
+    # Partitioned by day on `timestamp` in Postgres, see migration 3a19a2d4f627
+    __table_args__ = (
+        Index("ix_locations_tourist_id_timestamp_id", "tourist_id", "timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+# Tables built by create_all start with only the default partition; the
+# location maintenance job adds the daily ones
+event.listen(
+    Location.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS locations_default PARTITION OF locations DEFAULT").execute_if(dialect="postgresql")
+)
+
+class LocationTrajectory(Base):
+    """Downsampled per-tourist track kept after raw location partitions expire"""
+    __tablename__ = "location_trajectories"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tourist_id = Column(Integer, ForeignKey("tourists.id"), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    bucket_seconds = Column(Integer, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    location = Column(Geometry('POINT', spatial_index=False))
+    point_count = Column(Integer, nullable=False)
+    first_timestamp = Column(DateTime(timezone=True), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("tourist_id", "bucket_start", name="uq_location_trajectories_tourist_bucket"),
+    )
 
 class SafetyZone(Base):
     __tablename__ = "safety_zones"
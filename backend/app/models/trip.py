@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.database import Base
@@ -9,6 +9,8 @@ class Trip(Base):
     id = Column(Integer, primary_key=True, index=True)
     tourist_id = Column(Integer, ForeignKey("tourists.id"))
     destination = Column(String, nullable=False)
+    destination_latitude = Column(Float)
+    destination_longitude = Column(Float)
     start_date = Column(DateTime(timezone=True))
     end_date = Column(DateTime(timezone=True))
     transport_mode = Column(String)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
@@ -35,6 +35,10 @@ class Tourist(Base):
     trips = relationship("Trip", back_populates="tourist")
     alerts = relationship("Alert", back_populates="tourist")
     locations = relationship("Location", back_populates="tourist")
+    
+    __table_args__ = (
+        Index("idx_tourists_current_location_geog", func.geography(current_location), postgresql_using="gist"),
+    )
 
 class Police(Base):
     __tablename__ = "police"
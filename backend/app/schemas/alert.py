@@ -31,4 +31,17 @@ class Alert(AlertBase):
 
 class AlertUpdate(BaseModel):
     status: Optional[str] = None
-    assigned_officer_id: Optional[int] = None
\ No newline at end of file
+    assigned_officer_id: Optional[int] = None
+    priority: Optional[str] = None
+
+class AlertEvent(BaseModel):
+    id: int
+    alert_id: int
+    event_type: str
+    status: str
+    priority: Optional[str] = None
+    officer_id: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -1,12 +1,32 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
+from ..core.timestamps import as_utc
 
 class LocationCreate(BaseModel):
-    latitude: float
-    longitude: float
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
     address: Optional[str] = None
     accuracy: Optional[float] = None
+    timestamp: Optional[datetime] = None
+
+    @field_validator("timestamp")
+    @classmethod
+    def timestamp_as_utc(cls, timestamp: Optional[datetime]) -> Optional[datetime]:
+        # Clients send both naive and offset timestamps; naive ones are UTC
+        return as_utc(timestamp) if timestamp is not None else None
+
+class LocationFix(LocationCreate):
+    timestamp: datetime
+
+class LocationBatchCreate(BaseModel):
+    locations: List[LocationFix] = Field(..., min_length=1, max_length=500)
+
+    @field_validator("locations")
+    @classmethod
+    def order_by_timestamp(cls, locations: List[LocationFix]) -> List[LocationFix]:
+        # Devices replay buffered fixes; make sure the newest one is last
+        return sorted(locations, key=lambda fix: fix.timestamp)
 
 class Location(BaseModel):
     id: int
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -20,6 +20,8 @@ class EmergencyContact(EmergencyContactBase):
 
 class TripBase(BaseModel):
     destination: str
+    destination_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    destination_longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_date: datetime
     end_date: datetime
     transport_mode: Optional[str] = None
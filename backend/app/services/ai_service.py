@@ -1,104 +1,104 @@
 from typing import Dict, List, Optional
 import json
-import random
 from datetime import datetime, timedelta
+import numpy as np
+from ..core.config import settings
+from .anomaly_detector import AnomalyDetector
+from .chatbot import FALLBACK_RESPONSE, chatbot_pipeline
+from .model_registry import ModelRegistry, load_joblib, model_registry
+from .safety_scoring import SafetyScoreEngine, safety_score_engine
+
+SAFETY_MODEL = "safety"
+
+# Feature order the safety model was trained on
+SAFETY_MODEL_FEATURES = (
+    "time_of_day", "location_safety", "historical_incidents", "crowd_density", "weather_conditions"
+)
+
+def _predict_safety(model, rows: List[List[float]]) -> List[float]:
+    scores = model.predict(np.asarray(rows, dtype=np.float64))
+    return np.clip(np.round(scores, 1), 1.0, 10.0).tolist()
+
+if settings.SAFETY_MODEL_PATH:
+    model_registry.register(
+        SAFETY_MODEL,
+        lambda: load_joblib(settings.SAFETY_MODEL_PATH),
+        _predict_safety,
+        warmup=settings.MODEL_WARMUP_ENABLED,
+        warmup_input=[[1.0] * len(SAFETY_MODEL_FEATURES)]
+    )
 
 class AIService:
-    def __init__(self):
-        self.safety_model = None
-        self.anomaly_model = None
+    def __init__(self, registry: ModelRegistry = model_registry, engine: SafetyScoreEngine = safety_score_engine):
+        self.registry = registry
+        self.engine = engine
     
     def calculate_ai_safety_score(self, tourist_data: dict, location_data: dict) -> float:
         """Calculate AI-based safety score using location and behavior patterns"""
-        # Mock AI calculation - replace with actual ML model
-        base_score = 7.0
+        return self.engine.score(
+            location_data["latitude"],
+            location_data["longitude"],
+            location_data.get("timestamp")
+        )
+    
+    def score_batch(self, latitudes, longitudes, timestamps) -> np.ndarray:
+        """Safety scores for many tourists, from the trained model when one is configured"""
+        if not self.registry.is_registered(SAFETY_MODEL):
+            return self.engine.score_batch(latitudes, longitudes, timestamps)
         
-        # Factors affecting safety score
-        factors = {
-            "time_of_day": self._get_time_factor(),
-            "location_safety": self._get_location_safety_factor(location_data),
-            "crowd_density": random.uniform(0.8, 1.2),
-            "weather_conditions": random.uniform(0.9, 1.1),
-            "historical_incidents": random.uniform(0.85, 1.0)
-        }
+        factors = self.engine.factors(latitudes, longitudes, timestamps)
+        rows = np.column_stack([factors[name] for name in SAFETY_MODEL_FEATURES])
+        return np.asarray(self.registry.predict(SAFETY_MODEL, rows), dtype=np.float64)
+    
+    async def predict_safety_score(self, tourist_data: dict, location_data: dict) -> float:
+        """Safety score from the trained model when one is configured.
         
-        # Calculate weighted score
-        for factor_name, factor_value in factors.items():
-            base_score *= factor_value
+        Concurrent requests share micro-batched model calls; without a model
+        this is the deterministic `calculate_ai_safety_score`.
+        """
+        if not self.registry.is_registered(SAFETY_MODEL):
+            return self.calculate_ai_safety_score(tourist_data, location_data)
         
-        # Ensure score is between 1-10
-        return max(1.0, min(10.0, round(base_score, 1)))
+        factors = self.engine.factors_at(
+            location_data["latitude"],
+            location_data["longitude"],
+            location_data.get("timestamp")
+        )
+        row = [factors[name] for name in SAFETY_MODEL_FEATURES]
+        return await self.registry.batcher(SAFETY_MODEL).submit(row)
     
     def detect_anomaly(self, tourist_id: int, location_history: List[dict]) -> Dict:
         """Detect anomalous behavior patterns"""
-        # Mock anomaly detection - replace with actual ML model
-        if len(location_history) < 3:
-            return {"anomaly_detected": False}
-        
-        # Simple anomaly detection based on location changes
-        recent_locations = location_history[-3:]
-        distances = []
-        
-        for i in range(1, len(recent_locations)):
-            dist = self._calculate_distance(
-                recent_locations[i-1], recent_locations[i]
-            )
-            distances.append(dist)
-        
-        avg_distance = sum(distances) / len(distances)
+        # Replays the history through a throwaway streaming detector; live
+        # fixes go through the shared `anomaly_detector` instead
+        detector = AnomalyDetector(max_tracked=1)
+        anomaly = None
+        for location in location_history:
+            timestamp = location.get("timestamp")
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            if isinstance(timestamp, datetime):
+                timestamp = timestamp.timestamp()
+            if timestamp is None:
+                continue
+            found = detector.update(tourist_id, location["latitude"], location["longitude"], timestamp)
+            anomaly = found[-1] if found else anomaly
         
-        # Flag as anomaly if sudden large movement
-        if avg_distance > 5.0:  # 5km threshold
-            return {
-                "anomaly_detected": True,
-                "anomaly_type": "unusual_movement",
-                "confidence": 0.85,
-                "description": "Unusual movement pattern detected"
-            }
-        
-        return {"anomaly_detected": False}
+        if anomaly is None:
+            return {"anomaly_detected": False}
+        return {
+            "anomaly_detected": True,
+            "anomaly_type": anomaly.anomaly_type,
+            "confidence": anomaly.confidence,
+            "description": anomaly.description
+        }
     
     def get_chatbot_response(self, user_message: str, context: dict) -> str:
         """Generate chatbot response for tourist queries"""
-        # Mock chatbot - replace with actual LLM integration
-        message_lower = user_message.lower()
-        
-        responses = {
-            "emergency": "In case of emergency:\n1. Use the panic button for immediate help\n2. Call local emergency number: 112\n3. Contact your embassy if needed\n4. Share your location with trusted contacts",
-            "safety": "Safety tips:\n1. Stay in well-lit areas\n2. Keep documents secure\n3. Inform someone about your whereabouts\n4. Trust your instincts\n5. Use official transportation",
-            "help": "I can help you with:\n- Emergency procedures\n- Safety tips\n- Local information\n- Navigation assistance\n- Contact emergency services",
-            "location": "Your current location is being tracked for safety. If you feel unsafe, use the panic button or contact local authorities at 112.",
-            "police": "To contact police:\n- Emergency: 112\n- Tourist Police: 1363\n- Use the panic button for immediate assistance"
-        }
-        
-        for keyword, response in responses.items():
-            if keyword in message_lower:
-                return response
-        
-        return "I understand your concern. For immediate assistance, please use the panic button or contact emergency services at 112. How else can I help you stay safe?"
-    
-    def _get_time_factor(self) -> float:
-        """Get safety factor based on time of day"""
-        current_hour = datetime.now().hour
-        
-        if 6 <= current_hour <= 18:  # Daytime
-            return 1.1
-        elif 18 <= current_hour <= 22:  # Evening
-            return 1.0
-        else:  # Night
-            return 0.8
-    
-    def _get_location_safety_factor(self, location_data: dict) -> float:
-        """Get safety factor based on location"""
-        # Mock location safety - replace with actual data
-        return random.uniform(0.8, 1.2)
-    
-    def _calculate_distance(self, loc1: dict, loc2: dict) -> float:
-        """Calculate distance between two locations (simplified)"""
-        # Simplified distance calculation
-        lat_diff = abs(loc1.get("latitude", 0) - loc2.get("latitude", 0))
-        lng_diff = abs(loc1.get("longitude", 0) - loc2.get("longitude", 0))
-        return (lat_diff + lng_diff) * 111  # Rough km conversion
+        # Canned intents only; model-backed replies go through `chatbot_pipeline`
+        matcher = chatbot_pipeline.matcher
+        intent = matcher.match(user_message)
+        return matcher.responses[intent] if intent else FALLBACK_RESPONSE
 
 # Global AI service instance
 ai_service = AIService()
\ No newline at end of file
@@ -0,0 +1,212 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import itertools
+import logging
+import time
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.alert import Alert
+from ..schemas.alert import AlertCreate
+from .alert_events import PRIORITY_RANKS
+from .alert_service import AlertService
+
+logger = logging.getLogger(__name__)
+
+# Wait times kept for the percentiles in `stats`
+_WAIT_SAMPLES = 1000
+
+Notify = Callable[[Optional[Alert]], Awaitable[None]]
+
+class AlertQueueFull(Exception):
+    pass
+
+@dataclass(order=True)
+class _Job:
+    rank: int
+    sequence: int
+    enqueued_at: float = field(compare=False)
+    tourist_id: Optional[int] = field(compare=False)
+    alert_data: Optional[AlertCreate] = field(compare=False)  # None for notification-only jobs
+    dedupe_key: Optional[str] = field(compare=False)
+    notify: Optional[Notify] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+class AlertDispatcher:
+    """Stores alerts and sends their notifications from dedicated workers.
+
+    Jobs are served critical first, then high, medium and low, in arrival
+    order within a priority. Non-critical alerts with a `dedupe_key` that
+    repeat for the same tourist inside `dedupe_window` seconds are merged
+    into the first, still active, alert by counting occurrences in its
+    metadata, and are not notified again. Deduplication state is per
+    worker process, like the anomaly detector cooldowns.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.ALERT_DISPATCH_WORKERS,
+        max_queued: int = settings.ALERT_DISPATCH_QUEUE_SIZE,
+        dedupe_window: float = settings.ALERT_DEDUPE_WINDOW_S
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.dedupe_window = dedupe_window
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        # Dedupe key -> (future alert id, expires at); the future lets a repeat
+        # that arrives while the first alert is still being stored wait for it
+        self._recent: Dict[Tuple[int, str, str], Tuple[asyncio.Future, float]] = {}
+        self._waits: deque = deque(maxlen=_WAIT_SAMPLES)
+        self._queued_by_priority = {priority: 0 for priority in PRIORITY_RANKS}
+        self._stats = {"stored": 0, "coalesced": 0, "notified": 0, "dropped": 0, "failed": 0}
+
+    def start(self):
+        if not self._tasks:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Finish queued jobs for up to `drain_timeout` seconds, then cancel the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Alert dispatcher stopped with %d jobs queued", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        tourist_id: Optional[int],
+        alert_data: Optional[AlertCreate],
+        notify: Optional[Notify] = None,
+        dedupe_key: Optional[str] = None,
+        priority: Optional[str] = None
+    ) -> asyncio.Future:
+        """Queue an alert and return a future for the stored (or merged) alert.
+
+        `notify` is awaited with the stored alert once it is committed, and
+        skipped for merged repeats. Without `alert_data` the job only notifies.
+        Critical jobs are always accepted; others raise `AlertQueueFull` once
+        `max_queued` jobs are waiting.
+        """
+        self.start()
+        priority = priority or (alert_data.priority if alert_data else "medium")
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS["medium"])
+        if rank and self._queue.qsize() >= self.max_queued:
+            self._stats["dropped"] += 1
+            raise AlertQueueFull()
+
+        future = asyncio.get_running_loop().create_future()
+        # Failures are logged by the worker; callers that do not wait should not warn
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._queue.put_nowait(_Job(
+            rank, next(self._sequence), time.monotonic(),
+            tourist_id, alert_data, dedupe_key, notify, future
+        ))
+        self._queued_by_priority[priority if priority in PRIORITY_RANKS else "medium"] += 1
+        return future
+
+    def stats(self) -> Dict:
+        waits = sorted(self._waits)
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queued_by_priority": dict(self._queued_by_priority),
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 2) if waits else None,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 2) if waits else None,
+            "wait_ms_max": round(waits[-1] * 1000, 2) if waits else None
+        }
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._dispatch(job)
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.exception("Alert dispatch failed")
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _dispatch(self, job: _Job):
+        self._waits.append(time.monotonic() - job.enqueued_at)
+        priority = next(name for name, rank in PRIORITY_RANKS.items() if rank == job.rank)
+        self._queued_by_priority[priority] -= 1
+
+        alert, merged = None, False
+        if job.alert_data is not None:
+            key = self._dedupe_key(job)
+            recent = self._recent.get(key) if key else None
+            if recent is not None and recent[1] > time.monotonic():
+                try:
+                    alert_id = await recent[0]
+                except Exception:
+                    alert_id = None
+                if alert_id is not None:
+                    alert = await asyncio.to_thread(self._record_repeat, alert_id)
+                    merged = alert is not None
+            if alert is None:
+                alert = await self._store_first(key, job)
+            self._stats["coalesced" if merged else "stored"] += 1
+
+        if not job.future.done():
+            job.future.set_result(alert)
+        if job.notify is not None and not merged:
+            await job.notify(alert)
+            self._stats["notified"] += 1
+
+    def _dedupe_key(self, job: _Job) -> Optional[Tuple[int, str, str]]:
+        if job.dedupe_key is None or job.rank == PRIORITY_RANKS["critical"]:
+            return None
+        return (job.tourist_id, job.alert_data.type, job.dedupe_key)
+
+    async def _store_first(self, key: Optional[Tuple[int, str, str]], job: _Job) -> Alert:
+        if key is None:
+            return await asyncio.to_thread(self._store, job.tourist_id, job.alert_data)
+
+        now = time.monotonic()
+        if len(self._recent) >= self.max_queued:
+            self._recent = {k: v for k, v in self._recent.items() if v[1] > now}
+        alert_id = asyncio.get_running_loop().create_future()
+        alert_id.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._recent[key] = (alert_id, now + self.dedupe_window)
+        try:
+            alert = await asyncio.to_thread(self._store, job.tourist_id, job.alert_data)
+        except Exception as e:
+            self._recent.pop(key, None)
+            alert_id.set_exception(e)
+            raise
+        alert_id.set_result(alert.id)
+        return alert
+
+    def _store(self, tourist_id: int, alert_data: AlertCreate) -> Alert:
+        db = SessionLocal()
+        try:
+            return AlertService(db).create_alert(tourist_id, alert_data)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record_repeat(self, alert_id: int) -> Optional[Alert]:
+        db = SessionLocal()
+        try:
+            return AlertService(db).record_repeat(alert_id)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Global alert dispatcher instance
+alert_dispatcher = AlertDispatcher()
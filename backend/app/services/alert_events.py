@@ -0,0 +1,233 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import logging
+import re
+import numpy as np
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.redis import get_redis, get_sync_redis
+from ..models.alert import Alert, AlertEvent
+from .dashboard_counters import dashboard_counters
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "alert_events"
+_STREAM_ID = re.compile(r"^\d+(-\d+)?$")
+
+PRIORITY_RANKS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+# Event recorded when an update moves an alert into each status
+STATUS_EVENTS = {"active": "reopened", "acknowledged": "acknowledged", "resolved": "resolved"}
+
+class AlertChange(NamedTuple):
+    event_type: str
+    priority: Optional[str] = None
+    officer_id: Optional[int] = None
+
+@dataclass
+class AlertProjection:
+    """Alert state rebuilt from its events, with the same fields `apply_event` sets on `Alert`"""
+    id: int
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assigned_officer_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    acknowledged_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+
+def apply_event(alert, event_type: str, at: datetime, priority: Optional[str] = None, officer_id: Optional[int] = None):
+    """Fold one event into an alert's state.
+
+    `alert` is the `Alert` row when an event is recorded and an
+    `AlertProjection` on replay, so the table and the log cannot disagree.
+    """
+    if event_type == "created":
+        alert.status = "active"
+        alert.priority = priority
+        alert.created_at = at
+    elif event_type == "acknowledged":
+        alert.status = "acknowledged"
+        alert.acknowledged_at = at
+    elif event_type == "resolved":
+        alert.status = "resolved"
+        alert.resolved_at = at
+    elif event_type == "reopened":
+        alert.status = "active"
+    elif event_type == "assigned":
+        alert.assigned_officer_id = officer_id
+    elif event_type in ("escalated", "deescalated"):
+        alert.priority = priority
+    else:
+        raise ValueError(f"Unknown alert event: {event_type}")
+
+def update_changes(
+    alert,
+    status: Optional[str] = None,
+    assigned_officer_id: Optional[int] = None,
+    priority: Optional[str] = None
+) -> List[AlertChange]:
+    """Events an update makes to an alert; values it already has record nothing"""
+    changes = []
+    if priority and priority != alert.priority:
+        if priority not in PRIORITY_RANKS:
+            raise ValueError(f"Unknown priority: {priority}")
+        current = PRIORITY_RANKS.get(alert.priority, PRIORITY_RANKS["medium"])
+        changes.append(AlertChange("escalated" if PRIORITY_RANKS[priority] < current else "deescalated", priority=priority))
+    if assigned_officer_id and assigned_officer_id != alert.assigned_officer_id:
+        changes.append(AlertChange("assigned", officer_id=assigned_officer_id))
+    if status and status != alert.status:
+        if status not in STATUS_EVENTS:
+            raise ValueError(f"Unknown status: {status}")
+        changes.append(AlertChange(STATUS_EVENTS[status]))
+    return changes
+
+def percentiles(samples: Iterable[float], points=(50, 90, 99)) -> Dict[str, Optional[float]]:
+    values = np.fromiter(samples, dtype=np.float64)
+    if not len(values):
+        return {f"p{point}": None for point in points}
+    return {f"p{point}": round(float(value), 1) for point, value in zip(points, np.percentile(values, points))}
+
+class AlertEventLog:
+    """Append-only alert history.
+
+    Every change is inserted into `alert_events` in the same transaction that
+    applies it to the alert row, which is a projection of the log. Committed
+    events are then added to a capped Redis stream that dashboards read
+    incrementally, and to the dashboard counters.
+    """
+
+    def __init__(self, stream_maxlen: int = settings.ALERT_EVENT_STREAM_MAXLEN):
+        self.stream_maxlen = stream_maxlen
+
+    def append(self, db: Session, alert: Alert, changes: Iterable[AlertChange], at: Optional[datetime] = None) -> List[Dict]:
+        """Apply changes to `alert` and stage their events; returns them for `publish` after the commit"""
+        at = at or datetime.now(timezone.utc)
+        staged = []
+        for change in changes:
+            previous_status = alert.status
+            apply_event(alert, change.event_type, at, change.priority, change.officer_id)
+            event = AlertEvent(
+                alert_id=alert.id,
+                event_type=change.event_type,
+                status=alert.status,
+                priority=change.priority,
+                officer_id=change.officer_id,
+                created_at=at
+            )
+            db.add(event)
+            staged.append((event, previous_status))
+        db.flush()
+
+        return [
+            {
+                "id": event.id,
+                "alert_id": event.alert_id,
+                "tourist_id": alert.tourist_id,
+                "event_type": event.event_type,
+                "status": event.status,
+                "previous_status": previous_status,
+                "priority": alert.priority,
+                "officer_id": event.officer_id,
+                "at": at.isoformat(),
+                "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None,
+                "elapsed_s": (at - alert.created_at).total_seconds() if alert.created_at else 0.0
+            }
+            for event, previous_status in staged
+        ]
+
+    def publish(self, events: List[Dict]):
+        if not events:
+            return
+        # The table is the record; the stream is a best-effort feed
+        try:
+            pipe = get_sync_redis().pipeline(transaction=False)
+            for event in events:
+                pipe.xadd(STREAM_KEY, {"event": json.dumps(event)}, maxlen=self.stream_maxlen, approximate=True)
+            pipe.execute()
+        except Exception:
+            logger.exception("Publishing alert events failed")
+        dashboard_counters.record_events(events)
+
+    async def feed(self, after: Optional[str] = None, limit: int = 100, block_ms: int = 0) -> Tuple[List[Dict], str]:
+        """Events after stream id `after`, oldest first, and the id to continue from.
+
+        Without `after` the latest `limit` events are returned. With `block_ms`
+        an empty read waits that long for new events.
+        """
+        if after is not None and not _STREAM_ID.match(after):
+            raise ValueError("Invalid cursor")
+        client = await get_redis()
+        if after is None:
+            entries = list(reversed(await client.xrevrange(STREAM_KEY, count=limit)))
+        else:
+            response = await client.xread({STREAM_KEY: after}, count=limit, block=block_ms or None)
+            entries = response[0][1] if response else []
+        events = [json.loads(fields["event"]) for _, fields in entries]
+        return events, entries[-1][0] if entries else after or "0-0"
+
+    def timeline(self, db: Session, alert_id: int) -> List[AlertEvent]:
+        return db.query(AlertEvent).filter(AlertEvent.alert_id == alert_id).order_by(AlertEvent.id).all()
+
+    def replay(
+        self,
+        db: Session,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 10000
+    ) -> Dict[int, AlertProjection]:
+        """Rebuild alert states from the log, optionally only for alerts created in [start, end)"""
+        query = db.query(
+            AlertEvent.alert_id,
+            AlertEvent.event_type,
+            AlertEvent.priority,
+            AlertEvent.officer_id,
+            AlertEvent.created_at
+        )
+        if start or end:
+            created = db.query(Alert.id)
+            if start:
+                created = created.filter(Alert.created_at >= start)
+            if end:
+                created = created.filter(Alert.created_at < end)
+            query = query.filter(AlertEvent.alert_id.in_(created))
+
+        projections = {}
+        for alert_id, event_type, priority, officer_id, at in query.order_by(AlertEvent.id).yield_per(batch_size):
+            projection = projections.get(alert_id)
+            if projection is None:
+                projection = projections[alert_id] = AlertProjection(alert_id)
+            apply_event(projection, event_type, at, priority, officer_id)
+        return projections
+
+    def response_times(self, projections: Iterable[AlertProjection]) -> Dict:
+        """Acknowledgement and resolution time percentiles in seconds, overall and per priority"""
+        acknowledged: Dict[str, List[float]] = {}
+        resolved: Dict[str, List[float]] = {}
+        for projection in projections:
+            if projection.created_at is None:
+                continue
+            if projection.acknowledged_at is not None:
+                acknowledged.setdefault(projection.priority, []).append(
+                    (projection.acknowledged_at - projection.created_at).total_seconds()
+                )
+            if projection.resolved_at is not None:
+                resolved.setdefault(projection.priority, []).append(
+                    (projection.resolved_at - projection.created_at).total_seconds()
+                )
+
+        def summary(samples: Dict[str, List[float]]) -> Dict:
+            return {
+                "count": sum(len(values) for values in samples.values()),
+                **percentiles(value for values in samples.values() for value in values),
+                "by_priority": {
+                    priority: {"count": len(values), **percentiles(values)}
+                    for priority, values in samples.items()
+                }
+            }
+
+        return {"acknowledge_s": summary(acknowledged), "resolve_s": summary(resolved)}
+
+# Global alert event log instance
+alert_event_log = AlertEventLog()
@@ -1,11 +1,38 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, tuple_
 from ..models.alert import Alert
-from ..models.user import Tourist
 from ..schemas.alert import AlertCreate, AlertUpdate
 from geoalchemy2.functions import ST_Point
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
 import json
+from .alert_events import AlertChange, alert_event_log, update_changes
+from .anomaly_detector import Anomaly
+from .tourist_service import BoundingBox
+from .incident_heatmap import incident_heatmap
+
+def panic_alert_data(location_data: dict) -> AlertCreate:
+    return AlertCreate(
+        type="panic",
+        priority="critical",
+        message="Emergency panic button activated",
+        location=location_data,
+        metadata=json.dumps({"source": "panic_button"})
+    )
+
+def anomaly_alert_data(anomaly: Anomaly) -> AlertCreate:
+    return AlertCreate(
+        type="anomaly",
+        priority=anomaly.priority,
+        message=anomaly.description,
+        location={"latitude": anomaly.latitude, "longitude": anomaly.longitude},
+        metadata=json.dumps({
+            "source": "anomaly_detector",
+            "anomaly_type": anomaly.anomaly_type,
+            "confidence": anomaly.confidence,
+            "features": anomaly.features
+        })
+    )
 
 class AlertService:
     def __init__(self, db: Session):
@@ -18,7 +45,7 @@ class AlertService:
             type=alert_data.type,
             priority=alert_data.priority,
             message=alert_data.message,
-            metadata=alert_data.metadata
+            alert_metadata=alert_data.metadata
         )
         
         # Add location if provided
@@ -30,50 +57,122 @@ class AlertService:
             db_alert.address = alert_data.location.address
         
         self.db.add(db_alert)
+        self.db.flush()
+        events = alert_event_log.append(self.db, db_alert, [AlertChange("created", priority=alert_data.priority)])
         self.db.commit()
         self.db.refresh(db_alert)
+        alert_event_log.publish(events)
+        
+        if alert_data.location:
+            incident_heatmap.add_alert(
+                alert_data.location.latitude,
+                alert_data.location.longitude,
+                db_alert.priority
+            )
         
         return db_alert
     
-    def get_alerts(self, status: Optional[str] = None, limit: int = 50):
-        query = self.db.query(Alert).join(Tourist).join(Tourist.user)
+    def get_alerts(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        priority: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        bbox: Optional[BoundingBox] = None,
+        after: Optional[Tuple[datetime, int]] = None
+    ):
+        """One keyset page of alerts, newest first, as flat rows"""
+        query = self.db.query(
+            Alert.id,
+            Alert.tourist_id,
+            Alert.type,
+            Alert.priority,
+            Alert.status,
+            Alert.message,
+            Alert.address,
+            Alert.alert_metadata,
+            Alert.assigned_officer_id,
+            Alert.created_at,
+            Alert.acknowledged_at,
+            Alert.resolved_at,
+            func.ST_Y(Alert.location).label("latitude"),
+            func.ST_X(Alert.location).label("longitude")
+        )
         
         if status:
             query = query.filter(Alert.status == status)
+        if priority:
+            query = query.filter(Alert.priority == priority)
+        if alert_type:
+            query = query.filter(Alert.type == alert_type)
+        if start:
+            query = query.filter(Alert.created_at >= start)
+        if end:
+            query = query.filter(Alert.created_at < end)
+        if bbox:
+            min_latitude, min_longitude, max_latitude, max_longitude = bbox
+            query = query.filter(func.ST_Intersects(
+                Alert.location,
+                func.ST_MakeEnvelope(min_longitude, min_latitude, max_longitude, max_latitude)
+            ))
+        if after:
+            query = query.filter(tuple_(Alert.created_at, Alert.id) < tuple_(*after))
         
-        return query.order_by(desc(Alert.created_at)).limit(limit).all()
+        return query.order_by(desc(Alert.created_at), desc(Alert.id)).limit(limit).all()
     
     def get_alert_by_id(self, alert_id: int):
         return self.db.query(Alert).filter(Alert.id == alert_id).first()
     
     def update_alert(self, alert_id: int, alert_update: AlertUpdate):
-        alert = self.db.query(Alert).filter(Alert.id == alert_id).first()
+        """Apply an update as alert events; raises ValueError for an unknown status or priority"""
+        alert = self.db.query(Alert).filter(Alert.id == alert_id).with_for_update().first()
         if not alert:
             return None
         
-        if alert_update.status:
-            alert.status = alert_update.status
-            if alert_update.status == "acknowledged":
-                alert.acknowledged_at = func.now()
-            elif alert_update.status == "resolved":
-                alert.resolved_at = func.now()
+        changes = update_changes(
+            alert,
+            status=alert_update.status,
+            assigned_officer_id=alert_update.assigned_officer_id,
+            priority=alert_update.priority
+        )
+        events = alert_event_log.append(self.db, alert, changes)
+        
+        self.db.commit()
+        self.db.refresh(alert)
+        alert_event_log.publish(events)
+        return alert
+    
+    def get_alert_timeline(self, alert_id: int):
+        return alert_event_log.timeline(self.db, alert_id)
+    
+    def record_repeat(self, alert_id: int):
+        """Count a repeat of an active alert in its metadata; None once it is no longer active"""
+        alert = self.db.query(Alert).filter(
+            Alert.id == alert_id,
+            Alert.status == "active"
+        ).with_for_update().first()
+        if not alert:
+            return None
         
-        if alert_update.assigned_officer_id:
-            alert.assigned_officer_id = alert_update.assigned_officer_id
+        try:
+            metadata = json.loads(alert.alert_metadata) if alert.alert_metadata else {}
+        except ValueError:
+            metadata = {"details": alert.alert_metadata}
+        metadata["occurrences"] = metadata.get("occurrences", 1) + 1
+        metadata["last_seen"] = datetime.now(timezone.utc).isoformat()
+        alert.alert_metadata = json.dumps(metadata)
         
         self.db.commit()
         self.db.refresh(alert)
         return alert
     
     def create_panic_alert(self, tourist_id: int, location_data: dict):
-        alert_data = AlertCreate(
-            type="panic",
-            priority="critical",
-            message="Emergency panic button activated",
-            location=location_data,
-            metadata=json.dumps({"source": "panic_button"})
-        )
-        return self.create_alert(tourist_id, alert_data)
+        return self.create_alert(tourist_id, panic_alert_data(location_data))
+    
+    def create_anomaly_alert(self, tourist_id: int, anomaly: Anomaly):
+        return self.create_alert(tourist_id, anomaly_alert_data(anomaly))
     
     def get_alert_statistics(self):
         total_alerts = self.db.query(Alert).count()
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+from .alert_dispatcher import AlertQueueFull, alert_dispatcher
+from .alert_service import anomaly_alert_data
+from .anomaly_detector import Anomaly
+from .notification_service import notification_service
+
+def trip_destination(trip) -> Optional[Tuple[float, float]]:
+    if trip is None or trip.destination_latitude is None or trip.destination_longitude is None:
+        return None
+    return trip.destination_latitude, trip.destination_longitude
+
+async def send_anomaly_alerts(tourist_data: dict, anomalies: Iterable[Anomaly], store: bool = True):
+    """Store each anomaly as an alert through the dispatcher and notify the police.
+    
+    Without `store` the police are only notified, for fixes from senders that
+    are not authenticated.
+    """
+    for anomaly in anomalies:
+        async def notify(alert, anomaly=anomaly):
+            if alert is not None:
+                created_at = alert.created_at
+            else:
+                created_at = datetime.fromtimestamp(anomaly.timestamp, tz=timezone.utc)
+            await notification_service.send_anomaly_alert(tourist_data, {
+                "id": alert.id if alert is not None else None,
+                "anomaly_type": anomaly.anomaly_type,
+                "priority": anomaly.priority,
+                "message": anomaly.description,
+                "latitude": anomaly.latitude,
+                "longitude": anomaly.longitude,
+                "created_at": created_at.isoformat()
+            })
+        
+        try:
+            if store:
+                alert_dispatcher.submit(
+                    tourist_data["id"], anomaly_alert_data(anomaly), notify, dedupe_key=anomaly.anomaly_type
+                )
+            else:
+                alert_dispatcher.submit(tourist_data["id"], None, notify, priority=anomaly.priority)
+        except AlertQueueFull:
+            # Counted as dropped in the dispatcher stats
+            break
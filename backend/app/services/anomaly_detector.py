@@ -0,0 +1,258 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from collections import OrderedDict, deque
+import math
+import numpy as np
+from ..core.config import settings
+from ..core.geo import (
+    bearing_deg, bearing_deg_array, equirectangular_m, haversine_m, haversine_m_array,
+    heading_change_deg, speed_mps_array
+)
+from .geofence_service import GeofenceEngine, geofence_engine
+
+MOVING_SPEED_MPS = 0.5  # slower than this counts as standing still
+MIN_HEADING_DISTANCE_M = 10.0  # shorter hops are GPS noise, not a direction
+MIN_SPEED_INTERVAL_S = 5.0  # speeds over shorter intervals are too noisy to flag
+SPEED_SPIKE_MIN_MPS = 20.0
+DWELL_RADIUS_M = 100.0
+DESTINATION_RADIUS_M = 25000.0
+ERRATIC_TURN_DEGREES = 120.0
+
+class Anomaly(NamedTuple):
+    tourist_id: int
+    anomaly_type: str  # unusual_movement, erratic_movement, prolonged_inactivity, route_deviation
+    priority: str
+    confidence: float
+    description: str
+    latitude: float
+    longitude: float
+    timestamp: float
+    features: dict
+
+class _TrackState:
+    """Rolling features for one tourist, bounded by the window size"""
+    __slots__ = (
+        "samples", "speed_sum", "speed_sq_sum", "turn_sum", "moving",
+        "last", "heading", "dwell_anchor", "destination", "destination_known", "alerted_at"
+    )
+
+    def __init__(self, window: int):
+        self.samples: deque = deque(maxlen=window)  # (speed, turn, moving)
+        self.speed_sum = 0.0
+        self.speed_sq_sum = 0.0
+        self.turn_sum = 0.0
+        self.moving = 0
+        self.last: Optional[Tuple[float, float, float]] = None  # (t, lat, lon)
+        self.heading: Optional[float] = None
+        self.dwell_anchor: Optional[Tuple[float, float, float]] = None  # (t, lat, lon)
+        self.destination: Optional[Tuple[float, float]] = None
+        self.destination_known = False
+        self.alerted_at: Dict[str, float] = {}
+
+    def push(self, speed: float, turn: float, moving: bool):
+        if len(self.samples) == self.samples.maxlen:
+            old_speed, old_turn, old_moving = self.samples[0]
+            self.speed_sum -= old_speed
+            self.speed_sq_sum -= old_speed * old_speed
+            self.turn_sum -= old_turn
+            self.moving -= old_moving
+        self.samples.append((speed, turn, moving))
+        self.speed_sum += speed
+        self.speed_sq_sum += speed * speed
+        self.turn_sum += turn
+        self.moving += moving
+
+    def speed_stats(self) -> Tuple[float, float]:
+        count = len(self.samples)
+        if not count:
+            return 0.0, 0.0
+        mean = self.speed_sum / count
+        return mean, math.sqrt(max(self.speed_sq_sum / count - mean * mean, 0.0))
+
+class AnomalyDetector:
+    """Streaming per-tourist anomaly detection.
+
+    Each fix updates a fixed-size window of speed and heading-change samples
+    with running sums, plus a dwell anchor and the distance to the trip
+    destination, so an update costs O(1) regardless of history length. At
+    most `max_tracked` tourists are kept, least recently updated evicted first.
+    """
+
+    def __init__(
+        self,
+        engine: GeofenceEngine = geofence_engine,
+        window: int = settings.ANOMALY_WINDOW,
+        max_tracked: int = settings.ANOMALY_MAX_TRACKED,
+        max_speed: float = settings.ANOMALY_MAX_SPEED_MPS,
+        speed_zscore: float = settings.ANOMALY_SPEED_ZSCORE,
+        risk_dwell: float = settings.ANOMALY_RISK_DWELL_S,
+        max_dwell: float = settings.ANOMALY_MAX_DWELL_S,
+        max_destination_distance: float = settings.ANOMALY_MAX_DESTINATION_DISTANCE_M,
+        cooldown: float = settings.ANOMALY_ALERT_COOLDOWN_S
+    ):
+        self.engine = engine
+        self.window = window
+        self.max_tracked = max_tracked
+        self.max_speed = max_speed
+        self.speed_zscore = speed_zscore
+        self.risk_dwell = risk_dwell
+        self.max_dwell = max_dwell
+        self.max_destination_distance = max_destination_distance
+        self.cooldown = cooldown
+        self._tracks: "OrderedDict[int, _TrackState]" = OrderedDict()
+
+    def needs_destination(self, tourist_id: int) -> bool:
+        state = self._tracks.get(tourist_id)
+        return state is None or not state.destination_known
+
+    def set_destination(self, tourist_id: int, destination: Optional[Tuple[float, float]]):
+        state = self._state(tourist_id)
+        state.destination = destination
+        state.destination_known = True
+
+    def forget(self, tourist_id: int):
+        self._tracks.pop(tourist_id, None)
+
+    def update(self, tourist_id: int, latitude: float, longitude: float, timestamp: float) -> List[Anomaly]:
+        state = self._state(tourist_id)
+        if state.last is None:
+            state.last = (timestamp, latitude, longitude)
+            state.dwell_anchor = (timestamp, latitude, longitude)
+            return []
+
+        last_t, last_lat, last_lon = state.last
+        if timestamp <= last_t:
+            # Duplicate or out-of-order fix
+            return []
+
+        destination_distance = None
+        if state.destination is not None:
+            destination_distance = haversine_m(latitude, longitude, *state.destination)
+        return self._advance(
+            tourist_id, state, latitude, longitude, timestamp,
+            equirectangular_m(last_lat, last_lon, latitude, longitude) / (timestamp - last_t),
+            bearing_deg(last_lat, last_lon, latitude, longitude),
+            destination_distance
+        )
+
+    def update_many(
+        self, tourist_id: int, latitudes: Sequence[float], longitudes: Sequence[float], timestamps: Sequence[float]
+    ) -> List[Anomaly]:
+        """Same as calling `update` for each fix in order, with the geometry computed for the batch at once"""
+        if not len(timestamps):
+            return []
+        state = self._state(tourist_id)
+        if state.last is None:
+            state.last = (float(timestamps[0]), float(latitudes[0]), float(longitudes[0]))
+            state.dwell_anchor = state.last
+
+        last_t, last_lat, last_lon = state.last
+        t = np.concatenate(([last_t], np.asarray(timestamps, dtype=np.float64)))
+        lat = np.concatenate(([last_lat], np.asarray(latitudes, dtype=np.float64)))
+        lon = np.concatenate(([last_lon], np.asarray(longitudes, dtype=np.float64)))
+        # Like `update`, skip fixes not later than every fix before them
+        used = np.concatenate(([True], t[1:] > np.maximum.accumulate(t)[:-1]))
+        t, lat, lon = t[used], lat[used], lon[used]
+
+        speeds = speed_mps_array(lat, lon, t).tolist()
+        headings = bearing_deg_array(lat[:-1], lon[:-1], lat[1:], lon[1:]).tolist()
+        if state.destination is not None:
+            destination_distances = haversine_m_array(lat[1:], lon[1:], *state.destination).tolist()
+        else:
+            destination_distances = [None] * len(speeds)
+
+        anomalies = []
+        for i, (latitude, longitude, timestamp) in enumerate(zip(lat[1:].tolist(), lon[1:].tolist(), t[1:].tolist())):
+            anomalies.extend(self._advance(
+                tourist_id, state, latitude, longitude, timestamp,
+                speeds[i], headings[i], destination_distances[i]
+            ))
+        return anomalies
+
+    def _advance(
+        self, tourist_id: int, state: _TrackState, latitude: float, longitude: float, timestamp: float,
+        speed: float, heading: float, destination_distance: Optional[float]
+    ) -> List[Anomaly]:
+        """Fold one in-order fix into the track, given its speed and bearing from the previous one"""
+        dt = timestamp - state.last[0]
+        distance = speed * dt
+        moving = speed >= MOVING_SPEED_MPS
+
+        turn = 0.0
+        if distance >= MIN_HEADING_DISTANCE_M:
+            if state.heading is not None and moving:
+                turn = heading_change_deg(state.heading, heading)
+            state.heading = heading
+
+        # Baseline excludes the current sample
+        mean_speed, std_speed = state.speed_stats()
+        baseline_ready = len(state.samples) >= self.window // 2
+        state.push(speed, turn, moving)
+        state.last = (timestamp, latitude, longitude)
+
+        anchor_t, anchor_lat, anchor_lon = state.dwell_anchor
+        if equirectangular_m(anchor_lat, anchor_lon, latitude, longitude) > DWELL_RADIUS_M:
+            state.dwell_anchor = (timestamp, latitude, longitude)
+            dwell = 0.0
+        else:
+            dwell = timestamp - anchor_t
+
+        features = {
+            "speed_mps": round(speed, 2),
+            "mean_speed_mps": round(mean_speed, 2),
+            "heading_change_deg": round(turn, 1),
+            "dwell_s": round(dwell),
+            "destination_distance_m": None if destination_distance is None else round(destination_distance)
+        }
+        found = []
+
+        if dt >= MIN_SPEED_INTERVAL_S:
+            if speed > self.max_speed:
+                found.append(("unusual_movement", "high", 0.9,
+                              f"Moved {distance / 1000:.1f} km at {speed * 3.6:.0f} km/h"))
+            elif (baseline_ready and speed > SPEED_SPIKE_MIN_MPS
+                  and speed > mean_speed + self.speed_zscore * std_speed):
+                found.append(("unusual_movement", "medium", 0.75,
+                              f"Sudden speed change to {speed * 3.6:.0f} km/h"))
+
+        if state.moving >= self.window // 2 and state.turn_sum / state.moving > ERRATIC_TURN_DEGREES:
+            found.append(("erratic_movement", "medium", 0.6, "Repeated sharp changes of direction"))
+
+        if dwell > self.risk_dwell and any(
+            zone.zone_type == "risk" for zone in self.engine.zones_at(latitude, longitude)
+        ):
+            found.append(("prolonged_inactivity", "high", 0.8,
+                          f"Stationary in a risk zone for {dwell / 60:.0f} minutes"))
+        elif dwell > self.max_dwell and (destination_distance is None or destination_distance > DESTINATION_RADIUS_M):
+            found.append(("prolonged_inactivity", "medium", 0.6,
+                          f"Stationary away from the trip destination for {dwell / 3600:.1f} hours"))
+
+        if destination_distance is not None and destination_distance > self.max_destination_distance:
+            found.append(("route_deviation", "medium", 0.7,
+                          f"{destination_distance / 1000:.0f} km from the trip destination"))
+
+        anomalies = []
+        for anomaly_type, priority, confidence, description in found:
+            if timestamp - state.alerted_at.get(anomaly_type, -math.inf) < self.cooldown:
+                continue
+            state.alerted_at[anomaly_type] = timestamp
+            anomalies.append(Anomaly(
+                tourist_id, anomaly_type, priority, confidence, description,
+                latitude, longitude, timestamp, features
+            ))
+        return anomalies
+
+    def stats(self) -> Dict:
+        return {"tracked": len(self._tracks), "capacity": self.max_tracked}
+
+    def _state(self, tourist_id: int) -> _TrackState:
+        state = self._tracks.get(tourist_id)
+        if state is None:
+            state = self._tracks[tourist_id] = _TrackState(self.window)
+            if len(self._tracks) > self.max_tracked:
+                self._tracks.popitem(last=False)
+        else:
+            self._tracks.move_to_end(tourist_id)
+        return state
+
+# Global anomaly detector instance
+anomaly_detector = AnomalyDetector()
@@ -0,0 +1,263 @@
+from typing import AsyncIterator, Collection, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import re
+import time
+from ..core.config import settings
+from .knowledge_base import KnowledgeBase, KnowledgeDocument, knowledge_base
+
+FALLBACK_RESPONSE = "I understand your concern. For immediate assistance, please use the panic button or contact emergency services at 112. How else can I help you stay safe?"
+
+SYSTEM_PROMPT = (
+    "You are a safety assistant for tourists travelling in India. Answer briefly and practically. "
+    "For emergencies, tell the user to use the panic button or call 112. "
+    "Prefer the guidance below when it answers the question."
+)
+
+def _grounded_prompt(documents: Sequence[KnowledgeDocument]) -> str:
+    return "\n\n".join([SYSTEM_PROMPT] + [f"{document.title}: {document.text}" for document in documents])
+
+# Canned intents, highest priority first: (intent, keywords, response)
+INTENTS: Sequence[Tuple[str, Tuple[str, ...], str]] = (
+    ("emergency", ("emergency",),
+     "In case of emergency:\n1. Use the panic button for immediate help\n2. Call local emergency number: 112\n3. Contact your embassy if needed\n4. Share your location with trusted contacts"),
+    ("safety", ("safety",),
+     "Safety tips:\n1. Stay in well-lit areas\n2. Keep documents secure\n3. Inform someone about your whereabouts\n4. Trust your instincts\n5. Use official transportation"),
+    ("help", ("help",),
+     "I can help you with:\n- Emergency procedures\n- Safety tips\n- Local information\n- Navigation assistance\n- Contact emergency services"),
+    ("location", ("location",),
+     "Your current location is being tracked for safety. If you feel unsafe, use the panic button or contact local authorities at 112."),
+    ("police", ("police",),
+     "To contact police:\n- Emergency: 112\n- Tourist Police: 1363\n- Use the panic button for immediate assistance"),
+)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+def normalize_query(message: str) -> str:
+    """Lowercase with punctuation dropped and whitespace collapsed"""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", message.lower())).strip()
+
+class IntentMatcher:
+    """Aho-Corasick automaton over all intent keywords.
+
+    One pass over the message finds every keyword occurrence regardless of
+    how many keywords there are; the highest priority intent found wins.
+    Keywords match as substrings, like the original `in` checks.
+    """
+
+    def __init__(self, intents: Iterable[Tuple[str, Iterable[str], str]] = INTENTS):
+        self.responses: Dict[str, str] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [-1]  # best (lowest) priority ending at each node
+        self._intents: List[str] = []
+
+        for priority, (intent, keywords, response) in enumerate(intents):
+            self._intents.append(intent)
+            self.responses[intent] = response
+            for keyword in keywords:
+                self._add(keyword.lower(), priority)
+        self._link()
+
+    def match(self, message: str) -> Optional[str]:
+        best = -1
+        node = 0
+        for char in message.lower():
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found = self._output[node]
+            if found != -1 and (best == -1 or found < best):
+                best = found
+                if best == 0:
+                    break
+        return None if best == -1 else self._intents[best]
+
+    def _add(self, keyword: str, priority: int):
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = self._goto[node][char] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+            node = next_node
+        if self._output[node] == -1 or priority < self._output[node]:
+            self._output[node] = priority
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                inherited = self._output[self._fail[child]]
+                if inherited != -1 and (self._output[child] == -1 or inherited < self._output[child]):
+                    self._output[child] = inherited
+                queue.append(child)
+
+class ResponseCache:
+    """In-process LRU of model replies keyed by normalized query, with a TTL"""
+
+    def __init__(self, ttl: float = settings.CHATBOT_CACHE_TTL_S, max_entries: int = settings.CHATBOT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, response: str):
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+class ChatBackend(Protocol):
+    def stream(self, message: str, documents: Sequence[KnowledgeDocument]) -> AsyncIterator[str]:
+        """Yield the reply to `message`, grounded in `documents`, token by token"""
+        ...
+
+class StubChatBackend:
+    """Local stand-in for an LLM: streams the best document, or the fallback reply, word by word"""
+
+    def __init__(self, response: str = FALLBACK_RESPONSE, token_delay: float = 0.0):
+        self.response = response
+        self.token_delay = token_delay
+
+    async def stream(self, message: str, documents: Sequence[KnowledgeDocument]) -> AsyncIterator[str]:
+        response = documents[0].text if documents else self.response
+        for token in re.findall(r"\S+\s*", response):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+class OpenAIChatBackend:
+    """Streams chat completions from the OpenAI API"""
+
+    def __init__(self, api_key: str, model: str = settings.CHATBOT_MODEL):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.model = model
+
+    async def stream(self, message: str, documents: Sequence[KnowledgeDocument]) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": _grounded_prompt(documents)},
+                {"role": "user", "content": message}
+            ],
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+class ChatbotPipeline:
+    """Intent match, then retrieval and cache, then a concurrency-limited model call.
+
+    Canned intents never reach the model. Other queries are grounded in the
+    knowledge base documents for the tourist's zones and destination, and
+    cached per normalized query and retrieved documents. At most `max_concurrency` model
+    calls run at once per worker; a query that cannot get a slot within
+    `queue_timeout` seconds gets the fallback reply instead of piling up.
+    """
+
+    def __init__(
+        self,
+        backend: ChatBackend,
+        matcher: Optional[IntentMatcher] = None,
+        cache: Optional[ResponseCache] = None,
+        knowledge: Optional[KnowledgeBase] = None,
+        max_concurrency: int = settings.CHATBOT_MAX_CONCURRENCY,
+        queue_timeout: float = settings.CHATBOT_QUEUE_TIMEOUT_S
+    ):
+        self.backend = backend
+        self.matcher = matcher or IntentMatcher()
+        self.cache = cache or ResponseCache()
+        self.knowledge = knowledge
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._stats = {"intent_replies": 0, "model_replies": 0, "overloaded": 0, "failed": 0}
+
+    async def stream(
+        self,
+        message: str,
+        zone_ids: Collection[int] = (),
+        destination: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        intent = self.matcher.match(message)
+        if intent is not None:
+            self._stats["intent_replies"] += 1
+            yield self.matcher.responses[intent]
+            return
+
+        documents = []
+        if self.knowledge is not None:
+            documents = [document for document, _ in self.knowledge.search(message, zone_ids=zone_ids, destination=destination)]
+        key = "|".join([normalize_query(message)] + [document.id for document in documents])
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats["overloaded"] += 1
+            yield FALLBACK_RESPONSE
+            return
+
+        tokens = []
+        try:
+            async for token in self.backend.stream(message, documents):
+                tokens.append(token)
+                yield token
+        except Exception:
+            self._stats["failed"] += 1
+            if not tokens:
+                yield FALLBACK_RESPONSE
+            return
+        finally:
+            self._semaphore.release()
+
+        self._stats["model_replies"] += 1
+        self.cache.set(key, "".join(tokens))
+
+    async def respond(self, message: str, zone_ids: Collection[int] = (), destination: Optional[str] = None) -> str:
+        return "".join([token async for token in self.stream(message, zone_ids, destination)])
+
+    def stats(self) -> Dict:
+        return {**self._stats, "cache": self.cache.stats()}
+
+def _default_backend() -> ChatBackend:
+    if settings.OPENAI_API_KEY:
+        return OpenAIChatBackend(settings.OPENAI_API_KEY)
+    return StubChatBackend()
+
+# Global chatbot pipeline instance
+chatbot_pipeline = ChatbotPipeline(_default_backend(), knowledge=knowledge_base)
@@ -0,0 +1,178 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.redis import get_redis, get_sync_redis
+from ..core.timestamps import as_utc
+from ..models.alert import Alert
+from ..models.trip import Trip
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_KEY = "dashboard:counters"
+RESOLVED_KEY = "dashboard:resolved:{}"  # per UTC day
+RESPONSE_TIMES_KEY = "dashboard:response_times"  # latest acknowledgement delays, newest first
+LOCK_KEY = "dashboard:reconcile:lock"
+
+# Alert statuses with a live counter; resolved alerts are counted per day
+STATUS_FIELDS = {"active": "active_alerts", "acknowledged": "acknowledged_alerts"}
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+def _resolved_today(event: Dict) -> bool:
+    resolved_at = event.get("resolved_at")
+    return bool(resolved_at) and as_utc(datetime.fromisoformat(resolved_at)).date().isoformat() == _today()
+
+def _median(samples: Iterable[float]) -> Optional[float]:
+    values = sorted(samples)
+    return round(values[len(values) // 2], 1) if values else None
+
+class DashboardCounters:
+    """Police dashboard counts kept in Redis.
+
+    Alert events adjust the counters as they commit, and acknowledgements
+    add to a window of recent response times, so reading the dashboard
+    costs one Redis round trip. A periodic reconciliation recounts from the
+    database to correct drift from failed increments or writes that bypass
+    the services; updates racing with a recount can be off by a few until
+    the next one. Trips end by status changes no service makes, so active
+    tourists are only counted by the reconciliation.
+    """
+
+    def __init__(
+        self,
+        reconcile_interval: float = settings.DASHBOARD_COUNTERS_RECONCILE_INTERVAL,
+        response_samples: int = settings.DASHBOARD_RESPONSE_SAMPLES
+    ):
+        self.reconcile_interval = reconcile_interval
+        self.response_samples = response_samples
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def record_events(self, events: List[Dict]):
+        """Apply committed alert events, see `AlertEventLog.publish`"""
+        changes = Counter()
+        resolved = 0
+        response_times = []
+        for event in events:
+            previous_status = None if event["event_type"] == "created" else event["previous_status"]
+            if previous_status is None:
+                changes["total_alerts"] += 1
+            if event["status"] != previous_status:
+                if previous_status in STATUS_FIELDS:
+                    changes[STATUS_FIELDS[previous_status]] -= 1
+                if event["status"] in STATUS_FIELDS:
+                    changes[STATUS_FIELDS[event["status"]]] += 1
+            if event["event_type"] == "resolved":
+                resolved += 1
+            elif event["event_type"] == "reopened" and previous_status == "resolved" and _resolved_today(event):
+                resolved -= 1
+            elif event["event_type"] == "acknowledged":
+                response_times.append(event["elapsed_s"])
+        self._apply(changes, resolved, response_times)
+    
+    async def read(self) -> Dict:
+        client = await get_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.hgetall(COUNTERS_KEY)
+        pipe.get(RESOLVED_KEY.format(_today()))
+        pipe.lrange(RESPONSE_TIMES_KEY, 0, -1)
+        counters, resolved_today, response_times = await pipe.execute()
+        if not counters:
+            # Nothing reconciled yet, e.g. Redis was flushed
+            return await asyncio.to_thread(self.reconcile)
+        return {
+            **{field: int(value) for field, value in counters.items()},
+            "resolved_today": int(resolved_today or 0),
+            "response_time_s": _median(float(value) for value in response_times)
+        }
+
+    def reconcile(self) -> Dict:
+        """Recount everything from the database and overwrite the counters"""
+        db = SessionLocal()
+        try:
+            counts = self._count(db)
+        finally:
+            db.close()
+
+        resolved_today = counts.pop("resolved_today")
+        response_times = counts.pop("response_times")
+        client = get_sync_redis()
+        pipe = client.pipeline()
+        pipe.hset(COUNTERS_KEY, mapping=counts)
+        pipe.set(RESOLVED_KEY.format(_today()), resolved_today, ex=int(timedelta(days=2).total_seconds()))
+        pipe.delete(RESPONSE_TIMES_KEY)
+        if response_times:
+            pipe.rpush(RESPONSE_TIMES_KEY, *response_times)
+        pipe.execute()
+        return {**counts, "resolved_today": resolved_today, "response_time_s": _median(response_times)}
+
+    def _count(self, db: Session) -> Dict:
+        midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        status_counts = dict(db.query(Alert.status, func.count(Alert.id)).group_by(Alert.status).all())
+        resolved_today = db.query(func.count(Alert.id)).filter(
+            Alert.status == "resolved",
+            Alert.resolved_at >= midnight
+        ).scalar()
+        active_tourists = db.query(func.count(Trip.id)).filter(Trip.status == "active").scalar()
+        response_times = db.query(
+            func.extract("epoch", Alert.acknowledged_at - Alert.created_at)
+        ).filter(
+            Alert.acknowledged_at.isnot(None)
+        ).order_by(desc(Alert.acknowledged_at)).limit(self.response_samples).all()
+
+        counts = {field: status_counts.get(status, 0) for status, field in STATUS_FIELDS.items()}
+        counts["total_alerts"] = sum(status_counts.values())
+        counts["active_tourists"] = active_tourists
+        counts["resolved_today"] = resolved_today
+        counts["response_times"] = [float(seconds) for seconds, in response_times]
+        return counts
+
+    def _apply(self, changes: Dict[str, int], resolved: int = 0, response_times: Sequence[float] = ()):
+        # Counters are advisory: never fail the write that triggered them
+        try:
+            pipe = get_sync_redis().pipeline(transaction=False)
+            for field, delta in changes.items():
+                if delta:
+                    pipe.hincrby(COUNTERS_KEY, field, delta)
+            if resolved:
+                key = RESOLVED_KEY.format(_today())
+                pipe.incrby(key, resolved)
+                pipe.expire(key, int(timedelta(days=2).total_seconds()))
+            if response_times:
+                pipe.lpush(RESPONSE_TIMES_KEY, *response_times)
+                pipe.ltrim(RESPONSE_TIMES_KEY, 0, self.response_samples - 1)
+            pipe.execute()
+        except Exception:
+            logger.exception("Dashboard counter update failed; the next reconciliation corrects it")
+
+    async def _run(self):
+        while True:
+            try:
+                client = await get_redis()
+                if await client.set(LOCK_KEY, 1, nx=True, ex=max(int(self.reconcile_interval), 1)):
+                    await asyncio.to_thread(self.reconcile)
+            except Exception:
+                logger.exception("Dashboard counter reconciliation failed")
+            await asyncio.sleep(self.reconcile_interval)
+
+# Global dashboard counters instance
+dashboard_counters = DashboardCounters()
@@ -0,0 +1,156 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import sys
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+Cell = int  # column << lat_bits | row on the geohash grid
+Entry = Tuple[Tuple[int, ...], Tuple[int, ...]]  # (covering zone ids, border zone ids)
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_EMPTY: Entry = ((), ())
+
+class ZoneGrid:
+    """Precomputed zone membership per geohash cell.
+
+    Every cell touched by a zone is stored once with the zones that cover it
+    completely and the zones whose border runs through it. Cells absent from
+    the table are outside every zone, so only border cells need an exact test.
+    Zones needing more than `max_cells_per_zone` cells are left out of the
+    table and always tested exactly.
+    """
+
+    def __init__(self, precision: int, max_cells_per_zone: int):
+        self.precision = precision
+        self.max_cells_per_zone = max_cells_per_zone
+        self.lon_bits = (5 * precision + 1) // 2
+        self.lat_bits = 5 * precision // 2
+        self.cell_width = 360.0 / (1 << self.lon_bits)
+        self.cell_height = 180.0 / (1 << self.lat_bits)
+
+        self.cells: Dict[Cell, Entry] = {}
+        # Most cells share a handful of distinct entries, so store each only once
+        self._entries: Dict[Entry, Entry] = {}
+        # zone id -> (geometry WKB, cells it was written to; None when unindexed)
+        self.zone_cells: Dict[int, Tuple[bytes, Optional[List[Cell]]]] = {}
+        self.unindexed: Tuple[int, ...] = ()
+        self.memory_bytes = 0
+
+    def cell(self, latitude: float, longitude: float) -> Cell:
+        column = min(int((longitude + 180.0) / self.cell_width), (1 << self.lon_bits) - 1)
+        row = min(int((latitude + 90.0) / self.cell_height), (1 << self.lat_bits) - 1)
+        return column << self.lat_bits | row
+
+    def geohash(self, cell: Cell) -> str:
+        """Geohash string of a cell, for debugging and logs"""
+        column, row = cell >> self.lat_bits, cell & ((1 << self.lat_bits) - 1)
+        bits = 0
+        for i in range(5 * self.precision):
+            # Geohash interleaves longitude bits first, most significant first
+            if i % 2 == 0:
+                bit = (column >> (self.lon_bits - 1 - i // 2)) & 1
+            else:
+                bit = (row >> (self.lat_bits - 1 - i // 2)) & 1
+            bits = (bits << 1) | bit
+        return "".join(
+            _BASE32[(bits >> shift) & 31] for shift in range(5 * (self.precision - 1), -1, -5)
+        )
+
+    def lookup(self, latitude: float, longitude: float) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """Zones covering the point's cell, and zones that still need an exact test"""
+        covering, border = self.cells.get(self.cell(latitude, longitude), _EMPTY)
+        if self.unindexed:
+            border = border + self.unindexed
+        return covering, border
+
+    def rebuild(self, zones: Iterable) -> "ZoneGrid":
+        """New grid for `zones`, reusing cells of zones whose geometry did not change"""
+        grid = ZoneGrid(self.precision, self.max_cells_per_zone)
+        grid.cells = dict(self.cells)
+        grid.zone_cells = dict(self.zone_cells)
+        grid._entries = dict(self._entries)
+
+        current = {zone.id: zone for zone in zones}
+        for zone_id, (wkb, _) in list(grid.zone_cells.items()):
+            zone = current.get(zone_id)
+            if zone is None or zone.geometry.wkb != wkb:
+                grid._remove(zone_id)
+
+        for zone in current.values():
+            if zone.id not in grid.zone_cells:
+                grid._add(zone.id, zone.geometry)
+
+        grid.unindexed = tuple(
+            zone_id for zone_id, (_, cells) in grid.zone_cells.items() if cells is None
+        )
+        live = set(grid.cells.values())
+        grid._entries = {entry: entry for entry in grid._entries if entry in live}
+        grid.memory_bytes = grid._measure()
+        return grid
+
+    def _add(self, zone_id: int, geometry: BaseGeometry):
+        min_x, min_y, max_x, max_y = geometry.bounds
+        first = self.cell(min_y, min_x)
+        last = self.cell(max_y, max_x)
+        row_mask = (1 << self.lat_bits) - 1
+        first_column, first_row = first >> self.lat_bits, first & row_mask
+        last_column, last_row = last >> self.lat_bits, last & row_mask
+        if (last_column - first_column + 1) * (last_row - first_row + 1) > self.max_cells_per_zone:
+            self.zone_cells[zone_id] = (geometry.wkb, None)
+            return
+
+        columns, rows = np.meshgrid(
+            np.arange(first_column, last_column + 1), np.arange(first_row, last_row + 1)
+        )
+        columns, rows = columns.ravel(), rows.ravel()
+        west = columns * self.cell_width - 180.0
+        south = rows * self.cell_height - 90.0
+        boxes = shapely.box(west, south, west + self.cell_width, south + self.cell_height)
+
+        shapely.prepare(geometry)
+        covered = shapely.contains(geometry, boxes)
+        touched = shapely.intersects(geometry, boxes)
+
+        cells = []
+        keys = (columns[touched] << self.lat_bits | rows[touched]).tolist()
+        for cell, is_covered in zip(keys, covered[touched].tolist()):
+            covering, border = self.cells.get(cell, _EMPTY)
+            if is_covered:
+                self._store(cell, (covering + (zone_id,), border))
+            else:
+                self._store(cell, (covering, border + (zone_id,)))
+            cells.append(cell)
+        self.zone_cells[zone_id] = (geometry.wkb, cells)
+
+    def _remove(self, zone_id: int):
+        _, cells = self.zone_cells.pop(zone_id)
+        for cell in cells or ():
+            covering, border = self.cells[cell]
+            covering = tuple(z for z in covering if z != zone_id)
+            border = tuple(z for z in border if z != zone_id)
+            if covering or border:
+                self._store(cell, (covering, border))
+            else:
+                del self.cells[cell]
+
+    def _store(self, cell: Cell, entry: Entry):
+        self.cells[cell] = self._entries.setdefault(entry, entry)
+
+    def _measure(self) -> int:
+        size = sys.getsizeof(self.cells) + sys.getsizeof(self.zone_cells) + sys.getsizeof(self._entries)
+        size += sum(sys.getsizeof(cell) for cell in self.cells)
+        for covering, border in self._entries:
+            size += sys.getsizeof((covering, border)) + sys.getsizeof(covering) + sys.getsizeof(border)
+        for wkb, cells in self.zone_cells.values():
+            size += sys.getsizeof(wkb) + sys.getsizeof(cells)
+        return size
+
+    def stats(self) -> Dict:
+        return {
+            "precision": self.precision,
+            "cell_size_degrees": [self.cell_width, self.cell_height],
+            "cells": len(self.cells),
+            "border_cells": sum(1 for _, border in self.cells.values() if border),
+            "unindexed_zones": len(self.unindexed),
+            "memory_bytes": self.memory_bytes
+        }
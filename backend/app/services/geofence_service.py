@@ -0,0 +1,251 @@
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import asyncio
+import logging
+import numpy as np
+import shapely
+from shapely.geometry import Point
+from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
+from geoalchemy2.shape import to_shape
+from sqlalchemy import text
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.location import SafetyZone
+from .geofence_grid import ZoneGrid
+
+logger = logging.getLogger(__name__)
+
+# Changes whenever any zone is added, removed, toggled or redrawn
+_FINGERPRINT_SQL = text("""
+    SELECT md5(coalesce(string_agg(
+        id || ':' || coalesce(is_active, false) || ':' || zone_type || ':' ||
+        coalesce(safety_score, 0) || ':' || coalesce(md5(ST_AsEWKB(geometry)::text), ''),
+        ',' ORDER BY id
+    ), ''))
+    FROM safety_zones
+""")
+
+@dataclass(frozen=True)
+class Zone:
+    id: int
+    name: str
+    zone_type: str
+    safety_score: float
+    geometry: BaseGeometry
+
+class ZoneEdges(NamedTuple):
+    """Bounding box and every ring edge of a zone, as flat arrays for ray casting"""
+    bounds: Tuple[float, float, float, float]
+    x1: np.ndarray
+    y1: np.ndarray
+    x2: np.ndarray
+    y2: np.ndarray
+
+class BatchMembership(NamedTuple):
+    """Sparse point/zone membership: one entry per (point, zone) containment"""
+    point_index: np.ndarray
+    zone_id: np.ndarray
+
+def _zone_edges(geometry: BaseGeometry) -> ZoneEdges:
+    xs1, ys1, xs2, ys2 = [], [], [], []
+    for ring in shapely.get_rings(geometry):
+        coords = shapely.get_coordinates(ring)
+        xs1.append(coords[:-1, 0])
+        ys1.append(coords[:-1, 1])
+        xs2.append(coords[1:, 0])
+        ys2.append(coords[1:, 1])
+    return ZoneEdges(
+        geometry.bounds,
+        np.concatenate(xs1), np.concatenate(ys1), np.concatenate(xs2), np.concatenate(ys2)
+    )
+
+def _ray_cast(edges: ZoneEdges, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting of many points against one zone; holes are just more rings"""
+    inside = np.zeros(len(xs), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for x1, y1, x2, y2 in zip(edges.x1, edges.y1, edges.x2, edges.y2):
+            crosses = (y1 > ys) != (y2 > ys)
+            inside ^= crosses & (xs < x1 + (ys - y1) * (x2 - x1) / (y2 - y1))
+    return inside
+
+class GeofenceEngine:
+    """In-memory STR-tree over active `SafetyZone` polygons.
+
+    The index is rebuilt off the request path and swapped in with a single
+    assignment, so lookups never see a half-built tree. Single-point lookups
+    go through a geohash `ZoneGrid` first when `grid_precision` is set.
+    """
+
+    def __init__(
+        self,
+        reload_interval: float = settings.GEOFENCE_RELOAD_INTERVAL,
+        grid_precision: int = settings.GEOFENCE_GRID_PRECISION,
+        grid_max_cells_per_zone: int = settings.GEOFENCE_GRID_MAX_CELLS_PER_ZONE
+    ):
+        self.reload_interval = reload_interval
+        # Zones, tree, zones by id, grid and ray-casting edges, replaced together
+        self._index: Tuple[List[Zone], Optional[STRtree], Dict[int, Zone], Optional[ZoneGrid], List[ZoneEdges]] = (
+            [], None, {}, ZoneGrid(grid_precision, grid_max_cells_per_zone) if grid_precision > 0 else None, []
+        )
+        self._grid_lookups = 0
+        self._grid_hits = 0
+        self._reload_listeners: List[Callable[[], Awaitable]] = []
+        self._fingerprint: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def zones(self) -> List[Zone]:
+        return self._index[0]
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Fingerprint of the zones last loaded by `reload`"""
+        return self._fingerprint
+
+    def load(self, zones: Sequence[Zone]):
+        zones = list(zones)
+        for zone in zones:
+            shapely.prepare(zone.geometry)
+        tree = STRtree([zone.geometry for zone in zones]) if zones else None
+        edges = [_zone_edges(zone.geometry) for zone in zones]
+        grid = self._index[3]
+        if grid is not None:
+            grid = grid.rebuild(zones)
+        self._index = (zones, tree, {zone.id: zone for zone in zones}, grid, edges)
+
+    def get_zone(self, zone_id: int) -> Optional[Zone]:
+        return self._index[2].get(zone_id)
+
+    def zones_at(self, latitude: float, longitude: float) -> List[Zone]:
+        """Active zones containing a point (boundary included)"""
+        zones, tree, by_id, grid, _ = self._index
+        if tree is None:
+            return []
+        if grid is None:
+            hits = tree.query(Point(longitude, latitude), predicate="intersects")
+            return [zones[i] for i in hits]
+
+        covering, border = grid.lookup(latitude, longitude)
+        self._grid_lookups += 1
+        if not border:
+            self._grid_hits += 1
+            return [by_id[zone_id] for zone_id in covering]
+
+        result = [by_id[zone_id] for zone_id in covering]
+        for zone_id in border:
+            zone = by_id[zone_id]
+            if shapely.intersects_xy(zone.geometry, longitude, latitude):
+                result.append(zone)
+        return result
+
+    def grid_stats(self) -> Dict:
+        grid = self._index[3]
+        if grid is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            **grid.stats(),
+            "lookups": self._grid_lookups,
+            "hits": self._grid_hits,
+            "hit_rate": round(self._grid_hits / self._grid_lookups, 4) if self._grid_lookups else None
+        }
+
+    def zones_for_points(self, latitudes: np.ndarray, longitudes: np.ndarray) -> BatchMembership:
+        """Zone membership for many points at once.
+
+        Points are sorted by longitude once, so each zone's bounding box selects
+        its candidates with two binary searches before exact ray casting.
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        zones, _, _, _, edges = self._index
+
+        order = np.argsort(longitudes, kind="stable")
+        sorted_longitudes = longitudes[order]
+
+        point_parts, zone_parts = [], []
+        for zone, zone_edges in zip(zones, edges):
+            min_x, min_y, max_x, max_y = zone_edges.bounds
+            start = np.searchsorted(sorted_longitudes, min_x, side="left")
+            stop = np.searchsorted(sorted_longitudes, max_x, side="right")
+            candidates = order[start:stop]
+            candidate_latitudes = latitudes[candidates]
+            candidates = candidates[(candidate_latitudes >= min_y) & (candidate_latitudes <= max_y)]
+            if not len(candidates):
+                continue
+
+            inside = candidates[_ray_cast(zone_edges, longitudes[candidates], latitudes[candidates])]
+            point_parts.append(inside)
+            zone_parts.append(np.full(len(inside), zone.id, dtype=np.int64))
+
+        if not point_parts:
+            return BatchMembership(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        return BatchMembership(np.concatenate(point_parts), np.concatenate(zone_parts))
+
+    def add_reload_listener(self, listener: Callable[[], Awaitable]):
+        """Register a coroutine function to run after zones change"""
+        self._reload_listeners.append(listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """Reload zones from the database if they changed; returns True when reloaded"""
+        db = SessionLocal()
+        try:
+            fingerprint = db.execute(_FINGERPRINT_SQL).scalar()
+            if not force and fingerprint == self._fingerprint:
+                return False
+
+            rows = db.query(SafetyZone).filter(
+                SafetyZone.is_active == True,
+                SafetyZone.geometry.isnot(None)
+            ).all()
+            zones = [
+                Zone(
+                    id=row.id,
+                    name=row.name,
+                    zone_type=row.zone_type,
+                    safety_score=row.safety_score,
+                    geometry=to_shape(row.geometry)
+                )
+                for row in rows
+            ]
+        finally:
+            db.close()
+
+        self.load(zones)
+        self._fingerprint = fingerprint
+        logger.info("Geofence index loaded with %d zones", len(zones))
+        return True
+
+    async def warm_up(self):
+        """Load zones once before serving; failures are retried by the reload loop"""
+        try:
+            await asyncio.to_thread(self.reload)
+        except Exception:
+            logger.exception("Initial geofence load failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if await asyncio.to_thread(self.reload):
+                    for listener in self._reload_listeners:
+                        await listener()
+            except Exception:
+                logger.exception("Geofence reload failed")
+            await asyncio.sleep(self.reload_interval)
+
+# Global geofence engine instance
+geofence_engine = GeofenceEngine()
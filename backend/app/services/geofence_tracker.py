@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+from datetime import datetime, timezone
+import logging
+import numpy as np
+from shapely.geometry import Point
+from shapely.ops import nearest_points
+from ..core.config import settings
+from ..core.geo import equirectangular_m
+from ..core.live_positions import live_positions
+from ..core.redis import get_redis
+from .alert_dispatcher import AlertQueueFull, alert_dispatcher
+from .geofence_service import GeofenceEngine, Zone, geofence_engine
+from .notification_service import notification_service
+from .trajectory_compressor import trajectory_compressor
+
+logger = logging.getLogger(__name__)
+
+RECHECK_LOCK_KEY = "geofence:recheck:{}"  # per zone fingerprint
+
+# Per-zone status codes, kept as small tuples: (status, since)
+PENDING_ENTER = 1
+INSIDE = 2
+PENDING_EXIT = 3
+
+class GeofenceEvent(NamedTuple):
+    tourist_id: int
+    zone: Zone
+    event: str  # enter, exit
+    timestamp: float
+
+class GeofenceStateTracker:
+    """Turns raw zone lookups into debounced enter/exit transitions.
+
+    A tourist enters a zone after staying inside it for `min_dwell` seconds,
+    and exits after staying more than `buffer_m` meters outside it for
+    `min_dwell` seconds, so jitter along a border produces no events.
+    """
+
+    def __init__(
+        self,
+        engine: GeofenceEngine = geofence_engine,
+        buffer_m: float = settings.GEOFENCE_EXIT_BUFFER_M,
+        min_dwell: float = settings.GEOFENCE_MIN_DWELL_S
+    ):
+        self.engine = engine
+        self.buffer_m = buffer_m
+        self.min_dwell = min_dwell
+        self._states: Dict[int, Dict[int, Tuple[int, float]]] = {}
+
+    def update(self, tourist_id: int, latitude: float, longitude: float, timestamp: float) -> List[GeofenceEvent]:
+        hits = {zone.id: zone for zone in self.engine.zones_at(latitude, longitude)}
+        states = self._states.get(tourist_id, {})
+        events = []
+
+        for zone_id in set(states) | set(hits):
+            zone = self.engine.get_zone(zone_id)
+            if zone is None:
+                # Zone was deactivated or removed on reload
+                states.pop(zone_id, None)
+                continue
+
+            status, since = states.get(zone_id, (None, timestamp))
+
+            if status in (INSIDE, PENDING_EXIT):
+                if zone_id in hits or self._within_buffer(zone, latitude, longitude):
+                    states[zone_id] = (INSIDE, timestamp)
+                elif status == INSIDE:
+                    states[zone_id] = (PENDING_EXIT, timestamp)
+                    if self.min_dwell <= 0:
+                        states.pop(zone_id)
+                        events.append(GeofenceEvent(tourist_id, zone, "exit", timestamp))
+                elif timestamp - since >= self.min_dwell:
+                    states.pop(zone_id)
+                    events.append(GeofenceEvent(tourist_id, zone, "exit", timestamp))
+            elif zone_id in hits:
+                if status is None:
+                    states[zone_id] = (PENDING_ENTER, timestamp)
+                if timestamp - since >= self.min_dwell:
+                    states[zone_id] = (INSIDE, timestamp)
+                    events.append(GeofenceEvent(tourist_id, zone, "enter", timestamp))
+            else:
+                states.pop(zone_id, None)
+
+        if states:
+            self._states[tourist_id] = states
+        else:
+            self._states.pop(tourist_id, None)
+        return events
+
+    def inside(self, tourist_id: int) -> List[int]:
+        return [
+            zone_id for zone_id, (status, _) in self._states.get(tourist_id, {}).items()
+            if status in (INSIDE, PENDING_EXIT)
+        ]
+
+    def forget(self, tourist_id: int):
+        self._states.pop(tourist_id, None)
+
+    async def rebuild(self) -> int:
+        """Seed state from the live position store after a restart, without emitting events"""
+        try:
+            positions = await live_positions.snapshot()
+        except Exception:
+            logger.exception("Could not rebuild geofence state from live positions")
+            return 0
+
+        self._states.clear()
+        for position in positions:
+            timestamp = datetime.fromisoformat(position["timestamp"]).timestamp()
+            states = {
+                zone.id: (INSIDE, timestamp)
+                for zone in self.engine.zones_at(position["latitude"], position["longitude"])
+            }
+            if states:
+                self._states[position["tourist_id"]] = states
+        return len(self._states)
+
+    async def recheck_live(self) -> int:
+        """Re-run every live tourist through the tracker after zones change.
+
+        Every worker reloads the same zones, so only the one that takes the
+        lock for the new fingerprint rechecks and publishes events. Membership
+        is evaluated for all live positions in one batch, and only tourists
+        that are inside a zone now or were tracked before get an update.
+        """
+        try:
+            client = await get_redis()
+            locked = await client.set(
+                RECHECK_LOCK_KEY.format(self.engine.fingerprint), 1,
+                nx=True, ex=max(int(self.engine.reload_interval * 2), 1)
+            )
+            if not locked:
+                return 0
+            positions = await live_positions.snapshot()
+        except Exception:
+            logger.exception("Could not start the geofence recheck")
+            return 0
+        if not positions:
+            return 0
+
+        latitudes = np.fromiter((p["latitude"] for p in positions), dtype=np.float64, count=len(positions))
+        longitudes = np.fromiter((p["longitude"] for p in positions), dtype=np.float64, count=len(positions))
+        membership = self.engine.zones_for_points(latitudes, longitudes)
+        affected = set(membership.point_index.tolist())
+
+        now = datetime.now(timezone.utc).timestamp()
+        events = []
+        for index, position in enumerate(positions):
+            if index in affected or position["tourist_id"] in self._states:
+                events.extend(self.update(
+                    position["tourist_id"], position["latitude"], position["longitude"], now
+                ))
+
+        for event in events:
+            await send_geofence_events({"id": event.tourist_id, "name": "Tourist"}, [event])
+        return len(events)
+
+    def _within_buffer(self, zone: Zone, latitude: float, longitude: float) -> bool:
+        if self.buffer_m <= 0:
+            return False
+        nearest, _ = nearest_points(zone.geometry, Point(longitude, latitude))
+        return equirectangular_m(latitude, longitude, nearest.y, nearest.x) <= self.buffer_m
+
+async def send_geofence_events(tourist_data: dict, events: Iterable[GeofenceEvent], mark_track: bool = True):
+    """Publish transitions for risk zones to the tourist and police channels.
+    
+    With `mark_track` the compressed track around each one is kept through
+    `mark_alert`; callers that compress the alerting fixes themselves skip it.
+    """
+    for event in events:
+        if event.zone.zone_type != "risk":
+            continue
+        zone_data = {
+            "event": event.event,
+            "zone_id": event.zone.id,
+            "zone_name": event.zone.name,
+            "zone_type": event.zone.zone_type,
+            "timestamp": datetime.fromtimestamp(event.timestamp, tz=timezone.utc).isoformat()
+        }
+        
+        async def notify(alert, zone_data=zone_data):
+            await notification_service.send_geofence_alert(tourist_data, zone_data)
+        
+        # Keep the stored track around the transition, as for panic and anomaly alerts
+        if mark_track:
+            trajectory_compressor.mark_alert(event.tourist_id)
+        
+        # Queued behind panic and anomaly alerts; exits matter less than entries
+        try:
+            alert_dispatcher.submit(
+                tourist_data["id"], None, notify,
+                priority="medium" if event.event == "enter" else "low"
+            )
+        except AlertQueueFull:
+            break
+
+# Global geofence state tracker instance
+geofence_tracker = GeofenceStateTracker()
+geofence_engine.add_reload_listener(geofence_tracker.recheck_live)
@@ -0,0 +1,301 @@
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import math
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.geo import METERS_PER_DEGREE
+from ..core.redis import get_redis
+from ..models.alert import Alert
+
+logger = logging.getLogger(__name__)
+
+CELLS_KEY = "incident_heatmap:cells"
+META_KEY = "incident_heatmap:meta"
+LOCK_KEY = "incident_heatmap:lock"
+
+KERNEL_SIGMAS = 3.0  # kernel is truncated at this many bandwidths
+
+PRIORITY_WEIGHTS = {"low": 0.5, "medium": 1.0, "high": 2.0, "critical": 4.0}
+
+_ROW_SHIFT = 32
+_CHUNK = 5000
+
+class IncidentHeatmap:
+    """Sparse kernel density raster of historical alert locations.
+
+    Each alert adds a truncated Gaussian of its priority weight to the cells
+    around it. Weights are stored relative to `epoch` and grow by 2x every
+    `half_life_days`, so new alerts can be added without decaying existing
+    cells; `density` scales back to the present on read.
+
+    Workers share the raster through a Redis hash: increments are pushed with
+    HINCRBYFLOAT, and one worker at a time rebuilds the whole raster from the
+    `alerts` table every `rebuild_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        cell_m: float = settings.INCIDENT_HEATMAP_CELL_M,
+        bandwidth_m: float = settings.INCIDENT_HEATMAP_BANDWIDTH_M,
+        half_life_days: float = settings.INCIDENT_HEATMAP_HALF_LIFE_DAYS,
+        lookback_days: int = settings.INCIDENT_HEATMAP_LOOKBACK_DAYS,
+        refresh_interval: float = settings.INCIDENT_HEATMAP_REFRESH_INTERVAL,
+        rebuild_interval: float = settings.INCIDENT_HEATMAP_REBUILD_INTERVAL
+    ):
+        self.cell_deg = cell_m / METERS_PER_DEGREE
+        self.bandwidth_m = bandwidth_m
+        self.half_life_s = half_life_days * 86400
+        self.lookback_days = lookback_days
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+
+        self.epoch = time.time()
+        self.built_at = 0.0
+        self._cells: Dict[int, float] = {}
+        self._pending: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def cell(self, latitude: float, longitude: float) -> int:
+        row = int((latitude + 90.0) // self.cell_deg)
+        column = int((longitude + 180.0) // self.cell_deg)
+        return row << _ROW_SHIFT | column
+
+    def density(self, latitude: float, longitude: float, now: Optional[float] = None) -> float:
+        """Decayed incident density at a point, by one dict lookup"""
+        value = self._cells.get(self.cell(latitude, longitude), 0.0)
+        return value * self._decay(now)
+
+    def density_many(self, latitudes: np.ndarray, longitudes: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+        rows = ((np.asarray(latitudes, dtype=np.float64) + 90.0) // self.cell_deg).astype(np.int64)
+        columns = ((np.asarray(longitudes, dtype=np.float64) + 180.0) // self.cell_deg).astype(np.int64)
+        cells = self._cells
+        values = np.fromiter(
+            (cells.get(key, 0.0) for key in (rows << _ROW_SHIFT | columns).tolist()),
+            dtype=np.float64, count=len(rows)
+        )
+        return values * self._decay(now)
+
+    def add_alert(self, latitude: float, longitude: float, priority: Optional[str], created_at: Optional[float] = None):
+        """Fold a new alert into the raster; Redis catches up on the next refresh"""
+        created_at = time.time() if created_at is None else created_at
+        keys, values = self._kernel(
+            np.array([latitude]), np.array([longitude]),
+            np.array([self._weight(priority, created_at, self.epoch)])
+        )
+        with self._lock:
+            for key, value in zip(keys.tolist(), values.tolist()):
+                self._cells[key] = self._cells.get(key, 0.0) + value
+                self._pending[key] = self._pending.get(key, 0.0) + value
+
+    def build(self, alerts: Iterable[Tuple[float, float, Optional[str], float]], epoch: float) -> Dict[int, float]:
+        """Raster for (latitude, longitude, priority, created_at) rows, relative to `epoch`"""
+        totals: Dict[int, float] = {}
+        batch = []
+        for alert in alerts:
+            batch.append(alert)
+            if len(batch) >= _CHUNK:
+                self._accumulate(totals, batch, epoch)
+                batch = []
+        if batch:
+            self._accumulate(totals, batch, epoch)
+        return totals
+
+    def rebuild(self) -> Tuple[Dict[int, float], float]:
+        """Recompute the raster from the `alerts` table"""
+        epoch = time.time()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                func.ST_Y(Alert.location),
+                func.ST_X(Alert.location),
+                Alert.priority,
+                Alert.created_at
+            ).filter(
+                Alert.location.isnot(None),
+                Alert.created_at >= cutoff
+            ).execution_options(yield_per=_CHUNK)
+            cells = self.build(
+                ((latitude, longitude, priority, created_at.timestamp())
+                 for latitude, longitude, priority, created_at in rows),
+                epoch
+            )
+        finally:
+            db.close()
+        return cells, epoch
+
+    def stats(self) -> Dict:
+        return {
+            "cells": len(self._cells),
+            "pending_cells": len(self._pending),
+            "built_at": datetime.fromtimestamp(self.built_at, tz=timezone.utc).isoformat() if self.built_at else None
+        }
+
+    async def warm_up(self):
+        """Load the shared raster, building it first if no worker has yet"""
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Initial incident heatmap load failed, building locally")
+            try:
+                await self.rebuild_locally()
+            except Exception:
+                logger.exception("Local incident heatmap build failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self._flush()
+        except Exception:
+            logger.exception("Could not flush incident heatmap increments")
+
+    async def refresh(self):
+        """Push local increments, rebuild if due, then load the shared raster"""
+        await self._flush()
+
+        client = await get_redis()
+        meta = await client.hgetall(META_KEY)
+        built_at = float(meta.get("built_at", 0))
+        if time.time() - built_at >= self.rebuild_interval:
+            if await client.set(LOCK_KEY, 1, nx=True, ex=max(int(self.rebuild_interval), 60)):
+                cells, epoch = await asyncio.to_thread(self.rebuild)
+                await self._publish(client, cells, epoch)
+                meta = await client.hgetall(META_KEY)
+
+        if not meta:
+            return
+        raw = await client.hgetall(CELLS_KEY)
+        cells = {int(key): float(value) for key, value in raw.items()}
+        epoch = float(meta["epoch"])
+        with self._lock:
+            # Increments made since the flush are not in Redis yet
+            scale = 2.0 ** ((self.epoch - epoch) / self.half_life_s)
+            for key, value in self._pending.items():
+                cells[key] = cells.get(key, 0.0) + value * scale
+                self._pending[key] = value * scale
+            self._cells = cells
+            self.epoch = epoch
+            self.built_at = float(meta["built_at"])
+
+    async def rebuild_locally(self):
+        """Rebuild this worker's raster without Redis"""
+        cells, epoch = await asyncio.to_thread(self.rebuild)
+        with self._lock:
+            scale = 2.0 ** ((self.epoch - epoch) / self.half_life_s)
+            for key, value in self._pending.items():
+                cells[key] = cells.get(key, 0.0) + value * scale
+                self._pending[key] = value * scale
+            self._cells = cells
+            self.epoch = epoch
+            self.built_at = time.time()
+
+    async def _publish(self, client, cells: Dict[int, float], epoch: float):
+        staging = CELLS_KEY + ":next"
+        await client.delete(staging)
+        items = list(cells.items())
+        pipe = client.pipeline(transaction=False)
+        for start in range(0, len(items), _CHUNK):
+            pipe.hset(staging, mapping=dict(items[start:start + _CHUNK]))
+        await pipe.execute()
+
+        # Increments pushed while the rebuild ran are dropped; the next rebuild has them
+        pipe = client.pipeline(transaction=True)
+        if items:
+            pipe.rename(staging, CELLS_KEY)
+        else:
+            pipe.delete(CELLS_KEY)
+        pipe.hset(META_KEY, mapping={"epoch": epoch, "built_at": time.time()})
+        await pipe.execute()
+
+    async def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            epoch = self.epoch
+        if not pending:
+            return
+
+        client = await get_redis()
+        try:
+            stored_epoch = float(await client.hget(META_KEY, "epoch") or epoch)
+            # Re-express increments against the epoch the shared raster uses
+            scale = 2.0 ** ((epoch - stored_epoch) / self.half_life_s)
+            pipe = client.pipeline(transaction=False)
+            for key, value in pending.items():
+                pipe.hincrbyfloat(CELLS_KEY, key, value * scale)
+            await pipe.execute()
+        except Exception:
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] = self._pending.get(key, 0.0) + value
+            raise
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Incident heatmap refresh failed")
+                if time.time() - self.built_at >= self.rebuild_interval:
+                    try:
+                        await self.rebuild_locally()
+                    except Exception:
+                        logger.exception("Local incident heatmap build failed")
+
+    def _accumulate(self, totals: Dict[int, float], alerts, epoch: float):
+        latitudes, longitudes, priorities, created = zip(*alerts)
+        weights = np.array([
+            self._weight(priority, created_at, epoch) for priority, created_at in zip(priorities, created)
+        ])
+        keys, values = self._kernel(np.array(latitudes), np.array(longitudes), weights)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=values)
+        for key, value in zip(unique.tolist(), sums.tolist()):
+            totals[key] = totals.get(key, 0.0) + value
+
+    def _kernel(self, latitudes: np.ndarray, longitudes: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell keys and kernel contributions around each point, flattened"""
+        reach = int(math.ceil(KERNEL_SIGMAS * self.bandwidth_m / (self.cell_deg * METERS_PER_DEGREE)))
+        offsets = np.arange(-reach, reach + 1)
+        d_rows, d_columns = (grid.ravel() for grid in np.meshgrid(offsets, offsets, indexing="ij"))
+
+        rows = ((latitudes + 90.0) // self.cell_deg).astype(np.int64)[:, None] + d_rows
+        columns = ((longitudes + 180.0) // self.cell_deg).astype(np.int64)[:, None] + d_columns
+
+        # Distance from each point to the center of every cell in its stencil
+        center_latitudes = (rows + 0.5) * self.cell_deg - 90.0
+        center_longitudes = (columns + 0.5) * self.cell_deg - 180.0
+        dy = (center_latitudes - latitudes[:, None]) * METERS_PER_DEGREE
+        dx = (center_longitudes - longitudes[:, None]) * METERS_PER_DEGREE * np.cos(np.radians(latitudes))[:, None]
+        squared = (dx * dx + dy * dy) / (self.bandwidth_m * self.bandwidth_m)
+
+        inside = squared <= KERNEL_SIGMAS * KERNEL_SIGMAS
+        values = weights[:, None] * np.exp(-0.5 * squared)
+        return (rows << _ROW_SHIFT | columns)[inside], values[inside]
+
+    def _weight(self, priority: Optional[str], created_at: float, epoch: float) -> float:
+        return PRIORITY_WEIGHTS.get(priority or "medium", 1.0) * 2.0 ** ((created_at - epoch) / self.half_life_s)
+
+    def _decay(self, now: Optional[float]) -> float:
+        now = time.time() if now is None else now
+        return 2.0 ** ((self.epoch - now) / self.half_life_s)
+
+# Global incident heatmap instance
+incident_heatmap = IncidentHeatmap()
@@ -0,0 +1,243 @@
+from typing import Collection, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+from collections import Counter
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from ..core.config import settings
+from .geofence_service import GeofenceEngine, Zone, geofence_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOCUMENTS_PATH = Path(__file__).resolve().parent.parent / "data" / "safety_knowledge.json"
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Documents scoped to the tourist's zone or destination rank above general advice
+LOCAL_BOOST = 1.5
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are at be by can do for from how i if in is it me my of on or should the there "
+    "to what when where which who with you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 and token not in _STOPWORDS]
+
+class KnowledgeDocument(NamedTuple):
+    id: str
+    title: str
+    text: str
+    source: str  # "file" or "zone"
+    zones: FrozenSet[int] = frozenset()  # empty with no destinations means general advice
+    destinations: Tuple[str, ...] = ()
+    digest: str = ""
+
+    def is_local_to(self, zone_ids: Collection[int], destination: str) -> Optional[bool]:
+        """None for general documents, else whether the document applies here"""
+        if not self.zones and not self.destinations:
+            return None
+        return bool(self.zones.intersection(zone_ids)) or any(name in destination for name in self.destinations)
+
+def _document(source: str, id: str, title: str, text: str, zones: Iterable[int] = (), destinations: Iterable[str] = ()):
+    zones = frozenset(zones)
+    destinations = tuple(sorted(name.lower() for name in destinations))
+    digest = hashlib.sha1(json.dumps([title, text, sorted(zones), destinations]).encode()).hexdigest()
+    return KnowledgeDocument(id, title, text, source, zones, destinations, digest)
+
+def zone_document(zone: Zone) -> KnowledgeDocument:
+    advice = {
+        "safe": "It is considered a safe area.",
+        "moderate": "Take normal precautions here, especially after dark.",
+        "risk": "It is marked as a risk zone: avoid staying here, keep location sharing on and use the panic button if you feel unsafe."
+    }.get(zone.zone_type, "")
+    score = "" if zone.safety_score is None else f" Its safety score is {zone.safety_score:.1f} out of 10."
+    return _document(
+        "zone", f"zone:{zone.id}", zone.name,
+        f"You are in {zone.name}, a {zone.zone_type} zone.{score} {advice}".strip(),
+        zones=[zone.id]
+    )
+
+class KnowledgeBase:
+    """In-memory BM25 index over safety guidance and zone information.
+
+    Documents come from a JSON file and from the active safety zones. Each
+    document's postings are keyed by its content digest, so a rebuild only
+    re-tokenizes documents that were added or changed and drops removed
+    ones; BM25 needs no global renormalization when the corpus changes.
+    Rebuilds run in worker threads, so they and searches share a lock.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.KNOWLEDGE_BASE_PATH,
+        engine: GeofenceEngine = geofence_engine,
+        reload_interval: float = settings.KNOWLEDGE_BASE_RELOAD_INTERVAL,
+        min_score: float = settings.KNOWLEDGE_BASE_MIN_SCORE
+    ):
+        self.path = Path(path) if path else DEFAULT_DOCUMENTS_PATH
+        self.engine = engine
+        self.reload_interval = reload_interval
+        self.min_score = min_score
+        self._documents: Dict[str, KnowledgeDocument] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {document id: term frequency}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._file_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._stats = {"searches": 0, "reindexed_documents": 0}
+
+    def warm_up(self):
+        self.reload_file()
+        self.sync_zones(self.engine.zones)
+
+    async def on_zones_reloaded(self):
+        await asyncio.to_thread(self.sync_zones, self.engine.zones)
+
+    def needs_reload(self) -> bool:
+        return time.monotonic() - self._checked_at > self.reload_interval
+
+    def reload_file(self, force: bool = False) -> bool:
+        """Re-read the documents file if it changed since the last load.
+
+        A file that cannot be parsed is logged and skipped until it changes
+        again; the documents loaded before stay searchable.
+        """
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            logger.warning("Knowledge base file %s not found", self.path)
+            return False
+        if not force and mtime == self._file_mtime:
+            return False
+
+        self._file_mtime = mtime
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+            documents = [
+                _document(
+                    "file", entry["id"], entry["title"], entry["text"],
+                    entry.get("zones", ()), entry.get("destinations", ())
+                )
+                for entry in entries
+            ]
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.exception("Knowledge base file %s could not be loaded; keeping the current documents", self.path)
+            return False
+        self.sync("file", documents)
+        return True
+
+    def sync_zones(self, zones: Iterable[Zone]):
+        self.sync("zone", [zone_document(zone) for zone in zones])
+
+    def sync(self, source: str, documents: Iterable[KnowledgeDocument]) -> Tuple[int, int]:
+        """Make the documents of `source` exactly `documents`; returns (changed, removed)"""
+        with self._lock:
+            seen = set()
+            changed = 0
+            for document in documents:
+                seen.add(document.id)
+                if self.upsert(document):
+                    changed += 1
+
+            stale = [doc_id for doc_id, document in self._documents.items()
+                     if document.source == source and doc_id not in seen]
+            for doc_id in stale:
+                self.remove(doc_id)
+            return changed, len(stale)
+
+    def upsert(self, document: KnowledgeDocument) -> bool:
+        terms = Counter(tokenize(document.title) + tokenize(document.text))
+        with self._lock:
+            current = self._documents.get(document.id)
+            if current is not None and current.digest == document.digest:
+                return False
+            if current is not None:
+                self.remove(document.id)
+
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[document.id] = count
+            length = sum(terms.values())
+            self._lengths[document.id] = length
+            self._total_length += length
+            self._documents[document.id] = document
+            self._stats["reindexed_documents"] += 1
+            return True
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            document = self._documents.pop(doc_id, None)
+            if document is None:
+                return
+            for term in set(tokenize(document.title) + tokenize(document.text)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(doc_id)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 3,
+        zone_ids: Collection[int] = (),
+        destination: Optional[str] = None
+    ) -> List[Tuple[KnowledgeDocument, float]]:
+        """Best matching documents that are general or local to the given zones and destination.
+
+        The documents file is not re-read here: callers on the event loop run
+        `reload_file` in a thread when `needs_reload` says so.
+        """
+        self._stats["searches"] += 1
+        terms = set(tokenize(query))
+        destination = (destination or "").lower()
+
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = frequency + K1 * (1 - B + B * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (K1 + 1) / norm
+            documents = {doc_id: self._documents[doc_id] for doc_id in scores}
+
+        results = []
+        for doc_id, score in scores.items():
+            document = documents[doc_id]
+            local = document.is_local_to(zone_ids, destination)
+            if local is False:
+                continue
+            if local:
+                score *= LOCAL_BOOST
+            if score >= self.min_score:
+                results.append((document, score))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:limit]
+
+    def stats(self) -> Dict:
+        return {**self._stats, "documents": len(self._documents), "terms": len(self._postings)}
+
+# Global knowledge base instance
+knowledge_base = KnowledgeBase()
+geofence_engine.add_reload_listener(knowledge_base.on_zones_reloaded)
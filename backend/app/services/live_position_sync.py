@@ -0,0 +1,82 @@
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.live_positions import live_positions
+from .tourist_service import TouristService
+
+logger = logging.getLogger(__name__)
+
+class LivePositionSyncJob:
+    """Lazily copies live Redis positions into `tourists.current_location`"""
+
+    def __init__(
+        self,
+        interval: float = settings.LIVE_POSITION_SYNC_INTERVAL,
+        batch_size: int = settings.LIVE_POSITION_SYNC_BATCH_SIZE
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the loop and push whatever is still dirty"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sync_once()
+
+    async def sync_once(self) -> int:
+        await live_positions.prune()
+
+        synced = 0
+        while True:
+            tourist_ids = await live_positions.pop_dirty(self.batch_size)
+            if not tourist_ids:
+                break
+
+            positions = await live_positions.get_many(tourist_ids)
+            try:
+                await asyncio.to_thread(self._write, {
+                    tourist_id: (position["latitude"], position["longitude"])
+                    for tourist_id, position in positions.items()
+                })
+            except Exception:
+                # Leave them dirty so the next cycle retries
+                await live_positions.mark_dirty(tourist_ids)
+                raise
+            synced += len(positions)
+
+            if len(tourist_ids) < self.batch_size:
+                break
+        return synced
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync_once()
+            except Exception:
+                logger.exception("Live position sync failed")
+
+    def _write(self, positions: Dict[int, Tuple[float, float]]):
+        db = SessionLocal()
+        try:
+            TouristService(db).sync_current_locations(positions)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Global live position sync job instance
+live_position_sync_job = LivePositionSyncJob()
@@ -0,0 +1,216 @@
+from typing import Dict, List, Optional, Sequence
+from collections import deque
+from dataclasses import dataclass
+import asyncio
+import logging
+import time
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..schemas.location import LocationCreate
+from .tourist_service import TouristService, location_row
+
+logger = logging.getLogger(__name__)
+
+class LocationBufferFull(Exception):
+    """Raised when the buffer has no room for a batch within the put timeout"""
+
+@dataclass
+class _PendingRow:
+    row: dict
+    enqueued_at: float
+    attempts: int = 0  # failed flushes this row was part of
+
+class LocationWriteBuffer:
+    """In-process write-behind buffer for location fixes.
+
+    Fixes are acknowledged as soon as they are queued and written to the
+    `locations` table in bulk, either every `flush_interval` seconds or as
+    soon as `batch_size` rows are waiting. The queue holds at most `max_size`
+    rows; producers wait up to `put_timeout` for room and are then rejected.
+    A failed chunk is retried one tourist at a time, and a tourist's rows
+    that fail `max_attempts` flushes in a row are dropped and logged, so one
+    bad row can neither hold up nor take down anyone else's fixes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.LOCATION_BUFFER_MAX_SIZE,
+        batch_size: int = settings.LOCATION_BUFFER_BATCH_SIZE,
+        flush_interval: float = settings.LOCATION_BUFFER_FLUSH_INTERVAL,
+        put_timeout: float = settings.LOCATION_BUFFER_PUT_TIMEOUT,
+        max_attempts: int = settings.LOCATION_BUFFER_MAX_ATTEMPTS
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+
+        self._pending: deque = deque()
+        self._space = asyncio.Condition()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "dropped": 0,
+            "lost_at_shutdown": 0,
+            "last_flush_size": 0,
+            "max_flush_size": 0,
+            "last_flush_seconds": 0.0,
+            "last_flush_lag_seconds": 0.0,
+            "max_flush_lag_seconds": 0.0
+        }
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still queued"""
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        # Each failed flush uses up an attempt, so this ends with a write or a drop
+        for _ in range(self.max_attempts):
+            await self.flush()
+            if not self._pending:
+                return
+        self._stats["lost_at_shutdown"] += len(self._pending)
+        logger.error("Location buffer stopped with %d rows unwritten; they are lost", len(self._pending))
+
+    async def submit(self, tourist_id: int, fixes: Sequence[LocationCreate]) -> int:
+        """Queue fixes for a tourist; all of them are accepted or none are"""
+        if len(fixes) > self.max_size:
+            raise ValueError("Batch is larger than the location buffer")
+
+        now = time.monotonic()
+        rows = [_PendingRow(location_row(tourist_id, fix), now) for fix in fixes]
+
+        async with self._space:
+            try:
+                await asyncio.wait_for(
+                    self._space.wait_for(
+                        lambda: len(self._pending) + len(rows) <= self.max_size
+                    ),
+                    timeout=self.put_timeout
+                )
+            except asyncio.TimeoutError:
+                self._stats["rejected"] += len(rows)
+                raise LocationBufferFull()
+
+            self._pending.extend(rows)
+            self._stats["accepted"] += len(rows)
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return len(rows)
+
+    async def flush(self):
+        """Write every queued row to the database in `batch_size` chunks"""
+        async with self._flush_lock:
+            while self._pending:
+                async with self._space:
+                    count = min(self.batch_size, len(self._pending))
+                    batch = [self._pending.popleft() for _ in range(count)]
+                    self._space.notify_all()
+
+                started = time.monotonic()
+                failed = await self._write_batch(batch)
+                if failed:
+                    self._stats["failed_flushes"] += 1
+                    self._stats["flushed"] += count - sum(len(group) for group in failed)
+                    retry = []
+                    for group in failed:
+                        attempts = max(item.attempts for item in group) + 1
+                        if attempts >= self.max_attempts:
+                            self._stats["dropped"] += len(group)
+                            logger.error(
+                                "Dropping %d location rows for tourist %s after %d failed flushes",
+                                len(group), group[0].row["tourist_id"], attempts
+                            )
+                            continue
+                        for item in group:
+                            item.attempts = attempts
+                        retry.extend(group)
+                    if not retry:
+                        continue
+                    # Put the failing rows back in front and retry on the next tick
+                    async with self._space:
+                        self._pending.extendleft(reversed(retry))
+                    return
+
+                finished = time.monotonic()
+                lag = finished - batch[0].enqueued_at
+                self._stats["flushes"] += 1
+                self._stats["flushed"] += count
+                self._stats["last_flush_size"] = count
+                self._stats["max_flush_size"] = max(self._stats["max_flush_size"], count)
+                self._stats["last_flush_seconds"] = round(finished - started, 4)
+                self._stats["last_flush_lag_seconds"] = round(lag, 4)
+                self._stats["max_flush_lag_seconds"] = round(
+                    max(self._stats["max_flush_lag_seconds"], lag), 4
+                )
+
+    def stats(self) -> Dict:
+        return {**self._stats, "pending": len(self._pending), "capacity": self.max_size}
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _write_batch(self, batch: List[_PendingRow]) -> List[List[_PendingRow]]:
+        """Write a chunk; if it fails, write each tourist's rows on their own.
+
+        Returns the per-tourist groups that still failed, so one bad row only
+        holds back the fixes of its own tourist.
+        """
+        try:
+            await asyncio.to_thread(self._write, [item.row for item in batch])
+            return []
+        except Exception:
+            logger.exception("Location buffer flush of %d rows failed", len(batch))
+
+        groups: Dict[int, List[_PendingRow]] = {}
+        for item in batch:
+            groups.setdefault(item.row["tourist_id"], []).append(item)
+        if len(groups) == 1:
+            return list(groups.values())
+
+        failed = []
+        for tourist_id, group in groups.items():
+            try:
+                await asyncio.to_thread(self._write, [item.row for item in group])
+            except Exception as e:
+                logger.warning("Location rows for tourist %s failed on their own: %s", tourist_id, e)
+                failed.append(group)
+        return failed
+
+    def _write(self, rows: List[dict]):
+        db = SessionLocal()
+        try:
+            TouristService(db).store_location_rows(
+                rows, move_current_location=not settings.LIVE_POSITIONS_ENABLED
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Global location buffer instance
+location_buffer = LocationWriteBuffer()
@@ -0,0 +1,186 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import logging
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "locations_default"
+# Arbitrary key so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_KEY = 727310001
+
+_PARTITION_NAME = re.compile(r"^locations_[a-z0-9_]+$")
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+class LocationMaintenanceService:
+    """Rolls the daily `locations` partitions forward and retires expired ones"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def is_partitioned(self) -> bool:
+        return bool(self.db.execute(text(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('locations')"
+        )).scalar())
+
+    def list_partitions(self) -> List[Tuple[str, Optional[datetime]]]:
+        """Partition names with their exclusive upper bound (None for the default partition)"""
+        rows = self.db.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'locations'::regclass
+        """)).all()
+
+        partitions = []
+        for name, bound in rows:
+            match = _UPPER_BOUND.search(bound)
+            partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+        return partitions
+
+    def ensure_partitions(self, today: date, days_ahead: int) -> List[str]:
+        """Create daily partitions up to `today + days_ahead`"""
+        partitions = self.list_partitions()
+        has_default = any(name == DEFAULT_PARTITION for name, _ in partitions)
+        covered_until = max((upper for _, upper in partitions if upper), default=None)
+
+        created = []
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            lower, upper = _day_start(day), _day_start(day + timedelta(days=1))
+            if covered_until and lower < covered_until:
+                continue
+
+            name = f"locations_p{day:%Y%m%d}"
+            self.db.execute(text(
+                f"CREATE TABLE {name} (LIKE locations INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            if has_default:
+                # Rows that landed in the default partition for this day must move first
+                self.db.execute(text(f"""
+                    WITH moved AS (
+                        DELETE FROM {DEFAULT_PARTITION}
+                        WHERE "timestamp" >= :lower AND "timestamp" < :upper
+                        RETURNING *
+                    )
+                    INSERT INTO {name} SELECT * FROM moved
+                """), {"lower": lower, "upper": upper})
+            self.db.execute(text(
+                f"ALTER TABLE locations ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            created.append(name)
+        return created
+
+    def downsample(self, source: str, bucket_seconds: int, before: Optional[datetime] = None) -> int:
+        """Fold raw fixes from `source` into one trajectory point per tourist and bucket"""
+        if not _PARTITION_NAME.match(source):
+            raise ValueError(f"Unexpected partition name: {source}")
+
+        result = self.db.execute(text(f"""
+            INSERT INTO location_trajectories (
+                tourist_id, bucket_start, bucket_seconds, latitude, longitude,
+                location, point_count, first_timestamp, last_timestamp
+            )
+            SELECT
+                tourist_id,
+                to_timestamp(floor(extract(epoch FROM "timestamp") / :bucket) * :bucket) AS bucket_start,
+                :bucket,
+                avg(latitude),
+                avg(longitude),
+                ST_Point(avg(longitude), avg(latitude)),
+                count(*),
+                min("timestamp"),
+                max("timestamp")
+            FROM {source}
+            WHERE tourist_id IS NOT NULL
+              AND (CAST(:before AS timestamptz) IS NULL OR "timestamp" < :before)
+            GROUP BY tourist_id, bucket_start
+            ON CONFLICT (tourist_id, bucket_start) DO NOTHING
+        """), {"bucket": bucket_seconds, "before": before})
+        return result.rowcount
+
+    def drop_expired_partitions(self, horizon: datetime, bucket_seconds: int) -> List[str]:
+        """Downsample and drop every partition that ends before `horizon`"""
+        dropped = []
+        for name, upper in self.list_partitions():
+            if name == DEFAULT_PARTITION:
+                # The default partition only holds stragglers, so plain DELETE is cheap
+                self.downsample(name, bucket_seconds, before=horizon)
+                self.db.execute(
+                    text(f'DELETE FROM {name} WHERE "timestamp" < :horizon'),
+                    {"horizon": horizon}
+                )
+            elif upper and upper <= horizon:
+                self.downsample(name, bucket_seconds)
+                self.db.execute(text(f"ALTER TABLE locations DETACH PARTITION {name}"))
+                self.db.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        return dropped
+
+    def run(self, now: Optional[datetime] = None) -> Dict:
+        now = now or datetime.now(timezone.utc)
+        if not self.is_partitioned():
+            return {"skipped": "locations is not partitioned"}
+
+        locked = self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            return {"skipped": "maintenance already running"}
+
+        created = self.ensure_partitions(now.date(), settings.LOCATION_PARTITION_PREMAKE_DAYS)
+        horizon = _day_start(now.date() - timedelta(days=settings.LOCATION_RETENTION_DAYS))
+        dropped = self.drop_expired_partitions(horizon, settings.LOCATION_TRAJECTORY_BUCKET_SECONDS)
+        self.db.commit()
+        return {"created": created, "dropped": dropped}
+
+class LocationMaintenanceJob:
+    """Runs `LocationMaintenanceService` periodically in a worker thread"""
+
+    def __init__(self, interval: float = settings.LOCATION_MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                result = await asyncio.to_thread(self.run_once)
+                logger.info("Location maintenance: %s", result)
+            except Exception:
+                logger.exception("Location maintenance failed")
+            await asyncio.sleep(self.interval)
+
+    def run_once(self) -> Dict:
+        db = SessionLocal()
+        try:
+            return LocationMaintenanceService(db).run()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Global location maintenance job instance
+location_maintenance_job = LocationMaintenanceJob()
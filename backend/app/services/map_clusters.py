@@ -0,0 +1,226 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import math
+import time
+import numpy as np
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.live_positions import live_positions
+from ..core.redis import get_redis
+from .alert_events import PRIORITY_RANKS
+from .proximity_service import ProximityService
+
+TILE_KEY = "map_clusters:{}:{}:{}"
+
+# Morton codes interleave this many bits per axis; deeper zooms share the deepest cells
+CODE_BITS = 24
+MAX_ZOOM = CODE_BITS - 2
+CELL_LEVELS = 2  # each tile is split into 4 x 4 cluster cells, 64 px on a 256 px tile
+MAX_LATITUDE = 85.05112878  # Web Mercator limit
+
+TOURIST = 0
+ALERT = 1
+KINDS = ("tourist", "alert")
+NO_PRIORITY = len(PRIORITY_RANKS)
+PRIORITIES = tuple(sorted(PRIORITY_RANKS, key=PRIORITY_RANKS.get))
+
+_SPREAD_STEPS = tuple(
+    (np.uint64(shift), np.uint64(mask)) for shift, mask in (
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555)
+    )
+)
+
+def _spread(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    for shift, mask in _SPREAD_STEPS:
+        values = (values | (values << shift)) & mask
+    return values
+
+def morton(columns: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    return _spread(columns) | (_spread(rows) << np.uint64(1))
+
+def mercator(latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Web Mercator world coordinates in [0, 1), y growing southwards"""
+    phi = np.radians(np.clip(latitudes, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0
+    y = 0.5 - np.log(np.tan(np.pi / 4 + phi / 2)) / (2 * np.pi)
+    return np.clip(x, 0.0, np.nextafter(1.0, 0)), np.clip(y, 0.0, np.nextafter(1.0, 0))
+
+def _unmercator(x: float, y: float) -> Tuple[float, float]:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))), x * 360.0 - 180.0
+
+def tile_range(
+    min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float, zoom: int
+) -> Tuple[range, range]:
+    """Columns and rows of the tiles covering a viewport"""
+    (x0, x1), (y1, y0) = mercator(np.array([min_latitude, max_latitude]), np.array([min_longitude, max_longitude]))
+    scale = 1 << zoom
+    return range(int(x0 * scale), int(x1 * scale) + 1), range(int(y0 * scale), int(y1 * scale) + 1)
+
+class PointIndex(NamedTuple):
+    """Live tourists and active alerts sorted by Morton code.
+
+    Every quadtree tile, and every cell inside it, is a contiguous slice.
+    """
+    codes: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    kinds: np.ndarray
+    priorities: np.ndarray  # rank into PRIORITIES, NO_PRIORITY for tourists
+    ids: np.ndarray
+
+    @classmethod
+    def build(cls, tourists: List[Tuple[int, float, float]], alerts: List[Tuple[int, Optional[str], float, float]]):
+        ids = np.array([row[0] for row in tourists] + [row[0] for row in alerts], dtype=np.int64)
+        latitudes = np.array([row[1] for row in tourists] + [row[2] for row in alerts], dtype=np.float64)
+        longitudes = np.array([row[2] for row in tourists] + [row[3] for row in alerts], dtype=np.float64)
+        kinds = np.concatenate([np.full(len(tourists), TOURIST, np.int8), np.full(len(alerts), ALERT, np.int8)])
+        priorities = np.array(
+            [NO_PRIORITY] * len(tourists)
+            + [PRIORITY_RANKS.get(priority, PRIORITY_RANKS["medium"]) for _, priority, _, _ in alerts],
+            dtype=np.int8
+        )
+
+        x, y = mercator(latitudes, longitudes)
+        scale = float(1 << CODE_BITS)
+        codes = morton((x * scale).astype(np.uint64), (y * scale).astype(np.uint64))
+        order = np.argsort(codes, kind="stable")
+        return cls(codes[order], x[order], y[order], kinds[order], priorities[order], ids[order])
+
+    def clusters(self, zoom: int, column: int, row: int) -> List[Dict]:
+        """Clusters of one tile, one per non-empty cell"""
+        tile_shift = np.uint64(2 * (CODE_BITS - zoom))
+        start_code = morton(np.array([column]), np.array([row]))[0] << tile_shift
+        end_code = start_code + (np.uint64(1) << tile_shift)
+        start, end = np.searchsorted(self.codes, [start_code, end_code])
+        if start == end:
+            return []
+
+        cell_shift = np.uint64(2 * (CODE_BITS - min(zoom + CELL_LEVELS, CODE_BITS)))
+        cells = self.codes[start:end] >> cell_shift
+        starts = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1])))
+        counts = np.diff(np.append(starts, len(cells)))
+
+        section = slice(start, end)
+        x_means = np.add.reduceat(self.x[section], starts) / counts
+        y_means = np.add.reduceat(self.y[section], starts) / counts
+        alert_counts = np.add.reduceat(self.kinds[section].astype(np.int64), starts)
+        worst = np.minimum.reduceat(self.priorities[section], starts)
+
+        clusters = []
+        for i, (count, alerts) in enumerate(zip(counts.tolist(), alert_counts.tolist())):
+            latitude, longitude = _unmercator(float(x_means[i]), float(y_means[i]))
+            cluster = {
+                "latitude": round(latitude, 6),
+                "longitude": round(longitude, 6),
+                "count": count,
+                "tourists": count - alerts,
+                "alerts": alerts,
+                "worst_priority": PRIORITIES[worst[i]] if worst[i] != NO_PRIORITY else None
+            }
+            if count == 1:
+                first = start + starts[i]
+                cluster["kind"] = KINDS[self.kinds[first]]
+                cluster["id"] = int(self.ids[first])
+            clusters.append(cluster)
+        return clusters
+
+class MapClusterService:
+    """Viewport clustering of live tourists and active alerts.
+
+    Points are held in a Morton-ordered quadtree index rebuilt at most every
+    `snapshot_ttl` seconds, so any tile at any zoom is two binary searches
+    and a few reductions. Finished tiles are cached in Redis for `tile_ttl`
+    seconds, letting every dashboard and worker looking at the same area
+    share them; the index is only built on a worker that misses the cache.
+    """
+
+    def __init__(
+        self,
+        snapshot_ttl: float = settings.MAP_CLUSTER_SNAPSHOT_TTL,
+        tile_ttl: int = settings.MAP_CLUSTER_TILE_TTL,
+        max_tiles: int = settings.MAP_CLUSTER_MAX_TILES
+    ):
+        self.snapshot_ttl = snapshot_ttl
+        self.tile_ttl = tile_ttl
+        self.max_tiles = max_tiles
+        self._index: Optional[PointIndex] = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {"tile_hits": 0, "tile_misses": 0, "index_builds": 0}
+
+    async def clusters(
+        self, min_latitude: float, min_longitude: float, max_latitude: float, max_longitude: float, zoom: int
+    ) -> List[Dict]:
+        """Clusters inside a viewport; raises ValueError if it spans more than `max_tiles` tiles"""
+        columns, rows = tile_range(min_latitude, min_longitude, max_latitude, max_longitude, zoom)
+        # Counted before enumerating: a world viewport at high zoom is trillions of tiles
+        tile_count = len(columns) * len(rows)
+        if tile_count > self.max_tiles:
+            raise ValueError(f"Viewport covers {tile_count} tiles at zoom {zoom}, at most {self.max_tiles} allowed")
+        tiles = [(column, row) for column in columns for row in rows]
+
+        client = await get_redis()
+        keys = [TILE_KEY.format(zoom, column, row) for column, row in tiles]
+        cached = await client.mget(keys)
+
+        missing = [(tile, key) for tile, key, value in zip(tiles, keys, cached) if value is None]
+        self._stats["tile_hits"] += len(tiles) - len(missing)
+        self._stats["tile_misses"] += len(missing)
+
+        computed = {}
+        if missing:
+            index = await self._current_index()
+            pipe = client.pipeline(transaction=False)
+            for (column, row), key in missing:
+                computed[key] = index.clusters(zoom, column, row)
+                pipe.set(key, json.dumps(computed[key]), ex=self.tile_ttl)
+            await pipe.execute()
+
+        clusters = []
+        for key, value in zip(keys, cached):
+            clusters.extend(computed[key] if value is None else json.loads(value))
+        return [
+            cluster for cluster in clusters
+            if min_latitude <= cluster["latitude"] <= max_latitude
+            and min_longitude <= cluster["longitude"] <= max_longitude
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "indexed_points": len(self._index.codes) if self._index is not None else 0
+        }
+
+    async def _current_index(self) -> PointIndex:
+        async with self._lock:
+            if self._index is None or time.monotonic() - self._built_at > self.snapshot_ttl:
+                if settings.LIVE_POSITIONS_ENABLED:
+                    positions = await live_positions.snapshot()
+                    tourists = [(p["tourist_id"], p["latitude"], p["longitude"]) for p in positions]
+                    alerts = await asyncio.to_thread(self._load, False)
+                else:
+                    tourists, alerts = await asyncio.to_thread(self._load, True)
+                self._index = await asyncio.to_thread(PointIndex.build, tourists, alerts)
+                self._built_at = time.monotonic()
+                self._stats["index_builds"] += 1
+            return self._index
+
+    def _load(self, with_tourists: bool):
+        db = SessionLocal()
+        try:
+            proximity_service = ProximityService(db)
+            alerts = proximity_service.get_active_alert_points()
+            if with_tourists:
+                return proximity_service.get_tourist_points(), alerts
+            return alerts
+        finally:
+            db.close()
+
+# Global map cluster service instance
+map_cluster_service = MapClusterService()
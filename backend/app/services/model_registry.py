@@ -0,0 +1,194 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+import asyncio
+import logging
+import threading
+import time
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def load_joblib(path: str):
+    """Load a scikit-learn model with its arrays memory-mapped read-only.
+
+    Workers mapping the same uncompressed file share its pages through the
+    OS page cache instead of each holding a private copy.
+    """
+    import joblib
+    return joblib.load(path, mmap_mode="r")
+
+class ModelSpec(NamedTuple):
+    loader: Callable[[], Any]
+    predict: Callable[[Any, List[Any]], Sequence[Any]]  # (model, inputs) -> one output per input
+    warmup: bool = False
+    warmup_input: Optional[List[Any]] = None
+
+class MicroBatcher:
+    """Groups concurrent inference calls into batches.
+
+    A batch is dispatched once `max_batch_size` inputs are waiting or
+    `max_wait` seconds after its first input arrived, whichever comes first.
+    The batch function runs in a worker thread; calls arriving meanwhile
+    queue up and form the next batch.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = settings.MODEL_BATCH_MAX_SIZE,
+        max_wait: float = settings.MODEL_BATCH_MAX_WAIT_MS / 1000
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"requests": 0, "batches": 0, "max_batch_size": 0, "failed_batches": 0}
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+    async def submit(self, item: Any) -> Any:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        self._stats["requests"] += 1
+        return await future
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "average_batch_size": round(self._stats["requests"] / self._stats["batches"], 2) if self._stats["batches"] else None,
+            "queued": self._queue.qsize() if self._queue else 0
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._stats["batches"] += 1
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            try:
+                outputs = await asyncio.to_thread(self.predict_batch, [item for item, _ in batch])
+                if len(outputs) != len(batch):
+                    # Outputs cannot be matched to inputs, so no caller gets one
+                    raise RuntimeError(f"Model returned {len(outputs)} outputs for {len(batch)} inputs")
+            except Exception as e:
+                self._stats["failed_batches"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+class ModelRegistry:
+    """Named models loaded on first use or during startup warmup.
+
+    Nothing heavy is imported until a model is actually loaded, so workers
+    that never touch a model never pay for its framework or weights.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, ModelSpec] = {}
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._load_seconds: Dict[str, float] = {}
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        predict: Callable[[Any, List[Any]], Sequence[Any]],
+        warmup: bool = False,
+        warmup_input: Optional[List[Any]] = None
+    ):
+        self._specs[name] = ModelSpec(loader, predict, warmup, warmup_input)
+        self._locks[name] = threading.Lock()
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._specs
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                started = time.monotonic()
+                model = self._specs[name].loader()
+                self._load_seconds[name] = round(time.monotonic() - started, 3)
+                self._models[name] = model
+                logger.info("Loaded model %s in %.3fs", name, self._load_seconds[name])
+        return model
+
+    def predict(self, name: str, inputs: List[Any]) -> Sequence[Any]:
+        return self._specs[name].predict(self.get(name), inputs)
+
+    def batcher(self, name: str) -> MicroBatcher:
+        batcher = self._batchers.get(name)
+        if batcher is None:
+            batcher = self._batchers[name] = MicroBatcher(lambda inputs: self.predict(name, inputs))
+        return batcher
+
+    async def warm_up(self):
+        """Load models marked for warmup and run one inference through each"""
+        for name, spec in self._specs.items():
+            if not spec.warmup:
+                continue
+            try:
+                await asyncio.to_thread(self.get, name)
+                if spec.warmup_input is not None:
+                    await asyncio.to_thread(self.predict, name, spec.warmup_input)
+            except Exception:
+                logger.exception("Warmup of model %s failed; it will load on first use", name)
+
+    async def stop(self):
+        for batcher in self._batchers.values():
+            await batcher.stop()
+
+    def stats(self) -> Dict:
+        return {
+            name: {
+                "loaded": name in self._models,
+                "load_seconds": self._load_seconds.get(name),
+                "batching": self._batchers[name].stats() if name in self._batchers else None
+            }
+            for name in self._specs
+        }
+
+# Global model registry instance
+model_registry = ModelRegistry()
@@ -47,9 +47,20 @@ class NotificationService:
         await self.send_websocket_notification("tourist_alerts", notification)
         await self.send_websocket_notification("police_alerts", notification)
     
+    async def send_anomaly_alert(self, tourist_data: dict, alert_data: dict):
+        """Send behavioral anomaly alert"""
+        notification = {
+            "type": "anomaly_alert",
+            "tourist": tourist_data,
+            "alert": alert_data,
+            "timestamp": alert_data.get("created_at")
+        }
+        
+        await self.send_websocket_notification("police_alerts", notification)
+    
     async def send_safety_score_alert(self, tourist_data: dict, score: float):
         """Send low safety score alert"""
-        if score < 5.0:  # Threshold for alerts
+        if score < settings.SAFETY_SCORE_ALERT_THRESHOLD:
             notification = {
                 "type": "safety_score_alert",
                 "tourist": tourist_data,
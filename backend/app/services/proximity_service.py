@@ -0,0 +1,152 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from ..models.alert import Alert
+from ..models.user import Tourist, User
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def _geography(column):
+    # Must match the expression indexes in migration 9b4e2c7d1a05
+    return func.geography(column)
+
+class ProximityService:
+    """Index-backed spatial queries over alerts and tourist positions.
+
+    Distances are in meters on the geography type; viewport filters use the
+    planar GiST index through `ST_Intersects`.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_tourists_near_alert(self, alert_id: int, radius_m: float, limit: int = 100) -> Optional[List[dict]]:
+        """Tourists whose current location is within `radius_m` of an alert, nearest first"""
+        alert_location = self.db.query(Alert.location).filter(Alert.id == alert_id)
+        if not self.db.query(alert_location.filter(Alert.location.isnot(None)).exists()).scalar():
+            return None
+
+        # Evaluated once as an init plan, so the tourist index scan sees a constant
+        origin = _geography(alert_location.scalar_subquery())
+        distance = func.ST_Distance(_geography(Tourist.current_location), origin)
+        rows = self.db.query(
+            Tourist.id,
+            Tourist.digital_id,
+            User.name,
+            func.ST_Y(Tourist.current_location).label("latitude"),
+            func.ST_X(Tourist.current_location).label("longitude"),
+            distance.label("distance_m")
+        ).join(User, Tourist.user_id == User.id).filter(
+            func.ST_DWithin(_geography(Tourist.current_location), origin, radius_m)
+        ).order_by(distance).limit(limit).all()
+
+        return [
+            {
+                "tourist_id": row.id,
+                "digital_id": row.digital_id,
+                "name": row.name,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "distance_m": round(row.distance_m, 1)
+            }
+            for row in rows
+        ]
+
+    def get_alert_point(self, alert_id: int) -> Optional[Tuple[float, float]]:
+        """(latitude, longitude) of an alert, or None if it is missing or has no location"""
+        row = self.db.query(
+            func.ST_Y(Alert.location),
+            func.ST_X(Alert.location)
+        ).filter(Alert.id == alert_id, Alert.location.isnot(None)).first()
+        return (row[0], row[1]) if row else None
+
+    def get_tourist_identities(self, tourist_ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+        """(digital_id, name) of each tourist, by id"""
+        tourist_ids = list(tourist_ids)
+        if not tourist_ids:
+            return {}
+        rows = self.db.query(Tourist.id, Tourist.digital_id, User.name).join(
+            User, Tourist.user_id == User.id
+        ).filter(Tourist.id.in_(tourist_ids)).all()
+        return {row.id: (row.digital_id, row.name) for row in rows}
+
+    def get_alerts_in_box(
+        self,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        status: Optional[str] = None,
+        limit: int = 500
+    ) -> List[dict]:
+        """Alerts located inside a map viewport, newest first"""
+        envelope = func.ST_MakeEnvelope(min_longitude, min_latitude, max_longitude, max_latitude)
+        query = self._alert_query().filter(func.ST_Intersects(Alert.location, envelope))
+        if status:
+            query = query.filter(Alert.status == status)
+
+        rows = query.order_by(Alert.created_at.desc()).limit(limit).all()
+        return [self._alert_row(row) for row in rows]
+
+    def get_nearest_active_alerts(self, latitude: float, longitude: float, k: int = 10) -> List[dict]:
+        """The `k` nearest active alerts to a point, using a KNN index scan"""
+        origin = _geography(func.ST_Point(longitude, latitude))
+        rows = self._alert_query(
+            func.ST_Distance(_geography(Alert.location), origin).label("distance_m")
+        ).filter(
+            Alert.status == "active",
+            Alert.location.isnot(None)
+        ).order_by(_geography(Alert.location).op("<->")(origin)).limit(k).all()
+
+        return [
+            {**self._alert_row(row), "distance_m": round(row.distance_m, 1)}
+            for row in rows
+        ]
+
+    def get_active_alert_points(self) -> List[tuple]:
+        """(id, priority, latitude, longitude) of every located active alert, for map clustering"""
+        return self.db.query(
+            Alert.id,
+            Alert.priority,
+            func.ST_Y(Alert.location),
+            func.ST_X(Alert.location)
+        ).filter(
+            Alert.status == "active",
+            Alert.location.isnot(None)
+        ).all()
+
+    def get_tourist_points(self) -> List[tuple]:
+        """(id, latitude, longitude) of every tourist with a stored location"""
+        return self.db.query(
+            Tourist.id,
+            func.ST_Y(Tourist.current_location),
+            func.ST_X(Tourist.current_location)
+        ).filter(Tourist.current_location.isnot(None)).all()
+
+    def _alert_query(self, *extra_columns):
+        return self.db.query(
+            Alert.id,
+            Alert.tourist_id,
+            Alert.type,
+            Alert.priority,
+            Alert.status,
+            Alert.message,
+            Alert.address,
+            Alert.created_at,
+            func.ST_Y(Alert.location).label("latitude"),
+            func.ST_X(Alert.location).label("longitude"),
+            *extra_columns
+        )
+
+    @staticmethod
+    def _alert_row(row) -> dict:
+        return {
+            "id": row.id,
+            "tourist_id": row.tourist_id,
+            "type": row.type,
+            "priority": row.priority,
+            "status": row.status,
+            "message": row.message,
+            "address": row.address,
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "created_at": row.created_at.isoformat() if row.created_at else None
+        }
\ No newline at end of file
@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import uuid
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.live_positions import live_positions
+from ..core.redis import get_redis
+from .ai_service import AIService, ai_service
+from .notification_service import notification_service
+from .tourist_service import TouristService
+
+logger = logging.getLogger(__name__)
+
+SCORE_KEY = "safety_score:{}"
+LOCK_KEY = "safety_scores:lock"
+
+# Only the worker that took the lock may extend or release it
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Held until the interval is over, so other workers do not start an early cycle
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if tonumber(ARGV[2]) > 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+else
+    redis.call('DEL', KEYS[1])
+end
+return 1
+"""
+
+def crossed_threshold(old: Optional[float], new: float, threshold: float = settings.SAFETY_SCORE_ALERT_THRESHOLD) -> bool:
+    """Whether a score change takes a tourist from at or above the alert threshold to below it"""
+    return new < threshold and (old is None or old >= threshold)
+
+class SafetyScoreScheduler:
+    """Recomputes safety scores for every tourist on an active trip.
+
+    Each cycle one worker scores tourists in batches of `batch_size`, under a
+    Redis lock it renews for `lock_ttl` seconds after every batch, at their live or last stored position and the current
+    time, writes changed scores with one UPDATE per batch and alerts only
+    on downward threshold crossings. Every score is also cached in Redis,
+    which is what location updates read instead of scoring each fix.
+    """
+
+    def __init__(
+        self,
+        service: AIService = ai_service,
+        interval: float = settings.SAFETY_SCORE_RECOMPUTE_INTERVAL,
+        batch_size: int = settings.SAFETY_SCORE_BATCH_SIZE,
+        cache_ttl: int = settings.SAFETY_SCORE_CACHE_TTL,
+        lock_ttl: float = settings.SAFETY_SCORE_LOCK_TTL
+    ):
+        self.service = service
+        self.interval = interval
+        self.batch_size = batch_size
+        self.cache_ttl = cache_ttl
+        self.lock_ttl = lock_ttl
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"runs": 0, "scored": 0, "changed": 0, "alerts": 0, "last_duration_s": None}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def cached_score(self, tourist_id: int) -> Optional[float]:
+        client = await get_redis()
+        score = await client.get(SCORE_KEY.format(tourist_id))
+        return None if score is None else float(score)
+
+    async def cache_scores(self, scores: Dict[int, float]):
+        if not scores:
+            return
+        client = await get_redis()
+        pipe = client.pipeline(transaction=False)
+        for tourist_id, score in scores.items():
+            pipe.set(SCORE_KEY.format(tourist_id), score, ex=self.cache_ttl)
+        await pipe.execute()
+
+    async def recompute_once(self) -> int:
+        """Score every tourist on an active trip; returns how many were scored"""
+        client = await get_redis()
+        token = uuid.uuid4().hex
+        if not await client.set(LOCK_KEY, token, nx=True, px=int(self.lock_ttl * 1000)):
+            # Another worker has this cycle
+            return 0
+
+        renew = client.register_script(_RENEW_SCRIPT)
+        release = client.register_script(_RELEASE_SCRIPT)
+        started = time.monotonic()
+        scored = 0
+        after_id = 0
+        try:
+            while True:
+                rows = await asyncio.to_thread(self._load, after_id)
+                if not rows:
+                    break
+                after_id = rows[-1][0]
+                scored += await self._score(rows)
+                if len(rows) < self.batch_size:
+                    break
+                if not await renew(keys=[LOCK_KEY], args=[token, int(self.lock_ttl * 1000)]):
+                    logger.warning("Safety score lock lost after %d tourists; ending the cycle", scored)
+                    break
+        finally:
+            remaining_ms = int((self.interval - (time.monotonic() - started)) * 1000)
+            await release(keys=[LOCK_KEY], args=[token, remaining_ms])
+
+        self._stats["runs"] += 1
+        self._stats["scored"] += scored
+        self._stats["last_duration_s"] = round(time.monotonic() - started, 3)
+        return scored
+
+    def stats(self) -> Dict:
+        return dict(self._stats)
+
+    async def _score(self, rows: List[tuple]) -> int:
+        positions = {tourist_id: (latitude, longitude) for tourist_id, _, _, latitude, longitude in rows
+                     if latitude is not None}
+        if settings.LIVE_POSITIONS_ENABLED:
+            live = await live_positions.get_many([row[0] for row in rows])
+            positions.update({
+                tourist_id: (position["latitude"], position["longitude"])
+                for tourist_id, position in live.items()
+            })
+        if not positions:
+            return 0
+
+        scores, changed, crossings = await asyncio.to_thread(self._compute, rows, positions)
+        await self.cache_scores(scores)
+        self._stats["changed"] += len(changed)
+
+        for name, tourist_id, score in crossings:
+            await notification_service.send_safety_score_alert(
+                {"id": tourist_id, "name": name}, score
+            )
+        self._stats["alerts"] += len(crossings)
+        return len(scores)
+
+    def _compute(self, rows: List[tuple], positions: Dict[int, Tuple[float, float]]):
+        tourist_ids = list(positions)
+        latitudes = [positions[tourist_id][0] for tourist_id in tourist_ids]
+        longitudes = [positions[tourist_id][1] for tourist_id in tourist_ids]
+        scores = dict(zip(
+            tourist_ids,
+            self.service.score_batch(latitudes, longitudes, [time.time()] * len(tourist_ids)).tolist()
+        ))
+
+        current = {tourist_id: (name, score) for tourist_id, name, score, _, _ in rows}
+        changed = {}
+        crossings = []
+        for tourist_id, score in scores.items():
+            name, old = current[tourist_id]
+            if old is None or abs(old - score) >= 0.05:
+                changed[tourist_id] = score
+                if crossed_threshold(old, score):
+                    crossings.append((name, tourist_id, score))
+
+        if changed:
+            db = SessionLocal()
+            try:
+                TouristService(db).update_safety_scores(changed)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        return scores, changed, crossings
+
+    def _load(self, after_id: int) -> List[tuple]:
+        db = SessionLocal()
+        try:
+            return TouristService(db).get_active_trip_tourists(after_id, self.batch_size)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.recompute_once()
+            except Exception:
+                logger.exception("Safety score recompute failed")
+            await asyncio.sleep(self.interval)
+
+# Global safety score scheduler instance
+safety_score_scheduler = SafetyScoreScheduler()
@@ -0,0 +1,157 @@
+from typing import Dict, Optional, Union
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+from ..core.config import settings
+from .geofence_service import GeofenceEngine, geofence_engine
+from .incident_heatmap import IncidentHeatmap, incident_heatmap
+
+BASE_SCORE = 7.0
+MIN_SCORE = 1.0
+MAX_SCORE = 10.0
+
+# Time of day factors by local hour: day 06-18, evening 19-22, night otherwise
+DAY_FACTOR = 1.1
+EVENING_FACTOR = 1.0
+NIGHT_FACTOR = 0.8
+
+# Zone safety scores (0-10) map linearly onto these factors; outside any zone is neutral
+LOCATION_FACTOR_RANGE = (0.8, 1.2)
+
+# Incident density maps onto these factors, saturating around `INCIDENT_DENSITY_SCALE`
+# (about one recent critical alert on the spot)
+HISTORICAL_INCIDENT_FACTOR_RANGE = (0.85, 1.0)
+INCIDENT_DENSITY_SCALE = 4.0
+
+# Below this many points, per-point grid lookups beat the batch ray caster
+_BATCH_LOOKUP_MIN = 32
+
+Timestamp = Union[datetime, float, None]
+
+def _epoch_seconds(timestamp: Timestamp) -> float:
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.timestamp()
+    return timestamp
+
+class SafetyScoreEngine:
+    """Deterministic batch safety scoring.
+
+    Every factor is computed for all tourists at once as a NumPy array and
+    the score is their product scaled from `BASE_SCORE`, clipped to 1-10.
+    Factors without data yet (crowd density, weather) can be passed in as
+    arrays and are neutral otherwise.
+    """
+
+    OPTIONAL_FACTORS = ("crowd_density", "weather_conditions")
+
+    def __init__(
+        self,
+        engine: GeofenceEngine = geofence_engine,
+        heatmap: IncidentHeatmap = incident_heatmap,
+        timezone_name: str = settings.SAFETY_SCORE_TIMEZONE
+    ):
+        self.engine = engine
+        self.heatmap = heatmap
+        self.timezone = ZoneInfo(timezone_name)
+
+    def factors(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        timestamps: np.ndarray,
+        extra: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Per-factor arrays for `score_batch`; `timestamps` are epoch seconds"""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        factors = {
+            "time_of_day": self._time_factor(timestamps),
+            "location_safety": self._location_factor(latitudes, longitudes),
+            "historical_incidents": self._incident_factor(latitudes, longitudes, extra)
+        }
+        for name in self.OPTIONAL_FACTORS:
+            values = (extra or {}).get(name)
+            factors[name] = (
+                np.ones(len(latitudes)) if values is None
+                else np.asarray(values, dtype=np.float64)
+            )
+        return factors
+
+    def score_batch(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        timestamps: np.ndarray,
+        extra: Optional[Dict[str, np.ndarray]] = None
+    ) -> np.ndarray:
+        """Safety scores for many tourists in one pass"""
+        factors = self.factors(latitudes, longitudes, timestamps, extra)
+        scores = np.full(len(factors["time_of_day"]), BASE_SCORE)
+        for values in factors.values():
+            scores *= values
+        return np.clip(np.round(scores, 1), MIN_SCORE, MAX_SCORE)
+
+    def score(self, latitude: float, longitude: float, timestamp: Timestamp = None, **extra: float) -> float:
+        """Safety score for one tourist, through the same batch code path"""
+        scores = self.score_batch(
+            [latitude], [longitude], [_epoch_seconds(timestamp)],
+            {name: [value] for name, value in extra.items()}
+        )
+        return float(scores[0])
+
+    def factors_at(self, latitude: float, longitude: float, timestamp: Timestamp = None, **extra: float) -> Dict[str, float]:
+        """Factor values for one tourist"""
+        factors = self.factors(
+            [latitude], [longitude], [_epoch_seconds(timestamp)],
+            {name: [value] for name, value in extra.items()}
+        )
+        return {name: float(values[0]) for name, values in factors.items()}
+
+    def _time_factor(self, timestamps: np.ndarray) -> np.ndarray:
+        if not len(timestamps):
+            return np.ones(0)
+        # One offset per batch: timestamps in a batch sit within minutes of each other
+        reference = datetime.fromtimestamp(float(timestamps.max()), tz=timezone.utc)
+        offset = reference.astimezone(self.timezone).utcoffset().total_seconds()
+        hours = np.floor(((timestamps + offset) % 86400) / 3600)
+        return np.select(
+            [(hours >= 6) & (hours <= 18), (hours >= 19) & (hours <= 22)],
+            [DAY_FACTOR, EVENING_FACTOR],
+            default=NIGHT_FACTOR
+        )
+
+    def _incident_factor(self, latitudes: np.ndarray, longitudes: np.ndarray, extra: Optional[Dict]) -> np.ndarray:
+        if extra and extra.get("historical_incidents") is not None:
+            return np.asarray(extra["historical_incidents"], dtype=np.float64)
+        density = self.heatmap.density_many(latitudes, longitudes)
+        low, high = HISTORICAL_INCIDENT_FACTOR_RANGE
+        return high - (high - low) * (1.0 - np.exp(-density / INCIDENT_DENSITY_SCALE))
+
+    def _location_factor(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Factor from the least safe active zone around each point"""
+        zone_scores = np.full(len(latitudes), np.nan)
+        if len(latitudes) < _BATCH_LOOKUP_MIN:
+            for i, (latitude, longitude) in enumerate(zip(latitudes.tolist(), longitudes.tolist())):
+                scores = [zone.safety_score for zone in self.engine.zones_at(latitude, longitude)
+                          if zone.safety_score is not None]
+                if scores:
+                    zone_scores[i] = min(scores)
+        else:
+            membership = self.engine.zones_for_points(latitudes, longitudes)
+            if len(membership.point_index):
+                by_id = {zone.id: zone.safety_score for zone in self.engine.zones}
+                scores = np.array(
+                    [by_id.get(zone_id) for zone_id in membership.zone_id.tolist()], dtype=np.float64
+                )
+                np.fmin.at(zone_scores, membership.point_index, scores)
+
+        low, high = LOCATION_FACTOR_RANGE
+        factors = low + (high - low) * np.clip(zone_scores, 0.0, 10.0) / 10.0
+        return np.where(np.isnan(factors), 1.0, factors)
+
+# Global safety score engine instance
+safety_score_engine = SafetyScoreEngine()
@@ -1,12 +1,56 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..models.user import Tourist
+from sqlalchemy import bindparam, func, insert, select, tuple_, update
+from ..models.user import Tourist, User
 from ..models.trip import Trip, EmergencyContact
+from ..core.timestamps import as_utc
 from ..models.location import Location
 from ..schemas.trip import TripCreate
 from ..schemas.location import LocationCreate
+from geoalchemy2.elements import WKTElement
 from geoalchemy2.functions import ST_Point
-from typing import List
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import base64
+
+def location_row(tourist_id: int, fix: LocationCreate) -> dict:
+    """Build a `locations` insert row from a fix, stamping it if the device did not"""
+    return {
+        "tourist_id": tourist_id,
+        "latitude": fix.latitude,
+        "longitude": fix.longitude,
+        "location": WKTElement(f"POINT({fix.longitude} {fix.latitude})"),
+        "address": fix.address,
+        "accuracy": fix.accuracy,
+        # Device clocks may send naive times; mixing them with aware ones breaks ordering
+        "timestamp": as_utc(fix.timestamp) if fix.timestamp else datetime.now(timezone.utc)
+    }
+
+BoundingBox = Tuple[float, float, float, float]  # min_lat, min_lon, max_lat, max_lon
+
+def encode_history_cursor(timestamp: datetime, location_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{location_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of `encode_history_cursor`; raises ValueError on malformed input"""
+    try:
+        timestamp, location_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(location_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+# Executed with one parameter set per tourist
+_move_current_location = (
+    update(Tourist.__table__)
+    .where(Tourist.__table__.c.id == bindparam("b_tourist_id"))
+    .values(current_location=func.ST_Point(bindparam("b_longitude"), bindparam("b_latitude")))
+)
+
+_set_safety_score = (
+    update(Tourist.__table__)
+    .where(Tourist.__table__.c.id == bindparam("b_tourist_id"))
+    .values(safety_score=bindparam("b_safety_score"))
+)
 
 class TouristService:
     def __init__(self, db: Session):
@@ -23,11 +67,39 @@ class TouristService:
             self.db.refresh(tourist)
         return tourist
     
+    def update_safety_scores(self, scores: Dict[int, float]):
+        """Write many safety scores in one statement"""
+        if scores:
+            self.db.execute(_set_safety_score, [
+                {"b_tourist_id": tourist_id, "b_safety_score": score}
+                for tourist_id, score in scores.items()
+            ])
+            self.db.commit()
+    
+    def get_active_trip_tourists(self, after_id: int, limit: int) -> List[tuple]:
+        """(id, name, safety_score, latitude, longitude) of tourists on active trips, in id order after `after_id`"""
+        active = select(Trip.tourist_id).where(Trip.status == "active")
+        return self.db.execute(
+            select(
+                Tourist.id,
+                User.name,
+                Tourist.safety_score,
+                func.ST_Y(Tourist.current_location),
+                func.ST_X(Tourist.current_location)
+            )
+            .join(User, User.id == Tourist.user_id)
+            .where(Tourist.id.in_(active), Tourist.id > after_id)
+            .order_by(Tourist.id)
+            .limit(limit)
+        ).all()
+    
     def create_trip(self, tourist_id: int, trip_data: TripCreate):
         # Create trip
         db_trip = Trip(
             tourist_id=tourist_id,
             destination=trip_data.destination,
+            destination_latitude=trip_data.destination_latitude,
+            destination_longitude=trip_data.destination_longitude,
             start_date=trip_data.start_date,
             end_date=trip_data.end_date,
             transport_mode=trip_data.transport_mode,
@@ -69,6 +141,8 @@ class TouristService:
             address=location_data.address,
             accuracy=location_data.accuracy
         )
+        if location_data.timestamp:
+            db_location.timestamp = location_data.timestamp
         self.db.add(db_location)
         
         # Update tourist's current location
@@ -79,6 +153,99 @@ class TouristService:
         self.db.commit()
         return db_location
     
+    def update_locations_batch(
+        self,
+        tourist_id: int,
+        fixes: List[LocationCreate],
+        move_current_location: bool = True
+    ) -> int:
+        """Store an ordered batch of fixes with one multi-row insert"""
+        return self.store_location_rows(
+            [location_row(tourist_id, fix) for fix in fixes],
+            move_current_location=move_current_location
+        )
+    
+    def store_location_rows(self, rows: List[dict], move_current_location: bool = True) -> int:
+        """Insert prepared `locations` rows, optionally moving each tourist to their newest fix"""
+        if not rows:
+            return 0
+        
+        self.db.execute(insert(Location), rows)
+        
+        if move_current_location:
+            newest: Dict[int, dict] = {}
+            for row in rows:
+                current = newest.get(row["tourist_id"])
+                if current is None or row["timestamp"] >= current["timestamp"]:
+                    newest[row["tourist_id"]] = row
+            self._move_current_locations({
+                tourist_id: (row["latitude"], row["longitude"])
+                for tourist_id, row in newest.items()
+            })
+        
+        self.db.commit()
+        return len(rows)
+    
+    def sync_current_locations(self, positions: Dict[int, Tuple[float, float]]):
+        """Write live positions back to `tourists.current_location` in one statement"""
+        if positions:
+            self._move_current_locations(positions)
+            self.db.commit()
+    
+    def _move_current_locations(self, positions: Dict[int, Tuple[float, float]]):
+        self.db.execute(_move_current_location, [
+            {"b_tourist_id": tourist_id, "b_latitude": latitude, "b_longitude": longitude}
+            for tourist_id, (latitude, longitude) in positions.items()
+        ])
+    
+    def get_location_history(
+        self,
+        tourist_id: int,
+        start: datetime,
+        end: datetime,
+        bbox: Optional[BoundingBox] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 500
+    ):
+        """One keyset page of a tourist's fixes, oldest first"""
+        query = self._location_history_query(tourist_id, start, end, bbox)
+        if after:
+            query = query.where(tuple_(Location.timestamp, Location.id) > tuple_(*after))
+        return self.db.execute(query.limit(limit)).all()
+    
+    def iter_location_history(
+        self,
+        tourist_id: int,
+        start: datetime,
+        end: datetime,
+        bbox: Optional[BoundingBox] = None,
+        chunk_size: int = 2000
+    ) -> Iterator:
+        """Stream a tourist's fixes through a server-side cursor"""
+        query = self._location_history_query(tourist_id, start, end, bbox)
+        yield from self.db.execute(query.execution_options(yield_per=chunk_size))
+    
+    def _location_history_query(self, tourist_id: int, start: datetime, end: datetime, bbox: Optional[BoundingBox]):
+        query = select(
+            Location.id,
+            Location.latitude,
+            Location.longitude,
+            Location.accuracy,
+            Location.address,
+            Location.timestamp
+        ).where(
+            Location.tourist_id == tourist_id,
+            Location.timestamp >= start,
+            Location.timestamp < end
+        )
+        if bbox:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            query = query.where(
+                Location.latitude.between(min_lat, max_lat),
+                Location.longitude.between(min_lon, max_lon)
+            )
+        return query.order_by(Location.timestamp, Location.id)
+    
     def get_all_tourists(self):
         return self.db.query(Tourist).join(Tourist.user).all()
     
@@ -0,0 +1,128 @@
+from typing import Collection, Dict, List, Optional, Sequence
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from ..core.config import settings
+from ..core.geo import equirectangular_m
+from ..schemas.location import LocationCreate
+
+@dataclass
+class _Point:
+    t: float
+    lat: float
+    lon: float
+
+@dataclass
+class _TrackState:
+    anchor: _Point
+    lat_rate: float = 0.0  # degrees per second
+    lon_rate: float = 0.0
+    held: Optional[LocationCreate] = None
+    held_point: Optional[_Point] = None
+    keep_next: bool = False
+
+class TrajectoryCompressor:
+    """Online dead-reckoning simplification of location streams.
+
+    A fix is stored when it deviates from the position predicted from the last
+    stored fix and its velocity by more than `distance_tolerance` meters, or
+    when `time_tolerance` seconds have passed since the last stored fix. The
+    path can then be rebuilt from stored fixes within the distance tolerance.
+    """
+
+    def __init__(
+        self,
+        distance_tolerance: float = settings.TRAJECTORY_DISTANCE_TOLERANCE_M,
+        time_tolerance: float = settings.TRAJECTORY_TIME_TOLERANCE_S,
+        max_tracks: int = settings.TRAJECTORY_MAX_TRACKS
+    ):
+        self.distance_tolerance = distance_tolerance
+        self.time_tolerance = time_tolerance
+        self.max_tracks = max_tracks
+        self._tracks: "OrderedDict[int, _TrackState]" = OrderedDict()
+        self._received = 0
+        self._kept = 0
+
+    def compress(
+        self, tourist_id: int, fixes: Sequence[LocationCreate], alert_times: Collection[float] = ()
+    ) -> List[LocationCreate]:
+        """Return the subset of time-ordered fixes that must be stored.
+
+        Fixes whose timestamp is in `alert_times` raised an alert; they are
+        stored together with the fix before and the fix after them.
+        """
+        kept = []
+        for fix in fixes:
+            point = _Point(self._timestamp(fix), fix.latitude, fix.longitude)
+            track = self._tracks.get(tourist_id)
+            alert = point.t in alert_times
+
+            if track is None:
+                self._tracks[tourist_id] = _TrackState(anchor=point, keep_next=alert)
+                kept.append(fix)
+                continue
+
+            if track.keep_next or alert:
+                # Keep both sides of an alert: the last fix before it and the first after it
+                if track.held is not None:
+                    kept.append(track.held)
+                self._keep(track, fix, point, kept)
+                track.keep_next = alert
+                continue
+
+            elapsed = point.t - track.anchor.t
+            predicted_lat = track.anchor.lat + track.lat_rate * elapsed
+            predicted_lon = track.anchor.lon + track.lon_rate * elapsed
+            error = equirectangular_m(predicted_lat, predicted_lon, point.lat, point.lon)
+
+            if error > self.distance_tolerance or elapsed > self.time_tolerance:
+                self._keep(track, fix, point, kept)
+            else:
+                track.held, track.held_point = fix, point
+
+        if fixes:
+            self._tracks.move_to_end(tourist_id)
+        while len(self._tracks) > self.max_tracks:
+            self._tracks.popitem(last=False)
+
+        self._received += len(fixes)
+        self._kept += len(kept)
+        return kept
+
+    def mark_alert(self, tourist_id: int):
+        """Force the next fix, and the one held before it, to be stored after an alert raised outside `compress`"""
+        track = self._tracks.get(tourist_id)
+        if track is not None:
+            track.keep_next = True
+
+    def forget(self, tourist_id: int):
+        self._tracks.pop(tourist_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "received": self._received,
+            "kept": self._kept,
+            "compression_ratio": round(self._received / self._kept, 2) if self._kept else None,
+            "tracked_tourists": len(self._tracks)
+        }
+
+    def _keep(self, track: _TrackState, fix: LocationCreate, point: _Point, kept: list):
+        # Velocity comes from the most recent observed motion
+        previous = track.held_point or track.anchor
+        elapsed = point.t - previous.t
+        if elapsed > 0:
+            track.lat_rate = (point.lat - previous.lat) / elapsed
+            track.lon_rate = (point.lon - previous.lon) / elapsed
+        else:
+            track.lat_rate = track.lon_rate = 0.0
+
+        track.anchor = point
+        track.held = track.held_point = None
+        kept.append(fix)
+
+    @staticmethod
+    def _timestamp(fix: LocationCreate) -> float:
+        return (fix.timestamp or datetime.now(timezone.utc)).timestamp()
+
+# Global trajectory compressor instance
+trajectory_compressor = TrajectoryCompressor()
@@ -0,0 +1 @@
+"""Micro-benchmarks, run from backend/ as `python -m benchmarks.<name>`"""
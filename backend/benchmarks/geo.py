@@ -0,0 +1,57 @@
+"""Scalar and array distance and bearing functions, and batched anomaly updates.
+
+Times each `core.geo` function over 1M point pairs, once as a Python loop
+over the scalar version and once as a single call of the `*_array`
+version, then `AnomalyDetector.update` per fix against `update_many` on
+one 100k-fix track.
+"""
+import sys
+import time
+import numpy as np
+from app.core import geo
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.geofence_service import GeofenceEngine
+
+PAIRS = 1_000_000
+TRACK = 100_000
+
+def _timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def main():
+    rng = np.random.default_rng(1)
+    lat1 = 28.5 + rng.random(PAIRS) * 0.3
+    lon1 = 77.0 + rng.random(PAIRS) * 0.4
+    lat2 = lat1 + rng.normal(0, 0.001, PAIRS)
+    lon2 = lon1 + rng.normal(0, 0.001, PAIRS)
+    columns = [column.tolist() for column in (lat1, lon1, lat2, lon2)]
+
+    print(f"{PAIRS} pairs")
+    print(f"{'function':>18} {'scalar s':>10} {'array s':>10} {'speedup':>8}")
+    for name in ("haversine_m", "equirectangular_m", "bearing_deg"):
+        scalar, array = getattr(geo, name), getattr(geo, f"{name}_array")
+        scalar_s = _timed(lambda: [scalar(*pair) for pair in zip(*columns)])
+        array_s = _timed(lambda: array(lat1, lon1, lat2, lon2))
+        print(f"{name:>18} {scalar_s:>10.3f} {array_s:>10.3f} {scalar_s / array_s:>7.1f}x")
+
+    timestamps = np.cumsum(rng.uniform(1, 30, TRACK))
+    latitudes = 28.6 + np.cumsum(rng.normal(0, 0.0002, TRACK))
+    longitudes = 77.2 + np.cumsum(rng.normal(0, 0.0002, TRACK))
+    detectors = []
+    for _ in range(2):
+        detector = AnomalyDetector(engine=GeofenceEngine())
+        detector.set_destination(1, (28.9, 77.5))
+        detectors.append(detector)
+
+    fixes = list(zip(latitudes.tolist(), longitudes.tolist(), timestamps.tolist()))
+    per_fix = _timed(lambda: [detectors[0].update(1, *fix) for fix in fixes])
+    batched = _timed(lambda: detectors[1].update_many(1, latitudes, longitudes, timestamps))
+    print()
+    print(f"{TRACK} fixes, one track")
+    print(f"{'update':>18} {per_fix:>10.3f}")
+    print(f"{'update_many':>18} {batched:>10.3f} {per_fix / batched:>7.1f}x")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Batch geofence membership at 10k, 100k and 1M points.
+
+Compares `GeofenceEngine.zones_for_points` with one shapely lookup per
+point (the previous approach) over synthetic zones around Delhi.
+"""
+import sys
+import time
+import numpy as np
+import shapely
+from shapely.geometry import Point
+from app.services.geofence_service import GeofenceEngine, Zone
+
+ZONES = 200
+SIZES = (10_000, 100_000, 1_000_000)
+PER_POINT_SAMPLE = 10_000  # the per-point loop is timed on this many and scaled
+
+def synthetic_zones(count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    zones = []
+    for zone_id in range(count):
+        center = Point(77.0 + rng.random() * 0.4, 28.5 + rng.random() * 0.3)
+        shape = center.buffer(0.005 + rng.random() * 0.02, quad_segs=8)
+        if zone_id % 5 == 0:
+            shape = shape.difference(center.buffer(0.002))
+        zones.append(Zone(zone_id, f"zone {zone_id}", "risk", 3.0, shape))
+    return zones
+
+def main():
+    engine = GeofenceEngine(grid_precision=0)
+    engine.load(synthetic_zones(ZONES))
+    rng = np.random.default_rng(1)
+
+    print(f"{ZONES} zones")
+    print(f"{'points':>10} {'batch s':>10} {'per-point s':>12} {'speedup':>8} {'memberships':>12}")
+    for size in SIZES:
+        latitudes = 28.5 + rng.random(size) * 0.3
+        longitudes = 77.0 + rng.random(size) * 0.4
+
+        started = time.perf_counter()
+        membership = engine.zones_for_points(latitudes, longitudes)
+        batch = time.perf_counter() - started
+
+        sample = min(size, PER_POINT_SAMPLE)
+        started = time.perf_counter()
+        for latitude, longitude in zip(latitudes[:sample].tolist(), longitudes[:sample].tolist()):
+            engine.zones_at(latitude, longitude)
+        per_point = (time.perf_counter() - started) * size / sample
+
+        print(f"{size:>10} {batch:>10.3f} {per_point:>12.3f} {per_point / batch:>7.1f}x {len(membership.zone_id):>12}")
+
+if __name__ == "__main__":
+    sys.exit(main())
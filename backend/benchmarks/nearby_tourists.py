@@ -0,0 +1,51 @@
+"""Tourists near an alert from the live position store, at 10k, 100k and 1M tourists.
+
+Loads synthetic live positions spread over Delhi and times
+`LivePositionStore.within_radius` around a central point, which is what
+`/police/alerts/{id}/nearby-tourists` runs when live positions are enabled.
+Run it against a scratch Redis (REDIS_URL): it overwrites the live
+position keys. The PostGIS path is timed by `benchmarks.proximity`.
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+from app.core.live_positions import DIRTY_KEY, GEO_KEY, SEEN_KEY, live_positions
+from app.core.redis import get_redis
+
+SIZES = (10_000, 100_000, 1_000_000)
+RADII_M = (500, 1000, 5000)
+LIMIT = 100
+QUERIES = 200
+CHUNK = 10_000
+
+async def load(count: int, rng):
+    client = await get_redis()
+    await client.delete(GEO_KEY, SEEN_KEY, DIRTY_KEY)
+    now = datetime.now(timezone.utc)
+    latitudes = 28.4 + rng.random(count) * 0.5
+    longitudes = 76.9 + rng.random(count) * 0.6
+    for start in range(0, count, CHUNK):
+        await asyncio.gather(*(
+            live_positions.update(tourist_id, float(latitudes[tourist_id]), float(longitudes[tourist_id]), now)
+            for tourist_id in range(start, min(start + CHUNK, count))
+        ))
+
+async def main():
+    rng = np.random.default_rng(1)
+    print(f"{'tourists':>10} {'radius m':>9} {'found':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in SIZES:
+        await load(size, rng)
+        for radius in RADII_M:
+            timings = []
+            for _ in range(QUERIES):
+                latitude, longitude = 28.65 + rng.normal(0, 0.05), 77.2 + rng.normal(0, 0.05)
+                started = time.perf_counter()
+                found = await live_positions.within_radius(latitude, longitude, radius, limit=LIMIT)
+                timings.append((time.perf_counter() - started) * 1000)
+            p50, p99 = np.percentile(timings, [50, 99])
+            print(f"{size:>10} {radius:>9} {len(found):>6} {p50:>8.2f} {p99:>8.2f}")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,113 @@
+"""PostGIS proximity queries at 10k, 100k and 1M tourists and alerts.
+
+Loads synthetic tourists and alerts spread over Delhi and times the three
+`ProximityService` queries served by the spatial indexes of migration
+9b4e2c7d1a05: tourists within a radius of an alert (`ST_DWithin`), the
+nearest active alerts (KNN `<->`) and alerts in a map viewport
+(`ST_Intersects`). The indexes in each query's plan are printed per size.
+
+Run it against a scratch database (DATABASE_URL) migrated to head: it
+truncates the users, tourists and alerts tables.
+"""
+import sys
+import time
+import numpy as np
+from sqlalchemy import event, text
+from app.core.database import SessionLocal
+from app.services.proximity_service import ProximityService
+
+SIZES = (10_000, 100_000, 1_000_000)
+ACTIVE_FRACTION = 0.2
+RADII_M = (500, 1000, 5000)
+VIEWPORT_DEG = (0.02, 0.1)
+K = 10
+QUERIES = 200
+
+def load(db, count: int):
+    db.execute(text("TRUNCATE users, tourists, alerts RESTART IDENTITY CASCADE"))
+    db.execute(text("SELECT setseed(0.5)"))
+    db.execute(text("""
+        INSERT INTO users (email, name, hashed_password, role, is_active)
+        SELECT 'bench' || i || '@example.com', 'Tourist ' || i, '', 'tourist', true
+        FROM generate_series(1, :count) AS i
+    """), {"count": count})
+    db.execute(text("""
+        INSERT INTO tourists (user_id, digital_id, current_location)
+        SELECT i, 'BENCH' || i, ST_MakePoint(76.9 + random() * 0.6, 28.4 + random() * 0.5)
+        FROM generate_series(1, :count) AS i
+    """), {"count": count})
+    db.execute(text("""
+        INSERT INTO alerts (tourist_id, type, priority, status, message, location, created_at)
+        SELECT 1 + (random() * (:count - 1))::int, 'panic', 'high',
+               CASE WHEN random() < :active THEN 'active' ELSE 'resolved' END, '',
+               ST_MakePoint(76.9 + random() * 0.6, 28.4 + random() * 0.5),
+               now() - random() * interval '30 days'
+        FROM generate_series(1, :count)
+    """), {"count": count, "active": ACTIVE_FRACTION})
+    db.commit()
+    db.execute(text("ANALYZE users, tourists, alerts"))
+
+def timed(call):
+    timings = []
+    for _ in range(QUERIES):
+        started = time.perf_counter()
+        found = call()
+        timings.append((time.perf_counter() - started) * 1000)
+    p50, p99 = np.percentile(timings, [50, 99])
+    return len(found), p50, p99
+
+def indexes_used(db, call) -> str:
+    """Indexes in the plan of the last statement `call` sends, captured as it runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.bind, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(db.bind, "before_cursor_execute", capture)
+    statement, parameters = statements[-1]
+    plan = db.connection().exec_driver_sql("EXPLAIN " + statement, parameters).scalars()
+    names = sorted({word for line in plan for word in line.split() if word.startswith(("idx_", "ix_"))})
+    return ", ".join(names) or "none"
+
+def main():
+    rng = np.random.default_rng(1)
+    db = SessionLocal()
+    try:
+        print(f"{'rows':>10} {'query':<20} {'found':>6} {'p50 ms':>8} {'p99 ms':>8}")
+        for size in SIZES:
+            load(db, size)
+            service = ProximityService(db)
+            active_ids = [row[0] for row in service.get_active_alert_points()]
+
+            for radius in RADII_M:
+                found, p50, p99 = timed(lambda: service.get_tourists_near_alert(
+                    int(rng.choice(active_ids)), radius
+                ))
+                print(f"{size:>10} {f'within {radius} m':<20} {found:>6} {p50:>8.2f} {p99:>8.2f}")
+
+            found, p50, p99 = timed(lambda: service.get_nearest_active_alerts(
+                28.65 + rng.normal(0, 0.05), 77.2 + rng.normal(0, 0.05), K
+            ))
+            print(f"{size:>10} {f'nearest {K} active':<20} {found:>6} {p50:>8.2f} {p99:>8.2f}")
+
+            for side in VIEWPORT_DEG:
+                def viewport():
+                    latitude, longitude = 28.4 + rng.random() * 0.5, 76.9 + rng.random() * 0.6
+                    return service.get_alerts_in_box(latitude, longitude, latitude + side, longitude + side)
+                found, p50, p99 = timed(viewport)
+                print(f"{size:>10} {f'viewport {side} deg':<20} {found:>6} {p50:>8.2f} {p99:>8.2f}")
+
+            alert_id = active_ids[0]
+            print(f"{'':>10} indexes: within radius "
+                  f"{indexes_used(db, lambda: service.get_tourists_near_alert(alert_id, RADII_M[0]))}; "
+                  f"nearest {indexes_used(db, lambda: service.get_nearest_active_alerts(28.65, 77.2, K))}; "
+                  f"viewport {indexes_used(db, lambda: service.get_alerts_in_box(28.6, 77.1, 28.7, 77.2))}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import asyncio
+import itertools
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from app.schemas.alert import AlertCreate
+from app.services.alert_dispatcher import AlertDispatcher, AlertQueueFull
+
+def _alert_data(priority="medium", message="alert"):
+    return AlertCreate(type="anomaly", priority=priority, message=message)
+
+def _dispatcher(monkeypatch, store=None, **kwargs):
+    """Dispatcher whose database writes are recorded instead of made"""
+    dispatcher = AlertDispatcher(**{"workers": 1, "max_queued": 100, "dedupe_window": 60.0, **kwargs})
+    ids = itertools.count(1)
+    dispatcher.stored, dispatcher.repeats = [], []
+
+    def _store(tourist_id, alert_data):
+        if store is not None:
+            store(alert_data)
+        dispatcher.stored.append(alert_data.message)
+        return SimpleNamespace(id=next(ids), created_at=datetime.now(timezone.utc))
+
+    def _record_repeat(alert_id):
+        dispatcher.repeats.append(alert_id)
+        return SimpleNamespace(id=alert_id, created_at=datetime.now(timezone.utc))
+
+    monkeypatch.setattr(dispatcher, "_store", _store)
+    monkeypatch.setattr(dispatcher, "_record_repeat", _record_repeat)
+    return dispatcher
+
+def test_jobs_are_served_by_priority_then_arrival(monkeypatch):
+    dispatcher = _dispatcher(monkeypatch)
+
+    async def run():
+        futures = [
+            dispatcher.submit(1, _alert_data(priority, f"{priority} {n}"))
+            for n, priority in enumerate(["low", "medium", "high", "critical", "medium", "critical"])
+        ]
+        await asyncio.gather(*futures)
+        await dispatcher.stop()
+
+    asyncio.run(run())
+    assert dispatcher.stored == ["critical 3", "critical 5", "high 2", "medium 1", "medium 4", "low 0"]
+
+def test_critical_alerts_bypass_the_queue_limit(monkeypatch):
+    dispatcher = _dispatcher(monkeypatch, max_queued=1)
+
+    async def run():
+        dispatcher.submit(1, _alert_data("medium", "first"))
+        with pytest.raises(AlertQueueFull):
+            dispatcher.submit(1, _alert_data("high", "second"))
+        panic = dispatcher.submit(1, _alert_data("critical", "panic"))
+        await panic
+        await dispatcher.stop()
+
+    asyncio.run(run())
+    assert dispatcher.stored == ["panic", "first"]
+    assert dispatcher.stats()["dropped"] == 1
+
+def test_repeats_are_merged_into_the_first_alert(monkeypatch):
+    dispatcher = _dispatcher(monkeypatch)
+    notified = []
+
+    async def notify(alert):
+        notified.append(alert.id)
+
+    async def run():
+        first = dispatcher.submit(7, _alert_data(message="first"), notify, dedupe_key="erratic")
+        repeat = dispatcher.submit(7, _alert_data(message="repeat"), notify, dedupe_key="erratic")
+        other = dispatcher.submit(8, _alert_data(message="other tourist"), notify, dedupe_key="erratic")
+        critical = dispatcher.submit(7, _alert_data("critical", "critical"), notify, dedupe_key="erratic")
+        results = await asyncio.gather(first, repeat, other, critical)
+        await dispatcher.stop()
+        return results
+
+    first, repeat, other, critical = asyncio.run(run())
+    # Critical alerts are never merged
+    assert dispatcher.stored == ["critical", "first", "other tourist"]
+    assert dispatcher.repeats == [first.id]
+    assert repeat.id == first.id
+    assert sorted(notified) == sorted([critical.id, first.id, other.id])
+    assert dispatcher.stats()["coalesced"] == 1
+
+def test_a_failed_first_store_does_not_swallow_its_repeats(monkeypatch):
+    calls = itertools.count()
+
+    def store(alert_data):
+        if next(calls) == 0:
+            # Slow enough for the repeat to be waiting on this store
+            time.sleep(0.05)
+            raise RuntimeError("database unavailable")
+
+    dispatcher = _dispatcher(monkeypatch, store=store, workers=2)
+
+    async def run():
+        first = dispatcher.submit(7, _alert_data(message="first"), dedupe_key="erratic")
+        repeat = dispatcher.submit(7, _alert_data(message="repeat"), dedupe_key="erratic")
+        results = await asyncio.gather(first, repeat, return_exceptions=True)
+        await dispatcher.stop()
+        return results
+
+    first, repeat = asyncio.run(run())
+    assert isinstance(first, RuntimeError)
+    # The repeat is stored as a new alert instead of merged into nothing
+    assert dispatcher.stored == ["repeat"]
+    assert dispatcher.repeats == []
+    assert repeat.id == 1
+    assert dispatcher.stats()["failed"] == 1
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.services.alert_events import AlertChange, AlertEventLog, AlertProjection, update_changes
+
+T0 = datetime(2026, 10, 1, 12, 0)
+
+@pytest.fixture
+def db():
+    # Just the columns the event log reads and writes
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alerts (id INTEGER PRIMARY KEY, created_at DATETIME)"))
+        connection.execute(text("""
+            CREATE TABLE alert_events (
+                id INTEGER PRIMARY KEY, alert_id INTEGER NOT NULL, event_type VARCHAR NOT NULL,
+                status VARCHAR NOT NULL, priority VARCHAR, officer_id INTEGER, created_at DATETIME NOT NULL
+            )
+        """))
+    with Session(engine) as session:
+        yield session
+
+def _alert(db, log, alert_id, created_at, priority="high"):
+    db.execute(text("INSERT INTO alerts (id, created_at) VALUES (:id, :at)"), {"id": alert_id, "at": created_at})
+    alert = SimpleNamespace(
+        id=alert_id, tourist_id=1, status=None, priority=None, assigned_officer_id=None,
+        created_at=None, acknowledged_at=None, resolved_at=None
+    )
+    log.append(db, alert, [AlertChange("created", priority=priority)], created_at)
+    return alert
+
+def test_replay_rebuilds_the_alert_rows(db):
+    log = AlertEventLog()
+    first = _alert(db, log, 1, T0)
+    second = _alert(db, log, 2, T0 + timedelta(hours=1), priority="low")
+
+    log.append(db, first, update_changes(first, status="acknowledged", assigned_officer_id=4), T0 + timedelta(minutes=2))
+    log.append(db, first, update_changes(first, priority="critical"), T0 + timedelta(minutes=3))
+    log.append(db, first, update_changes(first, status="resolved"), T0 + timedelta(minutes=30))
+    log.append(db, second, update_changes(second, status="resolved"), T0 + timedelta(hours=2))
+    log.append(db, second, update_changes(second, status="active"), T0 + timedelta(hours=3))
+    db.flush()
+
+    projections = log.replay(db, batch_size=2)
+    for alert in (first, second):
+        projection = projections[alert.id]
+        assert projection == AlertProjection(
+            alert.id, alert.status, alert.priority, alert.assigned_officer_id,
+            alert.created_at, alert.acknowledged_at, alert.resolved_at
+        )
+    assert projections[1].status == "resolved" and projections[1].priority == "critical"
+    assert projections[2].status == "active" and projections[2].resolved_at == T0 + timedelta(hours=2)
+
+    # Windows select alerts by creation time, with all of their later events
+    assert list(log.replay(db, start=T0 + timedelta(minutes=30))) == [2]
+    assert list(log.replay(db, end=T0 + timedelta(minutes=30))) == [1]
+    assert [event.event_type for event in log.timeline(db, 1)] == [
+        "created", "assigned", "acknowledged", "escalated", "resolved"
+    ]
+
+def test_response_times_by_priority():
+    def projection(alert_id, priority, acknowledged_s=None, resolved_s=None, created=True):
+        return AlertProjection(
+            alert_id, "resolved", priority, None, T0 if created else None,
+            T0 + timedelta(seconds=acknowledged_s) if acknowledged_s is not None else None,
+            T0 + timedelta(seconds=resolved_s) if resolved_s is not None else None
+        )
+
+    times = AlertEventLog().response_times([
+        projection(1, "critical", 10, 100),
+        projection(2, "critical", 30),
+        projection(3, "low", 200, 1000),
+        projection(4, "low"),
+        # Events from before the log started: no creation time, not counted
+        projection(5, "low", 5, 5, created=False),
+    ])
+
+    acknowledge = times["acknowledge_s"]
+    assert acknowledge["count"] == 3
+    assert acknowledge["p50"] == 30.0
+    assert acknowledge["by_priority"]["critical"] == {"count": 2, "p50": 20.0, "p90": 28.0, "p99": 29.8}
+    assert acknowledge["by_priority"]["low"]["count"] == 1
+    assert times["resolve_s"]["count"] == 2
+    assert times["resolve_s"]["by_priority"]["low"]["p50"] == 1000.0
+
+    empty = AlertEventLog().response_times([])
+    assert empty["acknowledge_s"] == {"count": 0, "p50": None, "p90": None, "p99": None, "by_priority": {}}
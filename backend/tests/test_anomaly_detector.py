@@ -0,0 +1,31 @@
+import numpy as np
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.geofence_service import GeofenceEngine
+
+def _detector():
+    return AnomalyDetector(engine=GeofenceEngine(), window=10, max_dwell=600.0, cooldown=0.0)
+
+def test_update_many_matches_update():
+    rng = np.random.default_rng(11)
+    count = 300
+    timestamps = np.cumsum(rng.uniform(1, 30, count))
+    timestamps[50] = timestamps[49]  # duplicate
+    timestamps[120] = timestamps[100]  # out of order
+    latitudes = 28.6 + np.cumsum(rng.normal(0, 0.0005, count))
+    longitudes = 77.2 + np.cumsum(rng.normal(0, 0.0005, count))
+    latitudes[200] += 0.5  # a jump fast enough to flag
+
+    one_by_one, batched = _detector(), _detector()
+    for detector in (one_by_one, batched):
+        detector.set_destination(1, (28.9, 77.5))
+
+    expected = []
+    for latitude, longitude, timestamp in zip(latitudes.tolist(), longitudes.tolist(), timestamps.tolist()):
+        expected.extend(one_by_one.update(1, latitude, longitude, timestamp))
+    found = batched.update_many(1, latitudes[:150], longitudes[:150], timestamps[:150])
+    found += batched.update_many(1, latitudes[150:], longitudes[150:], timestamps[150:])
+
+    assert [(a.anomaly_type, a.timestamp) for a in found] == [(a.anomaly_type, a.timestamp) for a in expected]
+    assert any(a.anomaly_type == "unusual_movement" for a in found)
+    for a, b in zip(found, expected):
+        assert a.features == b.features
@@ -0,0 +1,24 @@
+import pytest
+from app.services.chatbot import INTENTS, IntentMatcher
+
+def _first_keyword(message):
+    """The original lookup: the first intent whose name occurs in the message"""
+    for intent, _, _ in INTENTS:
+        if intent in message.lower():
+            return intent
+    return None
+
+@pytest.mark.parametrize("message", [
+    "I feel unsafe here",
+    "SOS",
+    "is this area safe at night?",
+    "Where are the police? This is an EMERGENCY",
+    "need help with my location",
+    "what are some safety tips",
+    "best street food nearby",
+])
+def test_intent_matches_original_keywords(message):
+    assert IntentMatcher().match(message) == _first_keyword(message)
+
+def test_unsafe_falls_through_to_the_backend():
+    assert IntentMatcher().match("I feel unsafe") is None
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+import fakeredis
+from app.services import dashboard_counters as module
+from app.services.dashboard_counters import COUNTERS_KEY, RESOLVED_KEY, DashboardCounters, _today
+
+def _event(event_type, status, previous_status, resolved_at=None):
+    return {
+        "event_type": event_type,
+        "status": status,
+        "previous_status": previous_status,
+        "resolved_at": resolved_at.isoformat() if resolved_at else None,
+        "elapsed_s": 30.0
+    }
+
+def test_reopening_an_alert_resolved_today_uncounts_it(monkeypatch):
+    redis = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    monkeypatch.setattr(module, "get_sync_redis", lambda: redis)
+    counters = DashboardCounters()
+    now = datetime.now(timezone.utc)
+    yesterday = now - timedelta(days=1)
+
+    counters.record_events([
+        _event("created", "active", None),
+        _event("created", "active", None),
+        _event("resolved", "resolved", "active", now),
+    ])
+    assert redis.get(RESOLVED_KEY.format(_today())) == "1"
+
+    counters.record_events([_event("reopened", "active", "resolved", now)])
+    assert redis.get(RESOLVED_KEY.format(_today())) == "0"
+    assert redis.hgetall(COUNTERS_KEY) == {"total_alerts": "2", "active_alerts": "2"}
+
+    # Resolved on an earlier day: today's count is untouched
+    counters.record_events([_event("reopened", "active", "resolved", yesterday)])
+    assert redis.get(RESOLVED_KEY.format(_today())) == "0"
+
+def test_active_tourists_come_from_reconciliation(monkeypatch):
+    redis = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    monkeypatch.setattr(module, "get_sync_redis", lambda: redis)
+
+    class Session:
+        def close(self):
+            pass
+
+    monkeypatch.setattr(module, "SessionLocal", Session)
+    counters = DashboardCounters()
+    monkeypatch.setattr(counters, "_count", lambda db: {
+        "active_alerts": 1, "acknowledged_alerts": 0, "total_alerts": 1,
+        "active_tourists": 3, "resolved_today": 0, "response_times": []
+    })
+
+    counters.reconcile()
+    counters.record_events([_event("created", "active", None)])
+    assert redis.hgetall(COUNTERS_KEY) == {
+        "active_alerts": "2", "acknowledged_alerts": "0", "total_alerts": "2", "active_tourists": "3"
+    }
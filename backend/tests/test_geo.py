@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+from app.core.geo import (
+    bearing_deg, bearing_deg_array, equirectangular_m, equirectangular_m_array,
+    haversine_m, haversine_m_array, heading_change_deg, speed_mps_array
+)
+
+# (lat1, lon1, lat2, lon2): a city block, across Delhi, Delhi-Mumbai, near the pole, across the antimeridian
+PAIRS = [
+    (28.6139, 77.2090, 28.6145, 77.2101),
+    (28.5000, 77.0000, 28.7500, 77.3500),
+    (28.6139, 77.2090, 19.0760, 72.8777),
+    (89.5000, 10.0000, 89.4000, -170.0000),
+    (-16.5000, 179.9000, -16.4000, -179.8000),
+]
+
+@pytest.mark.parametrize("pair", PAIRS)
+def test_haversine_within_half_percent_of_geodesic(pair):
+    reference = geodesic(pair[:2], pair[2:]).meters
+    assert haversine_m(*pair) == pytest.approx(reference, rel=0.005)
+
+def test_equirectangular_close_to_haversine_at_city_scale():
+    rng = np.random.default_rng(5)
+    lat1 = rng.uniform(-60, 60, 1000)
+    lon1 = rng.uniform(-180, 180, 1000)
+    # Up to about 30 km in each direction
+    lat2 = lat1 + rng.uniform(-0.25, 0.25, 1000)
+    lon2 = lon1 + rng.uniform(-0.25, 0.25, 1000)
+    np.testing.assert_allclose(
+        equirectangular_m_array(lat1, lon1, lat2, lon2), haversine_m_array(lat1, lon1, lat2, lon2), rtol=0.001
+    )
+
+def test_array_functions_match_scalar():
+    lat1, lon1, lat2, lon2 = (np.array(column) for column in zip(*PAIRS))
+    for scalar, array in (
+        (haversine_m, haversine_m_array),
+        (equirectangular_m, equirectangular_m_array),
+        (bearing_deg, bearing_deg_array),
+    ):
+        expected = [scalar(*pair) for pair in PAIRS]
+        np.testing.assert_allclose(array(lat1, lon1, lat2, lon2), expected, rtol=1e-12)
+
+def test_bearings():
+    assert bearing_deg(0, 0, 1, 0) == pytest.approx(0.0)
+    assert bearing_deg(0, 0, 0, 1) == pytest.approx(90.0)
+    assert bearing_deg(0, 0, -1, 0) == pytest.approx(180.0)
+    assert bearing_deg(0, 0, 0, -1) == pytest.approx(270.0)
+    assert heading_change_deg(350.0, 10.0) == pytest.approx(20.0)
+    assert heading_change_deg(90.0, 270.0) == pytest.approx(180.0)
+
+def test_speeds_along_a_track():
+    latitudes = [28.6, 28.601, 28.601, 28.603]
+    longitudes = [77.2, 77.2, 77.2, 77.2]
+    timestamps = [0.0, 10.0, 10.0, 30.0]
+    speeds = speed_mps_array(latitudes, longitudes, timestamps)
+
+    hop = equirectangular_m(28.6, 77.2, 28.601, 77.2)
+    assert speeds[0] == pytest.approx(hop / 10.0)
+    assert np.isnan(speeds[1])  # time did not advance
+    assert speeds[2] == pytest.approx(2 * hop / 20.0)
+    # About 11 m/s for 0.001 degrees of latitude in 10 s
+    assert speeds[0] == pytest.approx(geodesic((28.6, 77.2), (28.601, 77.2)).meters / 10.0, rel=0.005)
@@ -0,0 +1,56 @@
+import numpy as np
+from shapely.geometry import Point, box
+from benchmarks.geofence import synthetic_zones
+from app.services.geofence_grid import ZoneGrid
+from app.services.geofence_service import GeofenceEngine, Zone
+
+def _points(count, seed=5):
+    rng = np.random.default_rng(seed)
+    return (28.5 + rng.random(count) * 0.3).tolist(), (77.0 + rng.random(count) * 0.4).tolist()
+
+def test_grid_lookups_match_the_tree():
+    zones = synthetic_zones(40)
+    exact = GeofenceEngine(grid_precision=0)
+    exact.load(zones)
+    gridded = GeofenceEngine(grid_precision=7)
+    gridded.load(zones)
+
+    for latitude, longitude in zip(*_points(5000)):
+        assert sorted(z.id for z in gridded.zones_at(latitude, longitude)) == \
+            sorted(z.id for z in exact.zones_at(latitude, longitude))
+
+    stats = gridded.grid_stats()
+    assert stats["lookups"] == 5000
+    # Most points are outside every zone or deep inside one: no exact test needed
+    assert stats["hit_rate"] > 0.9
+
+def test_geohash_of_a_cell():
+    grid = ZoneGrid(precision=7, max_cells_per_zone=1000)
+    assert grid.geohash(grid.cell(57.64911, 10.40744)) == "u4pruyd"
+
+def test_rebuild_matches_a_fresh_grid():
+    zones = synthetic_zones(20)
+    grid = ZoneGrid(precision=7, max_cells_per_zone=250000).rebuild(zones)
+
+    moved = Zone(3, "moved", "risk", 2.0, Point(77.3, 28.7).buffer(0.01))
+    changed = [moved if zone.id == 3 else zone for zone in zones if zone.id != 5]
+    updated = grid.rebuild(changed)
+    fresh = ZoneGrid(precision=7, max_cells_per_zone=250000).rebuild(changed)
+
+    assert updated.cells == fresh.cells
+    assert set(updated.zone_cells) == set(fresh.zone_cells)
+    # Unchanged zones keep their cell lists instead of being recomputed
+    assert updated.zone_cells[0][1] is grid.zone_cells[0][1]
+    # The previous grid is untouched, so lookups in flight still see it whole
+    assert 5 in grid.zone_cells
+
+def test_zones_too_large_for_the_table_are_always_tested():
+    large = Zone(1, "large", "risk", 2.0, box(76.0, 28.0, 78.0, 29.0))
+    small = Zone(2, "small", "safe", 8.0, box(77.2, 28.6, 77.21, 28.61))
+    engine = GeofenceEngine(grid_precision=7, grid_max_cells_per_zone=1000)
+    engine.load([large, small])
+
+    assert engine.grid_stats()["unindexed_zones"] == 1
+    assert [z.id for z in engine.zones_at(28.605, 77.205)] == [2, 1]
+    assert [z.id for z in engine.zones_at(28.2, 76.5)] == [1]
+    assert engine.zones_at(30.0, 77.0) == []
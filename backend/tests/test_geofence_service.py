@@ -0,0 +1,30 @@
+import numpy as np
+import shapely
+from benchmarks.geofence import synthetic_zones
+from app.services.geofence_service import GeofenceEngine
+
+def test_zones_for_points_matches_shapely():
+    zones = synthetic_zones(40)
+    engine = GeofenceEngine(grid_precision=0)
+    engine.load(zones)
+    rng = np.random.default_rng(3)
+    latitudes = 28.5 + rng.random(20_000) * 0.3
+    longitudes = 77.0 + rng.random(20_000) * 0.4
+
+    membership = engine.zones_for_points(latitudes, longitudes)
+    found = set(zip(membership.point_index.tolist(), membership.zone_id.tolist()))
+
+    expected = set()
+    for zone in zones:
+        inside = np.flatnonzero(shapely.contains_xy(zone.geometry, longitudes, latitudes))
+        expected.update((int(i), zone.id) for i in inside)
+    assert found == expected
+
+def test_reload_swaps_zones_and_edges_together():
+    engine = GeofenceEngine(grid_precision=0)
+    engine.load(synthetic_zones(10))
+    before = engine._index
+    engine.load(synthetic_zones(3))
+    zones, _, _, _, edges = engine._index
+    assert len(zones) == len(edges) == 3
+    assert len(before[0]) == len(before[4]) == 10
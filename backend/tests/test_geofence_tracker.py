@@ -0,0 +1,78 @@
+import asyncio
+import fakeredis.aioredis
+from shapely.geometry import box
+from app.services import geofence_tracker as module
+from app.services.geofence_service import GeofenceEngine, Zone
+from app.services.geofence_tracker import GeofenceStateTracker
+
+# About 1.1 km square around (28.6, 77.2)
+ZONE = Zone(1, "Old market", "risk", 3.0, box(77.195, 28.595, 77.205, 28.605))
+INSIDE = (28.6, 77.2)
+# About 11 m and 110 m north of the zone
+NEAR = (28.6051, 77.2)
+FAR = (28.606, 77.2)
+
+def _tracker():
+    engine = GeofenceEngine(grid_precision=0)
+    engine.load([ZONE])
+    return GeofenceStateTracker(engine=engine, buffer_m=30.0, min_dwell=20.0)
+
+def _events(tracker, fixes):
+    return [
+        (event.event, event.timestamp)
+        for t, (latitude, longitude) in fixes
+        for event in tracker.update(7, latitude, longitude, t)
+    ]
+
+def test_enter_waits_for_the_dwell_and_ignores_jitter():
+    tracker = _tracker()
+    # In and out along the border: never long enough inside
+    assert _events(tracker, [(0, INSIDE), (10, FAR), (15, INSIDE), (30, FAR)]) == []
+    assert _events(tracker, [(40, INSIDE), (50, INSIDE), (60, INSIDE)]) == [("enter", 60)]
+    assert tracker.inside(7) == [ZONE.id]
+
+def test_exit_needs_the_buffer_and_the_dwell():
+    tracker = _tracker()
+    _events(tracker, [(0, INSIDE), (20, INSIDE)])
+
+    # Just outside, within the exit buffer: still inside
+    assert _events(tracker, [(30, NEAR), (100, NEAR)]) == []
+    # Beyond the buffer, but back before the dwell ends
+    assert _events(tracker, [(110, FAR), (120, INSIDE)]) == []
+    assert _events(tracker, [(130, FAR), (140, FAR), (150, FAR)]) == [("exit", 150)]
+    assert tracker.inside(7) == []
+
+def test_reload_drops_state_for_removed_zones():
+    tracker = _tracker()
+    _events(tracker, [(0, INSIDE), (20, INSIDE)])
+    tracker.engine.load([])
+    assert _events(tracker, [(30, INSIDE)]) == []
+    assert tracker.inside(7) == []
+
+def test_only_one_worker_rechecks_after_a_reload(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    sent = []
+
+    class Positions:
+        async def snapshot(self):
+            return [{"tourist_id": 7, "latitude": INSIDE[0], "longitude": INSIDE[1]}]
+
+    async def get_redis():
+        return redis
+
+    async def send_geofence_events(tourist_data, events):
+        sent.extend(events)
+
+    monkeypatch.setattr(module, "get_redis", get_redis)
+    monkeypatch.setattr(module, "live_positions", Positions())
+    monkeypatch.setattr(module, "send_geofence_events", send_geofence_events)
+
+    async def run():
+        workers = [_tracker(), _tracker()]
+        for worker in workers:
+            worker.min_dwell = 0
+            worker.engine._fingerprint = "v2"
+        return [await worker.recheck_live() for worker in workers]
+
+    assert asyncio.run(run()) == [1, 0]
+    assert [(event.tourist_id, event.event) for event in sent] == [(7, "enter")]
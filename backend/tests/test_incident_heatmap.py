@@ -0,0 +1,105 @@
+import asyncio
+import time
+import fakeredis.aioredis
+import numpy as np
+import pytest
+from app.services import incident_heatmap as module
+from app.services.incident_heatmap import CELLS_KEY, META_KEY, IncidentHeatmap
+
+EPOCH = 1_700_000_000.0
+DAY = 86400.0
+ALERTS = [
+    (28.6139, 77.2090, "critical", EPOCH - 2 * DAY),
+    (28.6150, 77.2101, "low", EPOCH - DAY),
+    (28.6200, 77.2000, None, EPOCH),
+    (28.5000, 77.3000, "high", EPOCH - 10 * DAY),
+]
+
+def _heatmap():
+    return IncidentHeatmap(cell_m=50.0, bandwidth_m=100.0, half_life_days=7.0, rebuild_interval=3600.0)
+
+def test_raster_of_known_alerts():
+    heatmap = _heatmap()
+    heatmap._cells = heatmap.build([(28.6, 77.2, "critical", EPOCH)], EPOCH)
+    heatmap.epoch = EPOCH
+
+    peak = heatmap.density(28.6, 77.2, now=EPOCH)
+    # The kernel is at most the priority weight, and falls off with distance
+    assert 0.8 * 4.0 < peak <= 4.0
+    assert heatmap.density(28.601, 77.2, now=EPOCH) < peak
+    assert heatmap.density(28.61, 77.2, now=EPOCH) == 0.0
+    # Halved one half-life later
+    assert heatmap.density(28.6, 77.2, now=EPOCH + 7 * DAY) == pytest.approx(peak / 2)
+
+    medium = _heatmap()
+    medium._cells = medium.build([(28.6, 77.2, "medium", EPOCH)], EPOCH)
+    medium.epoch = EPOCH
+    assert medium.density(28.6, 77.2, now=EPOCH) == pytest.approx(peak / 4)
+
+def test_add_alert_matches_build():
+    built = _heatmap().build(ALERTS, EPOCH)
+
+    heatmap = _heatmap()
+    heatmap.epoch = EPOCH
+    for latitude, longitude, priority, created_at in ALERTS:
+        heatmap.add_alert(latitude, longitude, priority, created_at)
+
+    assert set(heatmap._cells) == set(built)
+    for key, value in built.items():
+        assert heatmap._cells[key] == pytest.approx(value)
+
+def test_density_many_matches_density():
+    heatmap = _heatmap()
+    heatmap.epoch = EPOCH
+    heatmap._cells = heatmap.build(ALERTS, EPOCH)
+    rng = np.random.default_rng(2)
+    latitudes = 28.60 + rng.random(500) * 0.03
+    longitudes = 77.19 + rng.random(500) * 0.03
+
+    many = heatmap.density_many(latitudes, longitudes, now=EPOCH + DAY)
+    assert many.tolist() == pytest.approx([
+        heatmap.density(latitude, longitude, now=EPOCH + DAY)
+        for latitude, longitude in zip(latitudes.tolist(), longitudes.tolist())
+    ])
+    assert many.max() > 0
+
+def test_increments_keep_their_density_across_an_epoch_change(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+    async def get_redis():
+        return redis
+
+    monkeypatch.setattr(module, "get_redis", get_redis)
+    now = EPOCH + 20 * DAY
+
+    async def run():
+        # The shared raster was rebuilt against a later epoch than this worker's
+        shared = _heatmap()
+        await redis.hset(CELLS_KEY, mapping=shared.build(ALERTS[:2], EPOCH + 14 * DAY))
+        await redis.hset(META_KEY, mapping={"epoch": EPOCH + 14 * DAY, "built_at": time.time()})
+
+        worker = _heatmap()
+        worker.epoch = EPOCH
+        worker.add_alert(*ALERTS[2])
+        local = worker.density(ALERTS[2][0], ALERTS[2][1], now=now)
+
+        await worker.refresh()
+        assert worker.epoch == EPOCH + 14 * DAY
+        assert worker.stats()["pending_cells"] == 0
+
+        # A worker that never saw the increment reads the same raster from Redis
+        other = _heatmap()
+        await other.refresh()
+        return worker, other, local
+
+    worker, other, local = asyncio.run(run())
+    expected = _heatmap()
+    expected.epoch = EPOCH
+    expected._cells = expected.build(ALERTS[:3], EPOCH)
+    for heatmap in (worker, other):
+        for latitude, longitude, _, _ in ALERTS[:3]:
+            assert heatmap.density(latitude, longitude, now=now) == pytest.approx(
+                expected.density(latitude, longitude, now=now)
+            )
+    # The increment's own cells are far from the shared alerts: unchanged by the move
+    assert worker.density(ALERTS[2][0], ALERTS[2][1], now=now) == pytest.approx(local)
@@ -0,0 +1,66 @@
+import json
+import os
+from shapely.geometry import box
+from app.services.geofence_service import GeofenceEngine, Zone
+from app.services.knowledge_base import KnowledgeBase, _document
+
+def _knowledge(tmp_path, entries):
+    path = tmp_path / "knowledge.json"
+    path.write_text(json.dumps(entries))
+    knowledge = KnowledgeBase(path=str(path), engine=GeofenceEngine(grid_precision=0), min_score=0.0)
+    knowledge.reload_file()
+    return knowledge, path
+
+ENTRIES = [
+    {"id": "passport", "title": "Lost passport", "text": "Report a lost passport to the police and your embassy."},
+    {"id": "water", "title": "Drinking water", "text": "Drink bottled water. Bottled water is sold everywhere."},
+    {"id": "taxi", "title": "Taxis", "text": "Use prepaid taxis and agree on the fare for the taxi first."},
+    {"id": "goa-beach", "title": "Beach currents", "text": "Swim only at beaches with lifeguards.", "destinations": ["Goa"]},
+    {"id": "zone-5", "title": "Market pickpockets", "text": "Watch for pickpockets in the market.", "zones": [5]},
+]
+
+def test_bm25_ranks_by_term_frequency_and_rarity(tmp_path):
+    knowledge, _ = _knowledge(tmp_path, ENTRIES)
+    ranked = [document.id for document, _ in knowledge.search("bottled water passport")]
+    # Both documents match; the water one repeats its terms
+    assert ranked[:2] == ["water", "passport"]
+    assert knowledge.search("volcano") == []
+
+def test_local_documents_only_match_their_zone_or_destination(tmp_path):
+    knowledge, _ = _knowledge(tmp_path, ENTRIES)
+    assert knowledge.search("beaches lifeguards") == []
+    assert [d.id for d, _ in knowledge.search("beaches lifeguards", destination="North Goa")] == ["goa-beach"]
+    assert knowledge.search("pickpockets market", zone_ids=[4]) == []
+
+    assert [d.id for d, _ in knowledge.search("pickpockets market", zone_ids=[5])] == ["zone-5"]
+
+    # The same advice scoped to the tourist's zone ranks above the general copy
+    knowledge.upsert(_document("file", "taxi-5", "Taxis", ENTRIES[2]["text"], zones=[5]))
+    assert [d.id for d, _ in knowledge.search("taxi fare", zone_ids=[5])] == ["taxi-5", "taxi"]
+    assert [d.id for d, _ in knowledge.search("taxi fare")] == ["taxi"]
+
+def test_sync_reindexes_only_changes(tmp_path):
+    knowledge, _ = _knowledge(tmp_path, ENTRIES)
+    reindexed = knowledge.stats()["reindexed_documents"]
+
+    updated = [_document("file", e["id"], e["title"], e["text"], e.get("zones", ()), e.get("destinations", ()))
+               for e in ENTRIES[1:]]
+    updated[0] = _document("file", "water", "Drinking water", "Boil tap water before drinking.")
+    assert knowledge.sync("file", updated) == (1, 1)
+    assert knowledge.stats()["reindexed_documents"] == reindexed + 1
+    assert knowledge.search("passport") == []
+    assert [d.id for d, _ in knowledge.search("boil")] == ["water"]
+
+    # Zone documents are a separate source and survive file syncs
+    knowledge.sync_zones([Zone(9, "Old Fort", "risk", 3.0, box(0, 0, 1, 1))])
+    knowledge.sync("file", updated)
+    assert [d.id for d, _ in knowledge.search("old fort", zone_ids=[9])] == ["zone:9"]
+
+def test_a_malformed_file_keeps_the_current_documents(tmp_path):
+    knowledge, path = _knowledge(tmp_path, ENTRIES)
+    path.write_text('[{"id": "broken"')
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert not knowledge.reload_file()
+    assert [d.id for d, _ in knowledge.search("passport")] == ["passport"]
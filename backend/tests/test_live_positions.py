@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timezone
+import fakeredis.aioredis
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from app.api import tourist
+from app.core import live_positions as module
+from app.core.live_positions import LivePositionStore
+from app.schemas.location import LocationCreate
+from app.services.location_buffer import LocationBufferFull
+
+def _run(check, monkeypatch):
+    """Run `check(store)` against a live position store on a fresh fake Redis"""
+    async def main():
+        redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+        async def get_redis():
+            return redis
+        monkeypatch.setattr(module, "get_redis", get_redis)
+        await check(LivePositionStore())
+    asyncio.run(main())
+
+def test_coordinates_are_bounded():
+    with pytest.raises(ValidationError):
+        LocationCreate(latitude=91, longitude=0)
+    with pytest.raises(ValidationError):
+        LocationCreate(latitude=0, longitude=-181)
+
+def test_polar_fix_is_stored_with_its_real_latitude(monkeypatch):
+    async def check(store):
+        assert await store.update(1, 89.9, 10.0, datetime.now(timezone.utc))
+        assert (await store.get(1))["latitude"] == 89.9
+        assert [p["tourist_id"] for p in await store.within_radius(85.05, 10.0, 1000)] == [1]
+    _run(check, monkeypatch)
+
+class FullBuffer:
+    async def submit(self, tourist_id, fixes):
+        raise LocationBufferFull()
+
+def test_rejected_upload_does_not_move_the_tourist(monkeypatch):
+    async def check(store):
+        monkeypatch.setattr(tourist, "live_positions", store)
+        monkeypatch.setattr(tourist, "location_buffer", FullBuffer())
+        monkeypatch.setattr(tourist.settings, "LIVE_POSITIONS_ENABLED", True)
+        monkeypatch.setattr(tourist.settings, "LOCATION_BUFFER_ENABLED", True)
+        monkeypatch.setattr(tourist.settings, "TRAJECTORY_COMPRESSION_ENABLED", False)
+
+        fix = LocationCreate(latitude=28.6, longitude=77.2, timestamp=datetime.now(timezone.utc))
+        with pytest.raises(HTTPException) as error:
+            await tourist._store_fixes(None, 1, [fix])
+        assert error.value.status_code == 503
+        assert await store.get(1) is None
+    _run(check, monkeypatch)
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from app.schemas.location import LocationCreate
+from app.services.location_buffer import LocationWriteBuffer
+from app.services.tourist_service import location_row
+
+class FlakyBuffer(LocationWriteBuffer):
+    """Fails every write containing a row for `bad_tourist`"""
+
+    def __init__(self, bad_tourist=None, **kwargs):
+        super().__init__(**kwargs)
+        self.bad_tourist = bad_tourist
+        self.written = []
+
+    def _write(self, rows):
+        if any(row["tourist_id"] == self.bad_tourist for row in rows):
+            raise RuntimeError("write failed")
+        self.written.extend(rows)
+
+def _fix(minutes=0, naive=False):
+    timestamp = datetime(2026, 10, 1, 12, tzinfo=timezone.utc) + timedelta(minutes=minutes)
+    if naive:
+        timestamp = timestamp.replace(tzinfo=None)
+    return LocationCreate(latitude=28.6, longitude=77.2, timestamp=timestamp)
+
+def test_location_rows_are_aware_utc():
+    naive = location_row(1, _fix(naive=True))["timestamp"]
+    offset = location_row(1, LocationCreate(
+        latitude=28.6, longitude=77.2,
+        timestamp=datetime(2026, 10, 1, 17, 30, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    ))["timestamp"]
+    assert naive == offset == datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+    assert naive.tzinfo is not None and offset.utcoffset() == timedelta(0)
+
+def test_failing_batch_is_dropped_after_max_attempts():
+    async def run():
+        buffer = FlakyBuffer(bad_tourist=1, batch_size=2, max_attempts=3)
+        await buffer.submit(1, [_fix(0), _fix(1)])
+        await buffer.submit(2, [_fix(2), _fix(3)])
+        for _ in range(3):
+            await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert [row["tourist_id"] for row in buffer.written] == [2, 2]
+    assert buffer.stats()["dropped"] == 2
+    assert buffer.stats()["failed_flushes"] == 3
+    assert buffer.stats()["pending"] == 0
+
+def test_stop_reports_rows_it_could_not_write():
+    async def run():
+        buffer = FlakyBuffer(bad_tourist=1, batch_size=1, max_attempts=2)
+        await buffer.submit(1, [_fix(0), _fix(1)])
+        await buffer.stop()
+        return buffer
+
+    stats = asyncio.run(run()).stats()
+    assert stats["dropped"] == 1
+    assert stats["lost_at_shutdown"] == 1
+
+def test_bad_rows_do_not_take_down_their_chunk():
+    async def run():
+        buffer = FlakyBuffer(bad_tourist=1, batch_size=10, max_attempts=3)
+        await buffer.submit(2, [_fix(0)])
+        await buffer.submit(1, [_fix(1), _fix(2)])
+        await buffer.submit(3, [_fix(3)])
+        await buffer.flush()
+        written_first = [row["tourist_id"] for row in buffer.written]
+        for _ in range(2):
+            await buffer.flush()
+        return buffer, written_first
+
+    buffer, written_first = asyncio.run(run())
+    # The good tourists are written on the first flush, not held back with tourist 1
+    assert written_first == [2, 3]
+    assert [row["tourist_id"] for row in buffer.written] == [2, 3]
+    stats = buffer.stats()
+    assert stats["dropped"] == 2
+    assert stats["flushed"] == 2
+    assert stats["pending"] == 0
@@ -0,0 +1,54 @@
+import math
+import struct
+import pytest
+from app.core.location_codec import (
+    LocationCodecError, decode_location_batch, encode_location_batch
+)
+
+TIMESTAMPS = [1_700_000_000.0, 1_700_000_005.5, 1_700_000_012.25]
+LATITUDES = [28.6139391, 28.6141, -33.8688]
+LONGITUDES = [77.2090212, 77.2093, 151.2093]
+
+def test_round_trip():
+    batch = decode_location_batch(encode_location_batch(TIMESTAMPS, LATITUDES, LONGITUDES, [4.5, None, 6553.4]))
+    assert list(batch.timestamps) == TIMESTAMPS
+    assert list(batch.latitudes) == pytest.approx(LATITUDES, abs=1e-7)
+    assert list(batch.longitudes) == pytest.approx(LONGITUDES, abs=1e-7)
+    assert batch.accuracies[0] == 4.5 and math.isnan(batch.accuracies[1]) and batch.accuracies[2] == 6553.4
+
+    fixes = batch.fixes()
+    assert fixes[1].accuracy is None
+    assert fixes[2].timestamp.timestamp() == TIMESTAMPS[2]
+
+def test_tracks_across_the_antimeridian():
+    longitudes = [179.9, -179.95, 179.99, -180.0, 0.0]
+    payload = encode_location_batch([float(t) for t in range(5)], [0.0] * 5, longitudes)
+    assert list(decode_location_batch(payload).longitudes) == pytest.approx(longitudes, abs=1e-7)
+
+def test_bounds_are_checked():
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(encode_location_batch([0.0, 1.0], [89.0, 91.0], [0.0, 0.0]))
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(encode_location_batch([0.0], [0.0], [180.5]))
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(encode_location_batch([1.0, 0.0], [0.0, 0.0], [0.0, 0.0]))
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(encode_location_batch([0.0] * 3, [0.0] * 3, [0.0] * 3), max_points=2)
+    with pytest.raises(LocationCodecError):
+        # About 25 days between points does not fit the millisecond deltas
+        encode_location_batch([0.0, 2_200_000.0], [0.0, 0.0], [0.0, 0.0])
+
+    payload = encode_location_batch([0.0], [0.0], [0.0])
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(b"XX" + payload[2:])
+    empty = struct.pack("<2sBBHqii", b"TL", 1, 0, 0, 0, 0, 0)
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(empty)
+
+def test_truncated_and_padded_payloads_are_rejected():
+    payload = encode_location_batch(TIMESTAMPS, LATITUDES, LONGITUDES, [1.0, 2.0, 3.0])
+    for length in range(len(payload)):
+        with pytest.raises(LocationCodecError):
+            decode_location_batch(payload[:length])
+    with pytest.raises(LocationCodecError):
+        decode_location_batch(payload + b"\0")
@@ -0,0 +1,137 @@
+"""Partition maintenance against a real PostgreSQL, given by TEST_DATABASE_URL.
+
+Each test works in a scratch schema inside one transaction that is rolled
+back afterwards, so nothing is left behind.
+"""
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.services.location_maintenance import LocationMaintenanceService
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+TODAY = date(2024, 3, 10)
+
+def _at(day: date, hour: int = 12, minute: int = 0) -> datetime:
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+
+@pytest.fixture
+def db():
+    engine = create_engine(DATABASE_URL)
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    with engine.connect() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+        postgis = connection.execute(text("SELECT to_regtype('geometry') IS NOT NULL")).scalar()
+        connection.execute(text(f"SET search_path TO {schema}, public"))
+        connection.execute(text("""
+            CREATE TABLE locations (
+                id serial,
+                tourist_id integer,
+                latitude double precision NOT NULL,
+                longitude double precision NOT NULL,
+                "timestamp" timestamptz NOT NULL,
+                PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        """))
+        connection.execute(text("CREATE TABLE locations_default PARTITION OF locations DEFAULT"))
+        connection.execute(text(f"""
+            CREATE TABLE location_trajectories (
+                id serial PRIMARY KEY,
+                tourist_id integer NOT NULL,
+                bucket_start timestamptz NOT NULL,
+                bucket_seconds integer NOT NULL,
+                latitude double precision NOT NULL,
+                longitude double precision NOT NULL,
+                location {"geometry(POINT)" if postgis else "text"},
+                point_count integer NOT NULL,
+                first_timestamp timestamptz NOT NULL,
+                last_timestamp timestamptz NOT NULL,
+                UNIQUE (tourist_id, bucket_start)
+            )
+        """))
+        session = Session(bind=connection)
+        session.info["postgis"] = postgis
+        try:
+            yield session
+        finally:
+            session.close()
+            connection.rollback()
+    engine.dispose()
+
+def _insert(db, rows):
+    db.execute(
+        text('INSERT INTO locations (tourist_id, latitude, longitude, "timestamp") VALUES (:t, :lat, :lon, :at)'),
+        [{"t": tourist_id, "lat": latitude, "lon": longitude, "at": at} for tourist_id, latitude, longitude, at in rows]
+    )
+
+def _partition_of(db):
+    return dict(db.execute(text('SELECT "timestamp", tableoid::regclass::text FROM locations')).all())
+
+def test_new_partitions_take_their_rows_from_the_default(db):
+    service = LocationMaintenanceService(db)
+    yesterday = TODAY - timedelta(days=1)
+    db.execute(text(
+        f"CREATE TABLE locations_p{yesterday:%Y%m%d} PARTITION OF locations "
+        f"FOR VALUES FROM ('{_at(yesterday, 0).isoformat()}') TO ('{_at(TODAY, 0).isoformat()}')"
+    ))
+    _insert(db, [
+        (1, 28.6, 77.2, _at(yesterday)),
+        (1, 28.6, 77.2, _at(TODAY)),
+        (2, 28.7, 77.1, _at(TODAY + timedelta(days=1), 23, 59)),
+        (2, 28.7, 77.1, _at(TODAY + timedelta(days=5))),
+    ])
+    assert _partition_of(db)[_at(TODAY)] == "locations_default"
+
+    created = service.ensure_partitions(TODAY, days_ahead=2)
+
+    assert created == [f"locations_p{TODAY + timedelta(days=n):%Y%m%d}" for n in range(3)]
+    assert _partition_of(db) == {
+        _at(yesterday): f"locations_p{yesterday:%Y%m%d}",
+        _at(TODAY): f"locations_p{TODAY:%Y%m%d}",
+        _at(TODAY + timedelta(days=1), 23, 59): f"locations_p{TODAY + timedelta(days=1):%Y%m%d}",
+        # Outside the premade window: stays in the default partition
+        _at(TODAY + timedelta(days=5)): "locations_default",
+    }
+    # Already covered days are left alone
+    assert service.ensure_partitions(TODAY, days_ahead=2) == []
+
+def test_expired_partitions_are_downsampled_then_dropped(db):
+    if not db.info["postgis"]:
+        pytest.skip("downsampling stores PostGIS points")
+    service = LocationMaintenanceService(db)
+    old = TODAY - timedelta(days=10)
+    service.ensure_partitions(old, days_ahead=0)
+    _insert(db, [
+        (1, 28.60, 77.20, _at(old, 9, 0)),
+        (1, 28.62, 77.22, _at(old, 9, 4)),
+        (1, 28.70, 77.30, _at(old, 9, 6)),
+        (2, 28.50, 77.10, _at(old, 9, 1)),
+        (None, 28.50, 77.10, _at(old, 9, 2)),
+        # A straggler in the default partition, and one inside the retention window
+        (3, 28.40, 77.00, _at(old - timedelta(days=30))),
+        (3, 28.40, 77.00, _at(TODAY + timedelta(days=30))),
+    ])
+
+    dropped = service.drop_expired_partitions(_at(TODAY - timedelta(days=3), 0), bucket_seconds=300)
+
+    assert dropped == [f"locations_p{old:%Y%m%d}"]
+    trajectories = db.execute(text("""
+        SELECT tourist_id, bucket_start, latitude, longitude, point_count
+        FROM location_trajectories ORDER BY tourist_id, bucket_start
+    """)).all()
+    assert [(row.tourist_id, row.bucket_start, row.point_count) for row in trajectories] == [
+        (1, _at(old, 9, 0), 2),
+        (1, _at(old, 9, 5), 1),
+        (2, _at(old, 9, 0), 1),
+        (3, _at(old - timedelta(days=30), 12, 0), 1),
+    ]
+    assert trajectories[0].latitude == pytest.approx(28.61)
+    assert trajectories[0].longitude == pytest.approx(77.21)
+    assert list(_partition_of(db).values()) == ["locations_default"]
+    # The row inside the retention window is only downsampled on request, and only once
+    assert service.downsample("locations_default", 300) == 1
+    assert service.downsample("locations_default", 300) == 0
@@ -0,0 +1,18 @@
+from datetime import datetime, timedelta, timezone
+from app.schemas.location import LocationBatchCreate, LocationCreate
+
+def test_timestamps_are_aware_utc():
+    naive = LocationCreate(latitude=28.6, longitude=77.2, timestamp=datetime(2026, 10, 1, 12))
+    assert naive.timestamp == datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+    ist = timezone(timedelta(hours=5, minutes=30))
+    offset = LocationCreate(latitude=28.6, longitude=77.2, timestamp=datetime(2026, 10, 1, 17, 30, tzinfo=ist))
+    assert offset.timestamp == naive.timestamp and offset.timestamp.tzinfo == timezone.utc
+
+def test_batch_with_mixed_naive_and_aware_timestamps_is_ordered():
+    batch = LocationBatchCreate.model_validate_json("""{"locations": [
+        {"latitude": 28.6, "longitude": 77.2, "timestamp": "2026-10-01T12:02:00"},
+        {"latitude": 28.6, "longitude": 77.2, "timestamp": "2026-10-01T17:31:00+05:30"},
+        {"latitude": 28.6, "longitude": 77.2, "timestamp": "2026-10-01T12:00:00Z"}
+    ]}""")
+    assert [fix.timestamp.minute for fix in batch.locations] == [0, 1, 2]
@@ -0,0 +1,35 @@
+import asyncio
+import math
+import time
+import pytest
+from app.services.map_clusters import MapClusterService, PointIndex, tile_range
+
+def _slippy_tile(latitude, longitude, zoom):
+    scale = 2 ** zoom
+    phi = math.radians(latitude)
+    column = int((longitude + 180) / 360 * scale)
+    row = int((1 - math.asinh(math.tan(phi)) / math.pi) / 2 * scale)
+    return column, row
+
+def test_tile_range_matches_slippy_map_tiles():
+    columns, rows = tile_range(28.6, 77.1, 28.8, 77.3, 10)
+    assert (columns.start, rows.start) == _slippy_tile(28.8, 77.1, 10)
+    assert (columns[-1], rows[-1]) == _slippy_tile(28.6, 77.3, 10)
+
+def test_world_viewport_at_high_zoom_is_rejected_without_enumerating():
+    service = MapClusterService(max_tiles=64)
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="at most 64"):
+        asyncio.run(service.clusters(-90, -180, 90, 180, 22))
+    assert time.monotonic() - started < 1.0
+
+def test_clusters_count_every_point_once():
+    tourists = [(i, 28.6 + (i % 100) * 0.002, 77.1 + (i // 100) * 0.002) for i in range(1000)]
+    alerts = [(1, "high", 28.65, 77.15), (2, "critical", 28.7, 77.2)]
+    index = PointIndex.build(tourists, alerts)
+    columns, rows = tile_range(28.6, 77.1, 28.8, 77.3, 12)
+
+    clusters = [cluster for column in columns for row in rows for cluster in index.clusters(12, column, row)]
+    assert sum(cluster["tourists"] for cluster in clusters) == 1000
+    assert sum(cluster["alerts"] for cluster in clusters) == 2
+    assert {cluster["worst_priority"] for cluster in clusters} >= {"high", "critical"}
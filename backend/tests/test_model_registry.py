@@ -0,0 +1,21 @@
+import asyncio
+from app.services.model_registry import MicroBatcher
+
+def _submit_all(predict_batch, items):
+    async def main():
+        batcher = MicroBatcher(predict_batch, max_batch_size=len(items), max_wait=0.05)
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True), batcher.stats()
+        finally:
+            await batcher.stop()
+    return asyncio.run(main())
+
+def test_batches_concurrent_calls():
+    results, stats = _submit_all(lambda inputs: [x * 2 for x in inputs], [1, 2, 3, 4])
+    assert results == [2, 4, 6, 8]
+    assert stats["batches"] == 1
+
+def test_short_output_fails_every_caller():
+    results, stats = _submit_all(lambda inputs: inputs[:-1], [1, 2, 3])
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["failed_batches"] == 1
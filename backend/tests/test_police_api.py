@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+import threading
+from types import SimpleNamespace
+import fakeredis.aioredis
+import pytest
+from fastapi import HTTPException, Response
+from app.api import police
+from app.api.police import _history_window
+from app.core import live_positions as live_positions_module
+from app.core.live_positions import LivePositionStore
+
+def test_history_window_reads_naive_bounds_as_utc():
+    start, end = _history_window(datetime(2026, 10, 1), datetime(2026, 10, 2))
+    assert start == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert end == datetime(2026, 10, 2, tzinfo=timezone.utc)
+
+def test_history_window_accepts_naive_start_with_default_end():
+    start, end = _history_window(datetime.now() - timedelta(hours=1), None)
+    assert start.tzinfo is not None and start < end
+
+def test_history_window_mixed_offsets():
+    start, end = _history_window(
+        datetime(2026, 10, 1, 5, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+        datetime(2026, 10, 1, 1)
+    )
+    assert end - start == timedelta(hours=1)
+
+def test_history_window_rejects_reversed_bounds():
+    with pytest.raises(HTTPException) as error:
+        _history_window(datetime(2026, 10, 2), datetime(2026, 10, 1))
+    assert error.value.status_code == 400
+
+class FakeProximityService:
+    """Alert 1 at India Gate; its stored `current_location` lookup must not be used"""
+
+    def __init__(self, db):
+        pass
+
+    def get_tourists_near_alert(self, alert_id, radius_m, limit=100):
+        raise AssertionError("stored current_location was queried")
+
+    def get_alert_point(self, alert_id):
+        # Database calls must stay off the event loop
+        assert threading.current_thread() is not threading.main_thread()
+        return (28.6129, 77.2295) if alert_id == 1 else None
+
+    def get_tourist_identities(self, tourist_ids):
+        assert threading.current_thread() is not threading.main_thread()
+        return {tourist_id: (f"DID{tourist_id}", f"Tourist {tourist_id}") for tourist_id in tourist_ids if tourist_id != 9}
+
+def test_nearby_tourists_uses_live_positions(monkeypatch):
+    async def main():
+        redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+        async def get_redis():
+            return redis
+        monkeypatch.setattr(live_positions_module, "get_redis", get_redis)
+        store = LivePositionStore()
+        monkeypatch.setattr(police, "live_positions", store)
+        monkeypatch.setattr(police, "ProximityService", FakeProximityService)
+        monkeypatch.setattr(police.settings, "LIVE_POSITIONS_ENABLED", True)
+
+        now = datetime.now(timezone.utc)
+        await store.update(1, 28.6135, 77.2295, now)  # about 70 m away
+        await store.update(2, 28.6400, 77.2295, now)  # about 3 km away
+        await store.update(9, 28.6130, 77.2295, now)  # no tourist row
+
+        nearby = await police.get_tourists_near_alert(1, radius_m=1000, limit=100, current_user=None, db=None)
+        assert [t["tourist_id"] for t in nearby] == [1]
+        assert nearby[0]["name"] == "Tourist 1" and 60 < nearby[0]["distance_m"] < 80
+
+        with pytest.raises(HTTPException) as error:
+            await police.get_tourists_near_alert(2, radius_m=1000, limit=100, current_user=None, db=None)
+        assert error.value.status_code == 404
+    asyncio.run(main())
+
+class FakeAlertFeed:
+    """Keyset pages over in-memory alerts, with the (created_at, id) ordering of `AlertService.get_alerts`"""
+
+    alerts = []
+    calls = []
+
+    def __init__(self, db):
+        pass
+
+    def get_alerts(self, status=None, limit=50, priority=None, alert_type=None, start=None, end=None, bbox=None, after=None):
+        FakeAlertFeed.calls.append(after)
+        rows = sorted(self.alerts, key=lambda alert: (alert.created_at, alert.id), reverse=True)
+        if after:
+            rows = [alert for alert in rows if (alert.created_at, alert.id) < after]
+        return rows[:limit]
+
+def _feed_page(cursor=None, limit=3):
+    response = Response()
+    rows = police.get_alerts(
+        response=response, status=None, priority=None, alert_type=None, start=None, end=None,
+        min_latitude=None, min_longitude=None, max_latitude=None, max_longitude=None,
+        cursor=cursor, limit=limit, current_user=None, db=None
+    )
+    return [row["id"] for row in rows], response.headers.get("X-Next-Cursor")
+
+def test_alert_feed_cursor_walks_every_alert_once(monkeypatch):
+    base = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    # Several alerts share a timestamp, so the id breaks ties
+    FakeAlertFeed.alerts = [
+        SimpleNamespace(
+            id=alert_id, tourist_id=1, type="panic", priority="high", status="active", message="",
+            address=None, alert_metadata=None, assigned_officer_id=None,
+            created_at=base + timedelta(seconds=alert_id // 3), acknowledged_at=None, resolved_at=None,
+            latitude=None, longitude=None
+        )
+        for alert_id in range(1, 9)
+    ]
+    FakeAlertFeed.calls = []
+    monkeypatch.setattr(police, "AlertService", FakeAlertFeed)
+
+    seen, cursor = [], None
+    while True:
+        ids, cursor = _feed_page(cursor)
+        seen.extend(ids)
+        if cursor is None:
+            break
+    assert seen == [8, 7, 6, 5, 4, 3, 2, 1]
+    # The cursor carries the last row's (created_at, id), timezone included
+    assert FakeAlertFeed.calls[1] == (base + timedelta(seconds=2), 6)
+
+    # A full last page still hands out a cursor, which then yields an empty page
+    ids, cursor = _feed_page(limit=8)
+    assert len(ids) == 8 and cursor is not None
+    assert _feed_page(cursor, limit=8) == ([], None)
+
+def test_alert_feed_rejects_a_malformed_cursor(monkeypatch):
+    monkeypatch.setattr(police, "AlertService", FakeAlertFeed)
+    with pytest.raises(HTTPException) as error:
+        _feed_page("not a cursor")
+    assert error.value.status_code == 400
@@ -0,0 +1,69 @@
+import asyncio
+import fakeredis.aioredis
+from app.services import safety_score_scheduler as module
+from app.services.safety_score_scheduler import LOCK_KEY, SafetyScoreScheduler, crossed_threshold
+
+class FakeScheduler(SafetyScoreScheduler):
+    """Scores `total` tourists without a database, optionally stealing the lock mid-cycle"""
+
+    def __init__(self, redis, total, steal_lock=False, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.redis = redis
+        self.total = total
+        self.steal_lock = steal_lock
+        self.delay = delay
+        self.batches = 0
+
+    def _load(self, after_id):
+        return [(i, f"t{i}", 8.0, 28.6, 77.2) for i in range(after_id + 1, min(after_id + self.batch_size, self.total) + 1)]
+
+    async def _score(self, rows):
+        self.batches += 1
+        if self.steal_lock:
+            await self.redis.set(LOCK_KEY, "other worker")
+        await asyncio.sleep(self.delay)
+        return len(rows)
+
+def _run(check):
+    """Run `check(redis)` on a fresh fake Redis inside one event loop"""
+    async def main():
+        redis = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+        async def get_redis():
+            return redis
+        original, module.get_redis = module.get_redis, get_redis
+        try:
+            await check(redis)
+        finally:
+            module.get_redis = original
+    asyncio.run(main())
+
+def test_crossed_threshold_only_on_the_way_down():
+    assert crossed_threshold(None, 4.0, threshold=5.0)
+    assert crossed_threshold(6.0, 4.9, threshold=5.0)
+    assert not crossed_threshold(4.0, 3.0, threshold=5.0)
+    assert not crossed_threshold(4.0, 6.0, threshold=5.0)
+
+def test_cycle_keeps_lock_until_the_interval_ends():
+    async def check(redis):
+        scheduler = FakeScheduler(redis, total=25, batch_size=10, interval=60, lock_ttl=300)
+        assert await scheduler.recompute_once() == 25
+        assert scheduler.batches == 3
+        assert 0 < await redis.pttl(LOCK_KEY) <= 60_000
+        # A second worker in the same interval skips the cycle
+        assert await FakeScheduler(redis, total=25, batch_size=10, interval=60).recompute_once() == 0
+    _run(check)
+
+def test_overrunning_cycle_releases_the_lock():
+    async def check(redis):
+        scheduler = FakeScheduler(redis, total=20, batch_size=10, interval=0.01, delay=0.02, lock_ttl=300)
+        assert await scheduler.recompute_once() == 20
+        assert await redis.get(LOCK_KEY) is None
+    _run(check)
+
+def test_lost_lock_ends_cycle_and_is_not_released():
+    async def check(redis):
+        scheduler = FakeScheduler(redis, total=50, batch_size=10, steal_lock=True, interval=60, lock_ttl=300)
+        assert await scheduler.recompute_once() == 10
+        assert await redis.get(LOCK_KEY) == "other worker"
+    _run(check)
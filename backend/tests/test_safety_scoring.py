@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+from shapely.geometry import box
+from benchmarks.geofence import synthetic_zones
+from app.services.geofence_service import GeofenceEngine, Zone
+from app.services.incident_heatmap import IncidentHeatmap
+from app.services.safety_scoring import DAY_FACTOR, EVENING_FACTOR, NIGHT_FACTOR, SafetyScoreEngine
+
+NOW = datetime(2024, 3, 1, 6, 30, tzinfo=timezone.utc).timestamp()  # 12:00 in Delhi
+
+def _engine():
+    zones = GeofenceEngine(grid_precision=7)
+    zones.load(synthetic_zones(40))
+    heatmap = IncidentHeatmap(cell_m=100.0, bandwidth_m=300.0)
+    heatmap.epoch = NOW
+    rng = np.random.default_rng(4)
+    heatmap._cells = heatmap.build(
+        [(28.5 + rng.random() * 0.3, 77.0 + rng.random() * 0.4, "high", NOW - rng.random() * 86400 * 30)
+         for _ in range(200)],
+        NOW
+    )
+    return SafetyScoreEngine(engine=zones, heatmap=heatmap, timezone_name="Asia/Kolkata")
+
+def test_single_scores_match_the_batch():
+    engine = _engine()
+    rng = np.random.default_rng(9)
+    latitudes = 28.5 + rng.random(300) * 0.3
+    longitudes = 77.0 + rng.random(300) * 0.4
+    timestamps = NOW + rng.random(300) * 600
+
+    batch = engine.score_batch(latitudes, longitudes, timestamps)
+    # Large batches use the ray caster, single points the grid; both agree
+    single = [engine.score(*point) for point in zip(latitudes.tolist(), longitudes.tolist(), timestamps.tolist())]
+    assert batch.tolist() == single
+    # And scoring is deterministic
+    assert engine.score_batch(latitudes, longitudes, timestamps).tolist() == batch.tolist()
+    assert len(set(batch.tolist())) > 1
+
+@pytest.mark.parametrize("local_time, factor", [
+    ("06:00", DAY_FACTOR), ("18:59", DAY_FACTOR), ("19:00", EVENING_FACTOR),
+    ("22:59", EVENING_FACTOR), ("23:00", NIGHT_FACTOR), ("05:59", NIGHT_FACTOR),
+])
+def test_time_of_day_uses_local_hours(local_time, factor):
+    engine = _engine()
+    timestamp = datetime.fromisoformat(f"2024-03-01T{local_time}:00+05:30")
+    assert engine.factors_at(0.0, 0.0, timestamp)["time_of_day"] == factor
+
+def test_least_safe_zone_sets_the_location_factor():
+    zones = GeofenceEngine(grid_precision=0)
+    zones.load([
+        Zone(1, "market", "moderate", 6.0, box(77.0, 28.0, 77.2, 28.2)),
+        Zone(2, "alley", "risk", 2.0, box(77.1, 28.1, 77.2, 28.2)),
+    ])
+    engine = SafetyScoreEngine(engine=zones, heatmap=IncidentHeatmap(), timezone_name="Asia/Kolkata")
+
+    assert engine.factors_at(28.05, 77.05, NOW)["location_safety"] == pytest.approx(1.04)
+    assert engine.factors_at(28.15, 77.15, NOW)["location_safety"] == pytest.approx(0.88)
+    assert engine.factors_at(29.0, 77.0, NOW)["location_safety"] == 1.0
+    # Optional factors are neutral unless given, and the score is clipped
+    assert engine.score(29.0, 77.0, NOW) == pytest.approx(7.7)
+    assert engine.score(29.0, 77.0, NOW, crowd_density=0.01) == 1.0
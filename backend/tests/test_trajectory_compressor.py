@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from shapely.geometry import Point
+from app.schemas.location import LocationCreate
+from app.services import geofence_tracker
+from app.services.geofence_service import Zone
+from app.services.geofence_tracker import GeofenceEvent, send_geofence_events
+from app.services.trajectory_compressor import TrajectoryCompressor
+
+def _fixes(start, count):
+    base = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+    # Straight line at constant speed: nothing but the first fix needs storing
+    return [
+        LocationCreate(latitude=28.6 + i * 0.0001, longitude=77.2, timestamp=base + timedelta(seconds=10 * i))
+        for i in range(start, start + count)
+    ]
+
+def test_straight_track_compresses_to_its_ends():
+    compressor = TrajectoryCompressor(distance_tolerance=10.0, time_tolerance=3600.0)
+    assert len(compressor.compress(1, _fixes(0, 50))) <= 3
+
+class FakeDispatcher:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, tourist_id, alert_data, notify, priority=None):
+        self.submitted.append((tourist_id, priority))
+
+def test_alert_fix_mid_batch_is_stored_with_its_neighbours():
+    compressor = TrajectoryCompressor(distance_tolerance=10.0, time_tolerance=3600.0)
+    fixes = _fixes(0, 20)
+    alert = fixes[12]
+
+    kept = [fix.timestamp for fix in compressor.compress(1, fixes, {alert.timestamp.timestamp()})]
+    assert fixes[11].timestamp in kept
+    assert alert.timestamp in kept
+    assert fixes[13].timestamp in kept
+
+def test_geofence_alert_marks_the_track(monkeypatch):
+    compressor = TrajectoryCompressor(distance_tolerance=10.0, time_tolerance=3600.0)
+    dispatcher = FakeDispatcher()
+    monkeypatch.setattr(geofence_tracker, "trajectory_compressor", compressor)
+    monkeypatch.setattr(geofence_tracker, "alert_dispatcher", dispatcher)
+
+    fixes = _fixes(0, 10)
+    compressor.compress(1, fixes)
+    zone = Zone(3, "riverbank", "risk", 2.0, Point(77.2, 28.6).buffer(0.01))
+    asyncio.run(send_geofence_events({"id": 1, "name": "A"}, [GeofenceEvent(1, zone, "enter", 0.0)]))
+
+    kept = [fix.timestamp for fix in compressor.compress(1, _fixes(10, 1))]
+    # The fix held before the alert and the first one after it
+    assert kept == [fixes[-1].timestamp, _fixes(10, 1)[0].timestamp]
+    assert dispatcher.submitted == [(1, "medium")]
@@ -0,0 +1,74 @@
+import asyncio
+import struct
+from datetime import datetime, timezone
+from app.api import websocket
+from app.core import location_codec
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.geofence_service import GeofenceEngine
+from app.services.geofence_tracker import GeofenceStateTracker
+
+def test_binary_location_frames_feed_the_anomaly_detector(monkeypatch):
+    sent = []
+
+    async def send_anomaly_alerts(tourist_data, anomalies, store=True):
+        sent.append((tourist_data, list(anomalies), store))
+
+    async def send_geofence_events(tourist_data, events, mark_track=True):
+        assert not mark_track
+
+    monkeypatch.setattr(websocket, "anomaly_detector", AnomalyDetector(engine=GeofenceEngine()))
+    monkeypatch.setattr(websocket, "geofence_tracker", GeofenceStateTracker(engine=GeofenceEngine()))
+    monkeypatch.setattr(websocket, "send_anomaly_alerts", send_anomaly_alerts)
+    monkeypatch.setattr(websocket, "send_geofence_events", send_geofence_events)
+    monkeypatch.setattr(websocket, "_load_tourist", lambda tourist_id: ({"id": tourist_id, "name": "A", "digital_id": "D"}, None))
+    monkeypatch.setattr(websocket.settings, "ANOMALY_DETECTION_ENABLED", True)
+
+    # 10 km in 60 s, far above walking or driving speed
+    frame = struct.pack("<I", 7) + location_codec.encode_location_batch(
+        [1_700_000_000.0, 1_700_000_060.0], [28.60, 28.69], [77.20, 77.20]
+    )
+    asyncio.run(websocket.handle_binary_location_update(frame))
+
+    assert len(sent) == 1
+    tourist_data, anomalies, store = sent[0]
+    assert tourist_data["digital_id"] == "D"
+    assert [a.anomaly_type for a in anomalies] == ["unusual_movement"]
+    # The socket's tourist id is not authenticated, so nothing is stored
+    assert not store
+
+
+def test_naive_iso_timestamps_are_utc():
+    expected = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc).timestamp()
+    assert websocket._epoch("2024-03-01T12:00:00") == expected
+    assert websocket._epoch("2024-03-01T17:30:00+05:30") == expected
+    assert websocket._epoch(expected) == expected
+
+def test_unstored_anomalies_only_notify(monkeypatch):
+    from app.services import anomaly_alerts
+    from app.services.anomaly_detector import Anomaly
+
+    jobs, notified = [], []
+
+    class Dispatcher:
+        def submit(self, tourist_id, alert_data, notify, dedupe_key=None, priority=None):
+            jobs.append((tourist_id, alert_data, priority, notify))
+
+    class Notifications:
+        async def send_anomaly_alert(self, tourist_data, alert_data):
+            notified.append(alert_data)
+
+    monkeypatch.setattr(anomaly_alerts, "alert_dispatcher", Dispatcher())
+    monkeypatch.setattr(anomaly_alerts, "notification_service", Notifications())
+    anomaly = Anomaly(7, "unusual_movement", "high", 0.9, "Fast", 28.6, 77.2, 1_700_000_000.0, {})
+
+    async def run():
+        await anomaly_alerts.send_anomaly_alerts({"id": 7}, [anomaly], store=False)
+        # The dispatcher worker calls notify without a stored alert
+        for job in jobs:
+            await job[3](None)
+
+    asyncio.run(run())
+
+    assert [job[:3] for job in jobs] == [(7, None, "high")]
+    assert notified[0]["id"] is None
+    assert notified[0]["created_at"] == datetime.fromtimestamp(1_700_000_000.0, tz=timezone.utc).isoformat()